@@ -1,26 +1,84 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import cv2 as cv
-import numpy as np
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import asyncio
-import base64
+import functools
 import json
-from typing import Dict, List, Set
-from dataclasses import dataclass, asdict
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, asdict, field
 import sys
 import os
+from contextlib import aclosing, asynccontextmanager
+
+from llm_service import LLMService
+from narrator import NarrationScheduler
+from frame_hub import FrameHub
+from cameras import CameraSource, open_capture, parse_source
+from pacing import FramePacer
+from frame_protocol import PROTOCOL_BINARY, PROTOCOLS, encode_binary_frame, encode_json_frame
+from metrics import StageMetrics, render_metric
+from jpeg_encoder import BitrateController, create_encoder
+from events import SceneEventStream
+
+# Measured from here so /api/models can report how long the vision libraries
+# and the rest of this module took to import
+_import_start = time.perf_counter()
 
 # Add the libs directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../libs/cv-utils/src'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../libs/od-models/src'))
 
 from cv_utils.tracker import COLOR_RANGES, BOX_COLORS
-from od_models.object_detection_tracker import detect_and_draw as yolo_detect_and_draw
-from od_models.mobilenet_ssd_detector import detect_and_draw as mobilenet_detect_and_draw
-from llm_service import LLMService
-
-app = FastAPI(title="Color Tracker API", version="1.0.0")
+from cv_utils.segmentation import ColorSegmenter, draw_color_blobs
+from cv_utils.motion import MotionGate, update_regional
+from od_models import object_detection_tracker as yolo_detector
+from od_models import mobilenet_ssd_detector as mobilenet_detector
+from od_models.tracking import DetectionTracker
+from pipeline import DetectionPool, FramePipeline
+from inference_pool import ProcessInferencePool, detect_objects_task, segment_colors_task
+
+# Detector module per object mode. Neither loads its model at import time: the
+# first detection (or a warm-up) of a mode loads it, so color-only deployments
+# never import ultralytics/torch or read model weights.
+DETECTORS = {
+    "object": mobilenet_detector,
+    "object_yolo": yolo_detector,
+}
+
+# Seconds spent importing this module and until the app was ready to serve
+startup_stats = {"import_seconds": time.perf_counter() - _import_start, "ready_seconds": None}
+
+# Strong references to background warm-up tasks (asyncio only keeps weak ones)
+_warmup_tasks = set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_stats["ready_seconds"] = time.perf_counter() - _import_start
+
+    # Optional warm-up hook, e.g. CV_API_WARMUP=object,object_yolo. Runs in the
+    # background so the API is ready immediately
+    for mode in os.getenv("CV_API_WARMUP", "").split(","):
+        mode = mode.strip()
+        if mode in DETECTORS:
+            schedule_warmup(mode)
+        elif mode:
+            print(f"Ignoring unknown warm-up mode: {mode}")
+    yield
+
+    for camera in list(cameras.values()):
+        if camera.pipeline:
+            camera.pipeline.stop()
+    detection_pool.stop()
+    if inference_pool is not None:
+        inference_pool.stop()
+    await narration_scheduler.close()
+    await llm_service.close()
+
+app = FastAPI(title="Color Tracker API", version="1.0.0", lifespan=lifespan)
 
 # CORS configuration for Angular frontend
 app.add_middleware(
@@ -31,24 +89,197 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global state
+DEFAULT_CAMERA = "default"
+
+# Scene events kept per camera for replay
+EVENT_BUFFER_SIZE = int(os.getenv("CV_API_EVENT_BUFFER", "1024"))
+# Seconds without scene events before an event stream sends a keep-alive
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("CV_API_EVENT_KEEPALIVE", "15"))
+
+
+# Per-camera state. Each registered camera has its own capture, pipeline,
+# detection mode and results; the legacy /api/... routes act on the default camera
 class TrackerState:
-    def __init__(self):
+    def __init__(self, camera_id: str = DEFAULT_CAMERA, source: CameraSource = 0):
+        self.camera_id = camera_id
+        self.source = source
         self.is_running = False
         self.detection_mode = "color"  # "color" or "object"
         self.enabled_colors: Set[str] = {"Red", "Blue", "Yellow", "Green"}
-        self.camera_index = 0
         self.min_area = 500
+        # Color segmentation runs on frames downscaled by this factor (boxes are mapped back)
+        self.color_scale = float(os.getenv("CV_API_COLOR_SCALE", "1.0"))
+        # Run the object detector every N frames and track objects in between (1 = every frame)
+        self.detect_interval = int(os.getenv("CV_API_DETECT_INTERVAL", "1"))
+        # Published frames are downscaled to this width (0 = processing resolution)
+        self.preview_width = int(os.getenv("CV_API_PREVIEW_WIDTH", "0"))
+        # Skip detection on frames where nothing moved (and segment only changed regions)
+        self.motion_gating = os.getenv("CV_API_MOTION_GATING", "1") != "0"
+        # Frame differencing stage in front of detection
+        self.motion_gate = MotionGate()
+        # Tracking-by-detection state per object mode, created on the mode's first frame
+        self.object_trackers: Dict[str, DetectionTracker] = {}
+        # Results of the last processed frame, reused while nothing moves
+        self.last_blobs = []
+        self.last_detections = []
+        # Narration objects of the last processed frame
+        self.detected_objects: List[Dict] = []
         self.cap = None
+        self.pipeline: FramePipeline = None
+        self.hub = FrameHub()
+        # Changes of the scene from frame to frame, for event stream clients
+        self.events = SceneEventStream(camera_id, EVENT_BUFFER_SIZE)
         self.detection_stats: Dict[str, int] = {color: 0 for color in COLOR_RANGES.keys()}
-        self.fps = 0
+
+    @property
+    def camera_index(self) -> Optional[int]:
+        return self.source if isinstance(self.source, int) else None
+
+    @property
+    def fps(self):
+        return self.pipeline.fps if self.pipeline else 0
+
 
 tracker_state = TrackerState()
+cameras: Dict[str, TrackerState] = {DEFAULT_CAMERA: tracker_state}
 llm_service = LLMService()
 
+# Detection worker threads, shared by the pipelines of all cameras and handed
+# out round-robin between them
+DETECT_WORKERS = int(os.getenv("CV_API_DETECT_WORKERS", "2"))
+detection_pool = DetectionPool(DETECT_WORKERS)
+
+# Where detection and color segmentation run: "thread" runs them on the detection
+# worker threads, "process" hands each frame to one of DETECT_WORKERS worker
+# processes (each with its own models) so they do not contend for the GIL
+INFERENCE_BACKEND = os.getenv("CV_API_INFERENCE_BACKEND", "thread")
+inference_pool = ProcessInferencePool(DETECT_WORKERS) if INFERENCE_BACKEND == "process" else None
+
+# JPEG encoding of published frames: the encoder ("auto" picks simplejpeg or
+# PyTurboJPEG when installed, else OpenCV), the default quality, and the bitrate
+# each video client's quality is adapted to (0 = fixed quality, unless the
+# client asks for a bitrate)
+jpeg_encoder = create_encoder(os.getenv("CV_API_JPEG_ENCODER", "auto"))
+JPEG_QUALITY = int(os.getenv("CV_API_JPEG_QUALITY", "80"))
+TARGET_BITRATE_KBPS = float(os.getenv("CV_API_TARGET_BITRATE_KBPS", "0"))
+
+# Latency histograms of every processing stage per camera, for /metrics and /api/stats
+stage_metrics = StageMetrics()
+
+
+def get_camera(camera_id: str) -> TrackerState:
+    camera = cameras.get(camera_id)
+    if camera is None:
+        raise HTTPException(status_code=404, detail=f"Unknown camera: {camera_id}")
+    return camera
+
+
+# Single-pass color segmentation engines (same implementation as the CLI tracker).
+# A segmenter reuses its frame buffers, so each concurrent detection worker borrows
+# its own from the pool of its processing scale. At most DETECT_WORKERS are kept per
+# scale, and those of scales no camera uses anymore are retired with their buffers
+color_segmenters: List[ColorSegmenter] = []
+_idle_color_segmenters: Dict[float, List[ColorSegmenter]] = defaultdict(list)
+_color_segmenters_lock = threading.Lock()
+
+
+def _borrow_color_segmenter(scale: float) -> ColorSegmenter:
+    with _color_segmenters_lock:
+        idle = _idle_color_segmenters[scale]
+        if idle:
+            return idle.pop()
+        segmenter = ColorSegmenter(COLOR_RANGES, scale=scale)
+        color_segmenters.append(segmenter)
+        return segmenter
+
+
+def _return_color_segmenter(segmenter: ColorSegmenter):
+    with _color_segmenters_lock:
+        scales = {camera.color_scale for camera in cameras.values()}
+        idle = _idle_color_segmenters[segmenter.scale]
+        if segmenter.scale in scales and len(idle) < DETECT_WORKERS:
+            idle.append(segmenter)
+        else:
+            color_segmenters.remove(segmenter)
+
+        # Idle segmenters left from before a scale change
+        for scale in [scale for scale in _idle_color_segmenters if scale not in scales]:
+            for retired in _idle_color_segmenters.pop(scale):
+                color_segmenters.remove(retired)
+
+
+# Guards tracker creation: two workers on a camera's first frames must not each create one
+_object_trackers_lock = threading.Lock()
+
+
+def get_object_tracker(camera: TrackerState, mode: str) -> DetectionTracker:
+    tracker = camera.object_trackers.get(mode)
+    if tracker is not None:
+        return tracker
+
+    with _object_trackers_lock:
+        tracker = camera.object_trackers.get(mode)
+        if tracker is not None:
+            return tracker
+        detector = DETECTORS[mode]
+
+        def detect(frame):
+            if inference_pool is not None:
+                detections, timings = inference_pool.run(detect_objects_task, frame, detector.__name__, True)
+            else:
+                timings = {}
+                detections = detector.detect_batch([frame], as_array=True, timings=timings)[0]
+            stage_metrics.observe_all(camera.camera_id, timings)
+            return detections
+
+        tracker = DetectionTracker(detect, detector.class_names(), camera.detect_interval)
+        camera.object_trackers[mode] = tracker
+        return tracker
+
+
+def detection_is_stateful(camera: TrackerState) -> bool:
+    """Whether processing a frame of the camera depends on the previous frames, which must then be processed first"""
+    # Motion gating compares with the previous frame and reuses its results where nothing moved;
+    # object trackers follow objects by optical flow from the previous frame
+    return camera.motion_gating or camera.detection_mode in DETECTORS
+
+
+def reset_detection_state(camera: TrackerState):
+    """Forget tracks and previous results, e.g. after a mode, camera or settings change"""
+    for tracker in camera.object_trackers.values():
+        tracker.reset()
+    camera.motion_gate.reset()
+
+
+def segment_colors(camera: TrackerState, frame, regions=None):
+    """Run color segmentation with a segmenter no other thread is using"""
+    if inference_pool is not None:
+        blobs, timings = inference_pool.run(segment_colors_task, frame, camera.enabled_colors, camera.min_area,
+                                            regions, camera.color_scale, True)
+        stage_metrics.observe_all(camera.camera_id, timings)
+        return blobs
+
+    segmenter = _borrow_color_segmenter(camera.color_scale)
+    try:
+        blobs = segmenter.segment(frame, camera.enabled_colors, camera.min_area, regions)
+        stage_metrics.observe_all(camera.camera_id, segmenter.last_timings)
+        return blobs
+    finally:
+        _return_color_segmenter(segmenter)
+
+
 # Global narration state (reset when mode changes)
 current_global_narration = ""
 
+# Seconds between narration updates of each camera
+NARRATION_INTERVAL_SECONDS = float(os.getenv("CV_API_NARRATION_INTERVAL", "3.0"))
+
+# Narrates each camera once per interval for all of its viewers
+narration_scheduler = NarrationScheduler(
+    llm_service, NARRATION_INTERVAL_SECONDS,
+    lambda camera_id, seconds: stage_metrics.observe(camera_id, "narration", seconds))
+
+
 def get_position_label(x, y, w, h, frame_width, frame_height):
     cx = x + w // 2
     cy = y + h // 2
@@ -76,6 +307,7 @@ def get_position_label(x, y, w, h, frame_width, frame_height):
     else:
         return h_label
 
+
 @dataclass
 class DetectionStats:
     red: int
@@ -84,138 +316,538 @@ class DetectionStats:
     green: int
     fps: float
     is_running: bool
+    # Per-stage latency summaries (count, average, estimated p50/p90/p99)
+    stages: Dict[str, Dict] = field(default_factory=dict)
+
 
 @app.get("/")
 async def root():
     return {"message": "Color Tracker API", "version": "1.0.0"}
 
+
 @app.get("/api/status")
-async def get_status():
+@app.get("/api/cameras/{camera_id}/status")
+async def get_status(camera_id: str = DEFAULT_CAMERA):
     """Get current tracker status"""
+    camera = get_camera(camera_id)
+    # Workers add and retire segmenters concurrently
+    with _color_segmenters_lock:
+        segmenters = list(color_segmenters)
+    return {
+        "camera_id": camera.camera_id,
+        "source": camera.source,
+        "is_running": camera.is_running,
+        "detection_mode": camera.detection_mode,
+        "enabled_colors": list(camera.enabled_colors),
+        "camera_index": camera.camera_index,
+        "min_area": camera.min_area,
+        "color_scale": camera.color_scale,
+        "color_buffers": [segmenter.arena.stats() for segmenter in segmenters],
+        "pipeline": camera.pipeline.stats() if camera.pipeline else None,
+        "tracking": {mode: tracker.stats() for mode, tracker in camera.object_trackers.items()},
+        "motion_gating": {"enabled": camera.motion_gating, **camera.motion_gate.stats()},
+        "inference": {"backend": INFERENCE_BACKEND, **(inference_pool.stats() if inference_pool else {})},
+        "narration": {**llm_service.stats(), "subscribers": narration_scheduler.stats()},
+        "events": camera.events.stats()
+    }
+
+
+@app.get("/api/cameras")
+async def list_cameras():
+    """Registered cameras and the detection workers they share"""
+    return {
+        "cameras": [{
+            "camera_id": camera.camera_id,
+            "source": camera.source,
+            "is_running": camera.is_running,
+            "detection_mode": camera.detection_mode,
+            "fps": camera.fps,
+        } for camera in cameras.values()],
+        "detect_workers": detection_pool.workers,
+    }
+
+
+@app.post("/api/cameras")
+async def add_camera(camera_id: str, source: str):
+    """
+    Register a camera source: a device index ("0"), a video file path (played
+    in a loop) or a stream URL such as rtsp://...
+    """
+    if camera_id in cameras:
+        raise HTTPException(status_code=400, detail=f"Camera already registered: {camera_id}")
+
+    cameras[camera_id] = TrackerState(camera_id, parse_source(source))
+    return {"camera_id": camera_id, "source": cameras[camera_id].source}
+
+
+@app.delete("/api/cameras/{camera_id}")
+async def remove_camera(camera_id: str):
+    """Stop a camera and unregister it"""
+    if camera_id == DEFAULT_CAMERA:
+        raise HTTPException(status_code=400, detail="The default camera cannot be removed")
+
+    get_camera(camera_id)
+    await stop_tracking(camera_id)
+    del cameras[camera_id]
+    stage_metrics.remove(camera_id)
+    return {"message": f"Camera {camera_id} removed"}
+
+
+@app.get("/api/models")
+async def get_models():
+    """Load state and load/warm-up timings of the detection models"""
     return {
-        "is_running": tracker_state.is_running,
-        "detection_mode": tracker_state.detection_mode,
-        "enabled_colors": list(tracker_state.enabled_colors),
-        "camera_index": tracker_state.camera_index,
-        "min_area": tracker_state.min_area
+        "startup": startup_stats,
+        "models": {mode: detector.model_info() for mode, detector in DETECTORS.items()}
     }
 
+
+async def warmup_model(mode: str) -> Dict:
+    """Load a mode's model and run one inference, off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, DETECTORS[mode].warmup)
+
+
+def schedule_warmup(mode: str):
+    """Warm up a mode's model in the background unless it is already loaded"""
+    if DETECTORS[mode].is_loaded():
+        return
+
+    async def run():
+        try:
+            result = await warmup_model(mode)
+            print(f"Warmed up {mode} model: {result}")
+        except Exception as e:
+            print(f"Error warming up {mode} model: {e}")
+
+    task = asyncio.create_task(run())
+    _warmup_tasks.add(task)
+    task.add_done_callback(_warmup_tasks.discard)
+
+
+@app.post("/api/models/{mode}/warmup")
+async def warmup(mode: str):
+    """Load a detection mode's model now instead of on its first frame"""
+    if mode not in DETECTORS:
+        raise HTTPException(status_code=400, detail=f"Invalid mode. Must be one of: {', '.join(DETECTORS)}")
+
+    try:
+        result = await warmup_model(mode)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not load {mode} model: {e}")
+    return {"mode": mode, **result}
+
+
 @app.post("/api/start")
-async def start_tracking():
+@app.post("/api/cameras/{camera_id}/start")
+async def start_tracking(camera_id: str = DEFAULT_CAMERA):
     """Start color tracking"""
-    if tracker_state.is_running:
+    camera = get_camera(camera_id)
+    if camera.is_running:
         return {"message": "Tracker already running"}
     
-    tracker_state.cap = cv.VideoCapture(tracker_state.camera_index)
-    if not tracker_state.cap.isOpened():
+    camera.cap = open_capture(camera.source)
+    if not camera.cap.isOpened():
+        camera.cap = None
         raise HTTPException(status_code=500, detail="Could not open camera")
     
-    tracker_state.is_running = True
-    return {"message": "Tracker started", "camera_index": tracker_state.camera_index}
+    # Tracks from a previous session do not apply to the new video
+    reset_detection_state(camera)
+
+    # One pipeline reads and processes each frame once for every connected viewer.
+    # Its detection runs on the workers shared by all cameras
+    camera.pipeline = FramePipeline(camera.cap, lambda frame: process_frame(camera, frame), camera.hub,
+                                    FramePacer(lambda: get_max_fps(camera)), pool=detection_pool,
+                                    observe=lambda stage, seconds: stage_metrics.observe(camera.camera_id, stage,
+                                                                                         seconds),
+                                    on_frame=lambda sequence, stats, objects: camera.events.update(objects, sequence),
+                                    jpeg_quality=JPEG_QUALITY, encoder=jpeg_encoder,
+                                    preview_width=camera.preview_width,
+                                    ordered=lambda: detection_is_stateful(camera))
+    camera.pipeline.start()
+
+    camera.is_running = True
+    return {"message": "Tracker started", "camera_id": camera.camera_id, "camera_index": camera.camera_index}
+
 
 @app.post("/api/stop")
-async def stop_tracking():
+@app.post("/api/cameras/{camera_id}/stop")
+async def stop_tracking(camera_id: str = DEFAULT_CAMERA):
     """Stop color tracking"""
-    if not tracker_state.is_running:
+    camera = get_camera(camera_id)
+    if not camera.is_running:
         return {"message": "Tracker not running"}
     
-    tracker_state.is_running = False
-    if tracker_state.cap:
-        tracker_state.cap.release()
-        tracker_state.cap = None
+    camera.is_running = False
+    if camera.pipeline:
+        # Joining the pipeline threads may wait for an in-flight inference
+        await asyncio.get_running_loop().run_in_executor(None, camera.pipeline.stop)
+        camera.pipeline = None
+    if camera.cap:
+        camera.cap.release()
+        camera.cap = None
+    # Event consumers see everything leave the scene
+    camera.events.clear()
     
     return {"message": "Tracker stopped"}
 
+
 @app.post("/api/colors/toggle/{color}")
-async def toggle_color(color: str):
+@app.post("/api/cameras/{camera_id}/colors/toggle/{color}")
+async def toggle_color(color: str, camera_id: str = DEFAULT_CAMERA):
     """Toggle a specific color on/off"""
+    camera = get_camera(camera_id)
     color = color.capitalize()
     if color not in COLOR_RANGES:
         raise HTTPException(status_code=400, detail=f"Invalid color: {color}")
     
-    if color in tracker_state.enabled_colors:
-        tracker_state.enabled_colors.remove(color)
+    if color in camera.enabled_colors:
+        camera.enabled_colors.remove(color)
         action = "disabled"
     else:
-        tracker_state.enabled_colors.add(color)
+        camera.enabled_colors.add(color)
         action = "enabled"
-    
-    return {"color": color, "action": action, "enabled_colors": list(tracker_state.enabled_colors)}
+    reset_detection_state(camera)
+
+    return {"color": color, "action": action, "enabled_colors": list(camera.enabled_colors)}
+
 
 @app.get("/api/stats")
-async def get_stats():
+@app.get("/api/cameras/{camera_id}/stats")
+async def get_stats(camera_id: str = DEFAULT_CAMERA):
     """Get detection statistics"""
+    camera = get_camera(camera_id)
     stats = DetectionStats(
-        red=tracker_state.detection_stats.get("Red", 0),
-        blue=tracker_state.detection_stats.get("Blue", 0),
-        yellow=tracker_state.detection_stats.get("Yellow", 0),
-        green=tracker_state.detection_stats.get("Green", 0),
-        fps=tracker_state.fps,
-        is_running=tracker_state.is_running
+        red=camera.detection_stats.get("Red", 0),
+        blue=camera.detection_stats.get("Blue", 0),
+        yellow=camera.detection_stats.get("Yellow", 0),
+        green=camera.detection_stats.get("Green", 0),
+        fps=camera.fps,
+        is_running=camera.is_running,
+        stages=stage_metrics.summary(camera.camera_id)
     )
     return asdict(stats)
 
-@app.post("/api/settings")
-async def update_settings(min_area: int = 500, camera_index: int = 0):
-    """Update tracker settings"""
-    tracker_state.min_area = min_area
 
-    # If camera index changed and tracker is running, restart with new camera
-    if camera_index != tracker_state.camera_index:
-        was_running = tracker_state.is_running
+@app.get("/api/events/history")
+@app.get("/api/cameras/{camera_id}/events/history")
+async def get_event_history(since: int = 0, camera_id: str = DEFAULT_CAMERA):
+    """Buffered scene events after a sequence number, for clients that poll"""
+    camera = get_camera(camera_id)
+    events, missed = camera.events.since(since)
+    return {"camera_id": camera.camera_id, "sequence": camera.events.sequence, "missed": missed, "events": events}
+
+
+@app.get("/api/events")
+@app.get("/api/cameras/{camera_id}/events")
+async def stream_events(since: Optional[int] = None, camera_id: str = DEFAULT_CAMERA,
+                        last_event_id: Optional[int] = Header(None)):
+    """
+    Server-Sent Events stream of a camera's scene changes (appeared, disappeared,
+    moved, count_changed). Pass ``since`` (or reconnect with Last-Event-ID, as
+    EventSource does) to replay the buffered events after that sequence number.
+    """
+    camera = get_camera(camera_id)
+    after = since if since is not None else last_event_id
+
+    async def event_source():
+        # Keeps the pipeline running without encoding frames for this client
+        camera.hub.add_listener()
+        try:
+            async with aclosing(camera.events.follow(after, EVENT_KEEPALIVE_SECONDS)) as events:
+                async for event in events:
+                    if event is None:
+                        yield ": keep-alive\n\n"
+                    elif event["type"] == "gap":
+                        yield f"event: gap\ndata: {json.dumps(event)}\n\n"
+                    else:
+                        yield f"id: {event['sequence']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            camera.hub.remove_listener()
+
+    return StreamingResponse(event_source(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Stage latency histograms and pipeline counters in the Prometheus text format"""
+    running = [camera for camera in cameras.values() if camera.pipeline]
+    families = [
+        stage_metrics.render(),
+        render_metric("cv_camera_running", "gauge", "Whether the camera's tracker is running.",
+                      [({"camera": camera.camera_id}, int(camera.is_running)) for camera in cameras.values()]),
+        render_metric("cv_pipeline_fps", "gauge", "Frames published per second.",
+                      [({"camera": camera.camera_id}, camera.fps) for camera in running]),
+        render_metric("cv_frames_processed_total", "counter", "Frames processed and published.",
+                      [({"camera": camera.camera_id}, camera.pipeline.frames_processed) for camera in running]),
+        render_metric("cv_frames_dropped_total", "counter", "Frames dropped by the pipeline, by reason.",
+                      [({"camera": camera.camera_id, "reason": reason}, count)
+                       for camera in running for reason, count in camera.pipeline.dropped_frames.items()]),
+        render_metric("cv_stream_clients", "gauge", "Connected video stream clients.",
+                      [({"camera": camera.camera_id}, camera.hub.subscriber_count) for camera in cameras.values()]),
+        render_metric("cv_scene_events_total", "counter", "Scene change events emitted.",
+                      [({"camera": camera.camera_id}, camera.events.sequence) for camera in cameras.values()]),
+        render_metric("cv_event_clients", "gauge", "Connected scene event stream clients.",
+                      [({"camera": camera.camera_id}, camera.events.subscriber_count) for camera in cameras.values()]),
+    ]
+    narration = llm_service.stats()
+    families += [
+        render_metric("cv_narration_llm_calls_total", "counter", "Narrations requested from the LLM provider.",
+                      [({}, narration["llm_calls"])]),
+        render_metric("cv_narration_cache_hits_total", "counter", "Narrations served from the scene cache.",
+                      [({}, narration["cache"]["hits"])]),
+        render_metric("cv_narration_cache_misses_total", "counter", "Narration cache lookups without a fresh entry.",
+                      [({}, narration["cache"]["misses"])]),
+    ]
+    if inference_pool is not None:
+        pool_stats = inference_pool.stats()
+        families += [
+            render_metric("cv_inference_calls_total", "counter", "Calls to the inference worker processes.",
+                          [({}, pool_stats["calls"])]),
+            render_metric("cv_inference_errors_total", "counter", "Failed inference worker calls.",
+                          [({}, pool_stats["errors"])]),
+        ]
+    return "".join(families)
+
+
+@app.post("/api/settings")
+@app.post("/api/cameras/{camera_id}/settings")
+async def update_settings(min_area: int = 500, camera_index: Optional[int] = None, source: Optional[str] = None,
+                          color_scale: Optional[float] = None, preview_width: Optional[int] = None,
+                          camera_id: str = DEFAULT_CAMERA):
+    """Update tracker settings. camera_index or source switch the camera's video source"""
+    camera = get_camera(camera_id)
+    if color_scale is not None and not 0 < color_scale <= 1:
+        raise HTTPException(status_code=400, detail="color_scale must be in (0, 1]")
+    if preview_width is not None and preview_width < 0:
+        raise HTTPException(status_code=400, detail="preview_width must be 0 or positive")
+
+    if preview_width is not None:
+        # Only affects encoding, so a running pipeline picks it up with its next frame
+        camera.preview_width = preview_width
+        if camera.pipeline:
+            camera.pipeline.preview_width = preview_width
+
+    camera.min_area = min_area
+    if color_scale is not None:
+        camera.color_scale = color_scale
+    reset_detection_state(camera)
+
+    # If the source changed and tracker is running, restart with the new source
+    new_source = parse_source(source) if source is not None else camera_index
+    if new_source is not None and new_source != camera.source:
+        was_running = camera.is_running
         if was_running:
-            await stop_tracking()
+            await stop_tracking(camera_id)
 
-        tracker_state.camera_index = camera_index
+        camera.source = new_source
 
         if was_running:
-            await start_tracking()
+            await start_tracking(camera_id)
 
     return {
-        "min_area": tracker_state.min_area,
-        "camera_index": tracker_state.camera_index
+        "min_area": camera.min_area,
+        "camera_index": camera.camera_index,
+        "source": camera.source,
+        "color_scale": camera.color_scale,
+        "preview_width": camera.preview_width
     }
 
+
 @app.post("/api/mode/{mode}")
-async def set_detection_mode(mode: str):
+@app.post("/api/cameras/{camera_id}/mode/{mode}")
+async def set_detection_mode(mode: str, camera_id: str = DEFAULT_CAMERA):
     """Set detection mode: 'color', 'object', or 'object_yolo'"""
     global current_global_narration
 
+    camera = get_camera(camera_id)
     if mode not in ["color", "object", "object_yolo"]:
         raise HTTPException(status_code=400, detail="Invalid mode. Must be 'color', 'object', or 'object_yolo'")
 
-    tracker_state.detection_mode = mode
+    camera.detection_mode = mode
+    reset_detection_state(camera)
+
+    # Start loading the mode's model now rather than stalling its first frame
+    if mode in DETECTORS:
+        schedule_warmup(mode)
 
     # Reset narration when switching modes
     current_global_narration = ""
 
     return {"mode": mode, "message": f"Detection mode set to {mode}"}
 
+
+@app.post("/api/tracking")
+@app.post("/api/cameras/{camera_id}/tracking")
+async def update_tracking(detect_interval: int = 1, camera_id: str = DEFAULT_CAMERA):
+    """
+    Set how often the object detector runs in object modes. In between, objects
+    are followed with optical flow, which is much cheaper than a forward pass.
+    """
+    camera = get_camera(camera_id)
+    if detect_interval < 1:
+        raise HTTPException(status_code=400, detail="detect_interval must be at least 1")
+
+    camera.detect_interval = detect_interval
+    for tracker in camera.object_trackers.values():
+        tracker.detect_interval = detect_interval
+    return {"detect_interval": detect_interval}
+
+
 @app.get("/api/modes")
-async def get_available_modes():
+@app.get("/api/cameras/{camera_id}/modes")
+async def get_available_modes(camera_id: str = DEFAULT_CAMERA):
     """Get available detection modes"""
     return {
         "modes": ["color", "object", "object_yolo"],
-        "current_mode": tracker_state.detection_mode
+        "current_mode": get_camera(camera_id).detection_mode
     }
 
+
+def process_frame(camera: TrackerState, frame):
+    """
+    Run a camera's active detection pipeline on a frame.
+
+    Called from the shared detection workers, once per captured frame
+    regardless of how many clients are watching: concurrently, unless
+    detection_is_stateful(camera), in which case frames come in capture order. Only
+    detection runs here; drawing is returned as a separate step that the
+    pipeline's encode stage applies right before encoding.
+
+    Returns:
+        tuple: (frame_stats, detected_objects, render) where render draws the
+            detections onto a frame in place
+    """
+    detected_objects = []
+    frame_stats = {}
+    render = None
+
+    # Full frames are processed when gating is off
+    motion = camera.motion_gate.update(frame) if camera.motion_gating else None
+
+    if camera.detection_mode == "color":
+        # Process frame with color detection: all enabled colors in one pass,
+        # only inside the regions that changed since the previous frame
+        if motion is None:
+            blobs = segment_colors(camera, frame)
+        else:
+            blobs = update_regional(motion, camera.last_blobs,
+                                    lambda regions: segment_colors(camera, frame, regions), lambda blob: blob.bbox)
+        camera.last_blobs = blobs
+
+        # Reset detection stats for this frame
+        frame_stats = {color: 0 for color in COLOR_RANGES.keys()}
+
+        for blob in blobs:
+            # Store object info for narration
+            detected_objects.append({
+                "color": blob.color,
+                "position": get_position_label(blob.x, blob.y, blob.w, blob.h, frame.shape[1], frame.shape[0])
+            })
+            frame_stats[blob.color] += 1
+
+        # Draw rectangle and label at encode time
+        render = functools.partial(draw_color_blobs, blobs=blobs, box_colors=BOX_COLORS)
+
+    elif camera.detection_mode in ["object", "object_yolo"]:
+        # Choose detector based on mode
+        detector = DETECTORS[camera.detection_mode]
+
+        # Already running off the event loop, so the detector is called directly.
+        # The tracker runs it every detect_interval frames and follows objects in between.
+        # Nothing to do when the scene is static
+        if motion is not None and not motion.moved:
+            detections = camera.last_detections
+        else:
+            detections = get_object_tracker(camera, camera.detection_mode).process(frame)
+        camera.last_detections = detections
+        render = functools.partial(detector.draw_detections, detections=detections)
+
+        # Count detections by class
+        class_counts = {}
+
+        for detection in detections:
+            class_name = detection['class_name']
+            class_counts[class_name] = class_counts.get(class_name, 0) + 1
+
+            # Format for narration
+            detected_objects.append({
+                "object": class_name,
+                "position": detection['position'],
+                "track_id": detection['track_id']
+            })
+
+        # Set frame stats with actual detection counts
+        frame_stats = class_counts if class_counts else {"objects_detected": 0}
+
+    # Update the camera's stats
+    camera.detection_stats = frame_stats
+    camera.detected_objects = detected_objects
+
+    return frame_stats, detected_objects, render
+
+
+def get_max_fps(camera: TrackerState):
+    """Target frame rate based on detection mode; the pacer lowers it under load"""
+    if camera.detection_mode == "object_yolo":
+        return 15  # 15 FPS for YOLOv8 (slower but more accurate)
+    elif camera.detection_mode == "object":
+        return 20  # 20 FPS for MobileNet SSD (fast)
+    else:
+        return 30  # 30 FPS for color detection
+
+
 @app.websocket("/ws/video")
-async def video_stream(websocket: WebSocket):
-    """WebSocket endpoint for streaming processed video frames"""
+@app.websocket("/ws/video/{camera_id}")
+async def video_stream(websocket: WebSocket, camera_id: str = DEFAULT_CAMERA):
+    """
+    WebSocket endpoint for streaming a camera's processed video frames
+    (/ws/video streams the default camera).
+
+    Frames are sent as base64-in-JSON by default; connect with
+    ``?protocol=binary`` to receive raw JPEG binary messages instead
+    (see frame_protocol.py). ``?bitrate=<kbps>`` adapts the client's JPEG
+    quality to stay under that bitrate (default: CV_API_TARGET_BITRATE_KBPS).
+    """
     await websocket.accept()
 
-    kernel = np.ones((5, 5), np.uint8)
+    camera = cameras.get(camera_id)
+    if camera is None:
+        await websocket.send_json({"type": "error", "message": f"Unknown camera: {camera_id}"})
+        await websocket.close()
+        return
+
+    protocol = websocket.query_params.get("protocol", "json")
+    if protocol not in PROTOCOLS:
+        await websocket.send_json({
+            "type": "error",
+            "message": f"Invalid protocol: {protocol}. Must be one of {', '.join(PROTOCOLS)}"
+        })
+        await websocket.close()
+        return
 
     try:
-        frame_count = 0
-        current_narration = ""
-        
-        # FPS calculation variables
-        fps_counter = 0
-        fps_start_time = asyncio.get_event_loop().time()
+        target_kbps = float(websocket.query_params.get("bitrate", TARGET_BITRATE_KBPS))
+    except ValueError:
+        await websocket.send_json({"type": "error", "message": "Invalid bitrate: must be a number of kbps"})
+        await websocket.close()
+        return
+
+    # Frames are produced once by the camera's pipeline and fanned out to every client
+    frame_queue = camera.hub.subscribe()
+    # The client's JPEG quality follows its bitrate; the pipeline encodes each
+    # quality its clients ask for once per frame
+    bitrate = BitrateController(target_kbps, JPEG_QUALITY) if target_kbps > 0 else None
+    quality = bitrate.quality if bitrate else None
+    camera.hub.set_quality(frame_queue, quality)
+    # The camera's narration is generated in the background, once for all its viewers;
+    # frames go out with the latest one
+    narration_scheduler.subscribe(camera.camera_id,
+                                  lambda: camera.detected_objects if camera.is_running else None)
 
+    try:
         while True:
-            if not tracker_state.is_running or tracker_state.cap is None:
+            if not camera.is_running or camera.cap is None:
                 # Send empty frame or status message
                 await websocket.send_json({
                     "type": "status",
@@ -224,155 +856,86 @@ async def video_stream(websocket: WebSocket):
                 await asyncio.sleep(0.1)
                 continue
 
-            ret, frame = tracker_state.cap.read()
-            if not ret:
+            try:
+                packet = await asyncio.wait_for(frame_queue.get(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+
+            if packet.type == "error":
                 await websocket.send_json({
                     "type": "error",
-                    "message": "Could not read frame"
+                    "message": packet.message
                 })
-                await asyncio.sleep(0.1)
                 continue
 
-            detected_objects = []
-            frame_stats = {}
-
-            if tracker_state.detection_mode == "color":
-                # Process frame with color detection
-                blurred_frame = cv.GaussianBlur(frame, (11, 11), 0)
-                hsv_frame = cv.cvtColor(blurred_frame, cv.COLOR_BGR2HSV)
-
-                # Reset detection stats for this frame
-                frame_stats = {color: 0 for color in COLOR_RANGES.keys()}
-
-                # Detect each enabled color
-                for color_name, ranges in COLOR_RANGES.items():
-                    if color_name not in tracker_state.enabled_colors:
-                        continue
-
-                    # Create mask for this color
-                    color_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
-
-                    for lower_bound, upper_bound in ranges:
-                        mask = cv.inRange(hsv_frame, lower_bound, upper_bound)
-                        color_mask = cv.bitwise_or(color_mask, mask)
-
-                    # Clean up the mask
-                    color_mask = cv.erode(color_mask, kernel, iterations=2)
-                    color_mask = cv.dilate(color_mask, kernel, iterations=2)
-
-                    # Contour Detection
-                    contours, _ = cv.findContours(color_mask.copy(), cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
-
-                    if len(contours) > 0:
-                        for contour in contours:
-                            if cv.contourArea(contour) > tracker_state.min_area:
-                                x, y, w, h = cv.boundingRect(contour)
-
-                                # Store object info for narration
-                                detected_objects.append({
-                                    "color": color_name,
-                                    "position": get_position_label(x, y, w, h, frame.shape[1], frame.shape[0])
-                                })
-
-                                box_color = BOX_COLORS[color_name]
-
-                                # Draw rectangle and label
-                                cv.rectangle(frame, (x, y), (x + w, y + h), box_color, 2)
-                                cv.putText(frame, f"{color_name}", (x, y - 10),
-                                         cv.FONT_HERSHEY_SIMPLEX, 0.6, box_color, 2)
-
-                                frame_stats[color_name] += 1
-
-            elif tracker_state.detection_mode in ["object", "object_yolo"]:
-                # Choose detector based on mode
-                detector_func = mobilenet_detect_and_draw if tracker_state.detection_mode == "object" else yolo_detect_and_draw
-                timeout_seconds = 1.0 if tracker_state.detection_mode == "object" else 2.0  # YOLO needs more time
-
-                # Process frame with selected object detection with timeout protection
-                try:
-                    # Run detector in executor to prevent blocking async loop
-                    loop = asyncio.get_event_loop()
-                    frame, detections = await asyncio.wait_for(
-                        loop.run_in_executor(None, detector_func, frame),
-                        timeout=timeout_seconds
-                    )
-
-                    # Count detections by class
-                    class_counts = {}
-                    detected_objects = []
-
-                    for detection in detections:
-                        class_name = detection['class_name']
-                        class_counts[class_name] = class_counts.get(class_name, 0) + 1
-
-                        # Format for narration
-                        detected_objects.append({
-                            "object": class_name,
-                            "position": detection['position']
-                        })
-
-                    # Set frame stats with actual detection counts
-                    frame_stats = class_counts if class_counts else {"objects_detected": 0}
-
-                except asyncio.TimeoutError:
-                    # Fallback on timeout: skip detection for this frame
-                    detector_name = "MobileNet SSD" if tracker_state.detection_mode == "object" else "YOLOv8"
-                    frame_stats = {"objects_detected": 0}
-                    print(f"{detector_name} inference timed out, skipping frame")
-
-            # Update global stats
-            tracker_state.detection_stats = frame_stats
-
-            # Calculate FPS
-            fps_counter += 1
-            current_time = asyncio.get_event_loop().time()
-            if current_time - fps_start_time >= 1.0:  # Update every second
-                tracker_state.fps = fps_counter
-                fps_counter = 0
-                fps_start_time = current_time
-
-            # Add FPS to frame stats
-            frame_stats['fps'] = tracker_state.fps
-
-            # Encode frame to base64
-            _, buffer = cv.imencode('.jpg', frame, [cv.IMWRITE_JPEG_QUALITY, 80])
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
-
-            frame_count += 1
-
-            # Adjust narration frequency based on detection mode and frame rate
-            if tracker_state.detection_mode == "object_yolo":
-                narration_interval = 45  # ~3s for YOLO (at 15 FPS)
-            elif tracker_state.detection_mode == "object":
-                narration_interval = 60  # ~3s for MobileNet SSD (at 20 FPS)
-            else:
-                narration_interval = 90  # ~3s for color detection (at 30 FPS)
-
-            if frame_count % narration_interval == 0:
-                current_narration = await llm_service.generate_narration(detected_objects)
-
-            # Send frame and stats
-            await websocket.send_json({
-                "type": "frame",
-                "data": frame_base64,
-                "stats": frame_stats,
-                "narration": current_narration,
-                "timestamp": asyncio.get_event_loop().time()
-            })
+            current_narration = narration_scheduler.latest(camera.camera_id)
 
-            # Control frame rate based on detection mode
-            if tracker_state.detection_mode == "object_yolo":
-                await asyncio.sleep(1/15)  # 15 FPS for YOLOv8 (slower but more accurate)
-            elif tracker_state.detection_mode == "object":
-                await asyncio.sleep(1/20)  # 20 FPS for MobileNet SSD (fast)
+            # Send frame and stats (framing, base64 for JSON clients, and the socket write)
+            send_start = time.monotonic()
+            if protocol == PROTOCOL_BINARY:
+                payload = packet.jpeg_for(quality)
+                await websocket.send_bytes(encode_binary_frame(
+                    payload, packet.stats, current_narration, packet.timestamp, packet.sequence))
             else:
-                await asyncio.sleep(1/30)  # 30 FPS for color detection
+                payload = packet.base64_for(quality)
+                await websocket.send_json(encode_json_frame(
+                    payload, packet.stats, current_narration, packet.timestamp))
+            stage_metrics.observe(camera.camera_id, "send", time.monotonic() - send_start)
+
+            if bitrate is not None and bitrate.record(len(payload)):
+                quality = bitrate.quality
+                camera.hub.set_quality(frame_queue, quality)
 
     except WebSocketDisconnect:
         print("WebSocket disconnected")
     except Exception as e:
         print(f"Error in video stream: {e}")
         await websocket.close()
+    finally:
+        camera.hub.unsubscribe(frame_queue)
+        await narration_scheduler.unsubscribe(camera.camera_id)
+
+
+@app.websocket("/ws/events")
+@app.websocket("/ws/events/{camera_id}")
+async def event_stream(websocket: WebSocket, camera_id: str = DEFAULT_CAMERA):
+    """
+    WebSocket endpoint streaming a camera's scene changes as JSON events, without
+    any video (/ws/events streams the default camera).
+
+    Connect with ``?since=<sequence>`` to first replay the buffered events after
+    that sequence number. A {"type": "gap"} message reports events that could
+    not be replayed, {"type": "heartbeat"} is sent while nothing changes.
+    """
+    await websocket.accept()
+
+    camera = cameras.get(camera_id)
+    if camera is None:
+        await websocket.send_json({"type": "error", "message": f"Unknown camera: {camera_id}"})
+        await websocket.close()
+        return
+
+    since = websocket.query_params.get("since")
+    if since is not None and not since.lstrip("-").isdigit():
+        await websocket.send_json({"type": "error", "message": f"Invalid sequence number: {since}"})
+        await websocket.close()
+        return
+
+    # Keeps the pipeline running without encoding frames for this client
+    camera.hub.add_listener()
+    try:
+        async with aclosing(camera.events.follow(int(since) if since is not None else None,
+                                                 EVENT_KEEPALIVE_SECONDS)) as events:
+            async for event in events:
+                await websocket.send_json(event if event is not None else {
+                    "type": "heartbeat", "sequence": camera.events.sequence})
+    except WebSocketDisconnect:
+        print("Event stream disconnected")
+    except Exception as e:
+        print(f"Error in event stream: {e}")
+        await websocket.close()
+    finally:
+        camera.hub.remove_listener()
 
 if __name__ == "__main__":
     import uvicorn
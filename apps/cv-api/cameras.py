@@ -0,0 +1,51 @@
+import os
+from typing import Union
+
+import cv2 as cv
+
+# A device index (0, 1, ...), a video file path or a stream URL (rtsp://, http://, ...)
+CameraSource = Union[int, str]
+
+
+def parse_source(source) -> CameraSource:
+    """Device index for digit-only sources, otherwise the path or URL as given."""
+    if isinstance(source, int):
+        return source
+    source = str(source).strip()
+    return int(source) if source.isdigit() else source
+
+
+def is_file_source(source: CameraSource) -> bool:
+    return isinstance(source, str) and os.path.isfile(source)
+
+
+class LoopingCapture:
+    """
+    Video file capture that starts over when the file ends, so a recorded clip
+    can stand in for a live camera (e.g. in tests or demos).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.capture = cv.VideoCapture(path)
+
+    def isOpened(self) -> bool:
+        return self.capture.isOpened()
+
+    def read(self, image=None):
+        ret, frame = self.capture.read(image)
+        if not ret:
+            self.capture.set(cv.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read(image)
+        return ret, frame
+
+    def release(self):
+        self.capture.release()
+
+
+def open_capture(source: CameraSource):
+    """Open a camera source; check isOpened() on the result."""
+    source = parse_source(source)
+    if is_file_source(source):
+        return LoopingCapture(source)
+    return cv.VideoCapture(source)
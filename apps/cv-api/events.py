@@ -0,0 +1,235 @@
+import asyncio
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+# Event types, in the order they are emitted for a frame
+APPEARED = "appeared"
+DISAPPEARED = "disappeared"
+MOVED = "moved"
+COUNT_CHANGED = "count_changed"
+EVENT_TYPES = (DISAPPEARED, APPEARED, MOVED, COUNT_CHANGED)
+
+
+def _label(obj: Dict) -> str:
+    return obj.get('color') or obj.get('object', 'unknown')
+
+
+def diff_scenes(previous: List[Dict], current: List[Dict]) -> List[Dict]:
+    """
+    Changes between two scenes, as events without sequence numbers.
+
+    Objects carrying a track_id (object modes) are followed by (type, track id):
+    a new track appears, a lost track disappears and a track whose zone (the 3x3
+    grid position label) changed moved. Color blobs have no identity, so per
+    type the zones that emptied are paired with the zones that filled as moves
+    and the rest appear or disappear. A count_changed event follows for every
+    type whose number of objects changed.
+
+    Args:
+        previous: Narration objects of the previous scene, e.g.
+            [{"object": "person", "position": "left", "track_id": 3}]
+        current: Narration objects of the current scene
+    """
+    events = []
+    tracked_before = {(_label(obj), obj['track_id']): obj for obj in previous if obj.get('track_id') is not None}
+    tracked_now = {(_label(obj), obj['track_id']): obj for obj in current if obj.get('track_id') is not None}
+    for key, obj in tracked_before.items():
+        if key not in tracked_now:
+            events.append({"type": DISAPPEARED, "object": key[0], "track_id": key[1], "zone": obj.get('position', '')})
+    for key, obj in tracked_now.items():
+        before = tracked_before.get(key)
+        zone = obj.get('position', '')
+        if before is None:
+            events.append({"type": APPEARED, "object": key[0], "track_id": key[1], "zone": zone})
+        elif before.get('position', '') != zone:
+            events.append({"type": MOVED, "object": key[0], "track_id": key[1],
+                           "from_zone": before.get('position', ''), "zone": zone})
+
+    zones_before = Counter((_label(obj), obj.get('position', '')) for obj in previous if obj.get('track_id') is None)
+    zones_now = Counter((_label(obj), obj.get('position', '')) for obj in current if obj.get('track_id') is None)
+    emptied, filled = defaultdict(list), defaultdict(list)
+    for (label, zone), count in sorted((zones_before - zones_now).items()):
+        emptied[label] += [zone] * count
+    for (label, zone), count in sorted((zones_now - zones_before).items()):
+        filled[label] += [zone] * count
+    for label in sorted(set(emptied) | set(filled)):
+        moves = list(zip(emptied[label], filled[label]))
+        for zone in emptied[label][len(moves):]:
+            events.append({"type": DISAPPEARED, "object": label, "zone": zone})
+        for zone in filled[label][len(moves):]:
+            events.append({"type": APPEARED, "object": label, "zone": zone})
+        for from_zone, zone in moves:
+            events.append({"type": MOVED, "object": label, "from_zone": from_zone, "zone": zone})
+
+    counts_before = Counter(_label(obj) for obj in previous)
+    counts_now = Counter(_label(obj) for obj in current)
+    for label in sorted(set(counts_before) | set(counts_now)):
+        if counts_before[label] != counts_now[label]:
+            events.append({"type": COUNT_CHANGED, "object": label,
+                           "count": counts_now[label], "previous_count": counts_before[label]})
+
+    events.sort(key=lambda event: EVENT_TYPES.index(event["type"]))
+    return events
+
+
+class SceneEventStream:
+    """
+    Scene changes of one camera as a stream of numbered events.
+
+    Each processed frame's narration objects are diffed against the previous
+    frame's (see diff_scenes) and only the changes are recorded, so consumers
+    that follow a camera's scene get a few events when something happens
+    instead of the full stats of every frame. Events are numbered with a
+    sequence that increases by one per event and kept in a ring buffer of the
+    newest ``capacity`` events, from which a reconnecting client replays what
+    it missed after the last sequence it saw.
+
+    update() may be called from any thread; subscribers are asyncio queues
+    served on the event loop, like FrameHub's. A subscriber that falls more
+    than ``queue_size`` events behind loses its oldest events, and notices the
+    gap in the sequence numbers.
+    """
+
+    def __init__(self, camera_id: str, capacity: int = 1024, queue_size: int = 256):
+        """
+        Args:
+            camera_id: The camera the events are about
+            capacity: Events kept for replay
+            queue_size: Events queued at most per subscriber
+        """
+        self.camera_id = camera_id
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self.sequence = 0
+        self.dropped_events = 0
+        self._buffer: Deque[Dict] = deque(maxlen=capacity)
+        self._scene: List[Dict] = []
+        self._lock = threading.Lock()
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def update(self, detected_objects: List[Dict], frame: Optional[int] = None) -> List[Dict]:
+        """
+        Record the changes from the previous scene to this one and publish them.
+
+        Args:
+            detected_objects: Narration objects of the frame
+            frame: Sequence number of the frame, to relate events to video frames
+
+        Returns:
+            list: The new events
+        """
+        with self._lock:
+            changes = diff_scenes(self._scene, detected_objects)
+            self._scene = list(detected_objects)
+            if not changes:
+                return []
+            timestamp = time.time()
+            events = []
+            for change in changes:
+                self.sequence += 1
+                events.append({"sequence": self.sequence, "camera_id": self.camera_id, "timestamp": timestamp,
+                               "frame": frame, **change})
+            self._buffer.extend(events)
+
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._deliver, events)
+            except RuntimeError:
+                # Event loop shut down between the check and the call
+                pass
+        return events
+
+    def clear(self) -> List[Dict]:
+        """End the current scene, e.g. when the camera stops: everything in it disappears."""
+        return self.update([])
+
+    def since(self, sequence: int) -> Tuple[List[Dict], int]:
+        """
+        Buffered events after a sequence number.
+
+        Returns:
+            tuple: (events, missed) where missed counts the events after the
+                sequence that were already evicted from the ring buffer
+        """
+        with self._lock:
+            events = [event for event in self._buffer if event["sequence"] > sequence]
+            oldest = events[0]["sequence"] if events else self.sequence + 1
+        return events, max(0, oldest - sequence - 1)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a queue receiving every new event (must be called from the event loop)."""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber queue (must be called from the event loop)."""
+        self._subscribers.discard(queue)
+
+    async def follow(self, after: Optional[int] = None, idle: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """
+        Replay the buffered events after a sequence number, then follow new ones.
+
+        Where events are missing, because they were evicted from the ring buffer
+        or dropped for a slow consumer, a {"type": "gap", "missed": n} event
+        comes first. None is yielded whenever nothing happened for ``idle``
+        seconds, so callers can send keep-alives (and notice disconnects).
+
+        Args:
+            after: Last sequence number the client saw (default: only new events)
+            idle: Seconds without events before yielding None
+        """
+        queue = self.subscribe()
+        try:
+            # Subscribed before reading the buffer: events published in between
+            # arrive twice and are skipped, none is lost
+            last = self.sequence if after is None else min(after, self.sequence)
+            backlog, _ = self.since(last)
+            while True:
+                if backlog:
+                    event = backlog.pop(0)
+                else:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), timeout=idle)
+                    except asyncio.TimeoutError:
+                        yield None
+                        continue
+                if event["sequence"] <= last:
+                    continue
+                if event["sequence"] > last + 1:
+                    yield {"type": "gap", "camera_id": self.camera_id, "missed": event["sequence"] - last - 1,
+                           "sequence": event["sequence"] - 1}
+                last = event["sequence"]
+                yield event
+        finally:
+            self.unsubscribe(queue)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            buffered = len(self._buffer)
+            oldest = self._buffer[0]["sequence"] if self._buffer else None
+        return {
+            "sequence": self.sequence,
+            "buffered": buffered,
+            "oldest_sequence": oldest,
+            "capacity": self.capacity,
+            "subscribers": self.subscriber_count,
+            "dropped_events": self.dropped_events,
+        }
+
+    def _deliver(self, events: List[Dict]):
+        for queue in list(self._subscribers):
+            for event in events:
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped_events += 1
+                queue.put_nowait(event)
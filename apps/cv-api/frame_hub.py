@@ -0,0 +1,144 @@
+import asyncio
+import base64
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, FrozenSet, List, Optional, Set
+
+
+@dataclass
+class FramePacket:
+    """A processed frame (or capture error) published once to every subscriber."""
+    type: str  # "frame" or "error"
+    sequence: int
+    timestamp: float
+    jpeg: bytes = b""
+    stats: Dict = field(default_factory=dict)
+    detected_objects: List[Dict] = field(default_factory=list)
+    message: str = ""
+    # The frame encoded at every JPEG quality subscribers asked for; jpeg is one of them
+    jpegs: Dict[int, bytes] = field(default_factory=dict)
+
+    @cached_property
+    def base64_data(self) -> str:
+        """Base64 JPEG payload, encoded at most once no matter how many clients send it."""
+        return base64.b64encode(self.jpeg).decode('utf-8')
+
+    def jpeg_for(self, quality: Optional[int]) -> bytes:
+        """The frame at a JPEG quality, or at the closest one encoded (jpeg for None)."""
+        if quality is None or not self.jpegs:
+            return self.jpeg
+        return self.jpegs.get(quality) or self.jpegs[min(self.jpegs, key=lambda encoded: abs(encoded - quality))]
+
+    def base64_for(self, quality: Optional[int]) -> str:
+        """Base64 of jpeg_for(quality), encoded at most once per quality."""
+        jpeg = self.jpeg_for(quality)
+        if jpeg is self.jpeg:
+            return self.base64_data
+        cache = self.__dict__.setdefault('_base64', {})
+        if quality not in cache:
+            cache[quality] = base64.b64encode(jpeg).decode('utf-8')
+        return cache[quality]
+
+
+class FrameHub:
+    """
+    Fan-out point between the frame pipeline threads and WebSocket clients.
+
+    Each subscriber gets its own small bounded queue. When a client falls behind,
+    its oldest queued frame is dropped so it always receives the most recent one
+    instead of an ever-growing backlog.
+
+    Subscribers may ask for frames at their own JPEG quality (set_quality);
+    the pipeline encodes each requested quality once per frame.
+
+    Listeners are clients that keep the camera's pipeline running without
+    receiving frames (e.g. scene event streams); with listeners only, the
+    pipeline skips drawing and JPEG encoding.
+    """
+
+    def __init__(self, queue_size: int = 2):
+        self.queue_size = queue_size
+        self.dropped_frames = 0
+        self.latest: Optional[FramePacket] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        # JPEG quality per subscriber, None for the pipeline's default
+        self._qualities: Dict[asyncio.Queue, Optional[int]] = {}
+        self.qualities: FrozenSet[Optional[int]] = frozenset()
+        self._listeners = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._has_subscribers = threading.Event()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def listener_count(self) -> int:
+        return self._listeners
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new subscriber queue (must be called from the event loop)."""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        self._has_subscribers.set()
+        self._set_quality(queue, None)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber queue (must be called from the event loop)."""
+        self._subscribers.discard(queue)
+        self._qualities.pop(queue, None)
+        self.qualities = frozenset(self._qualities.values())
+        self._update_has_subscribers()
+
+    def set_quality(self, queue: asyncio.Queue, quality: Optional[int]):
+        """Ask for a subscriber's frames at a JPEG quality from now on (must be called from the event loop)."""
+        if queue in self._subscribers:
+            self._set_quality(queue, quality)
+
+    def _set_quality(self, queue: asyncio.Queue, quality: Optional[int]):
+        self._qualities[queue] = quality
+        # Replaced rather than updated, so the encode thread always reads a consistent set
+        self.qualities = frozenset(self._qualities.values())
+
+    def add_listener(self):
+        """Keep the pipeline running for a client that does not receive frames (event loop only)."""
+        self._listeners += 1
+        self._update_has_subscribers()
+
+    def remove_listener(self):
+        """Remove a listener added with add_listener (event loop only)."""
+        self._listeners = max(0, self._listeners - 1)
+        self._update_has_subscribers()
+
+    def _update_has_subscribers(self):
+        if self._subscribers or self._listeners:
+            self._has_subscribers.set()
+        else:
+            self._has_subscribers.clear()
+
+    def wait_for_subscribers(self, timeout: float) -> bool:
+        """Block the capture thread until at least one subscriber or listener is connected."""
+        return self._has_subscribers.wait(timeout)
+
+    def publish(self, packet: FramePacket):
+        """Publish a packet to all subscribers. Safe to call from any thread."""
+        self.latest = packet
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._deliver, packet)
+        except RuntimeError:
+            # Event loop shut down between the check and the call
+            pass
+
+    def _deliver(self, packet: FramePacket):
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow consumer: discard its stale frame to make room for the new one
+                queue.get_nowait()
+                self.dropped_frames += 1
+            queue.put_nowait(packet)
@@ -0,0 +1,84 @@
+"""
+Wire formats for frames sent over /ws/video.
+
+Two protocols are supported:
+
+- "json" (default): one text message per frame with the JPEG base64-encoded in
+  the "data" field. This is what the Flutter and Angular clients speak.
+- "binary" (opt-in with ``/ws/video?protocol=binary``): one binary message per
+  frame laid out as
+
+      magic    4 bytes   b"CVF1"
+      length   uint32    little-endian length of the header
+      header   JSON      {"type", "stats", "narration", "timestamp", "sequence"}
+      payload  bytes     the raw JPEG
+
+  which avoids the ~33% base64 inflation and the base64/JSON CPU cost on the
+  image bytes. Status and error messages stay JSON text messages in both modes.
+"""
+
+import json
+import struct
+from typing import Dict
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BINARY)
+
+BINARY_MAGIC = b"CVF1"
+_PREFIX = struct.Struct("<4sI")
+
+
+def encode_json_frame(base64_data: str, stats: Dict, narration: str, timestamp: float) -> Dict:
+    """Build the JSON frame message understood by the existing clients."""
+    return {
+        "type": "frame",
+        "data": base64_data,
+        "stats": stats,
+        "narration": narration,
+        "timestamp": timestamp
+    }
+
+
+def encode_binary_frame(jpeg: bytes, stats: Dict, narration: str, timestamp: float, sequence: int = 0) -> bytes:
+    """
+    Build a binary frame message.
+
+    Args:
+        jpeg: Encoded JPEG bytes, sent as-is
+        stats: Per-frame detection statistics
+        narration: Current narration text
+        timestamp: Frame timestamp (seconds since the epoch)
+        sequence: Producer sequence number of the frame
+
+    Returns:
+        bytes: The message to send with ``websocket.send_bytes``
+    """
+    header = json.dumps({
+        "type": "frame",
+        "stats": stats,
+        "narration": narration,
+        "timestamp": timestamp,
+        "sequence": sequence
+    }, separators=(",", ":")).encode("utf-8")
+    return b"".join((_PREFIX.pack(BINARY_MAGIC, len(header)), header, jpeg))
+
+
+def decode_binary_frame(message: bytes) -> tuple[Dict, bytes]:
+    """
+    Split a binary frame message into its header and JPEG payload.
+
+    Returns:
+        tuple: (header_dict, jpeg_bytes)
+
+    Raises:
+        ValueError: If the message is not a binary frame
+    """
+    if len(message) < _PREFIX.size:
+        raise ValueError("Binary frame too short")
+    magic, header_length = _PREFIX.unpack_from(message)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"Unknown binary frame magic: {magic!r}")
+    header_end = _PREFIX.size + header_length
+    header = json.loads(message[_PREFIX.size:header_end].decode("utf-8"))
+    return header, message[header_end:]
@@ -0,0 +1,260 @@
+import importlib
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from cv_utils.frame_ring import FrameRef, FrameRing, find_frame
+
+# Shared memory allocated per worker up front; grown when a larger frame arrives
+DEFAULT_FRAME_BYTES = 640 * 480 * 3
+
+# Frame rings a worker keeps mapped (one per camera resolution in use, typically)
+MAX_ATTACHED_RINGS = 8
+
+
+def _worker_main(conn):
+    """
+    Worker process loop: map the frame named in each request (a slot of a frame
+    ring, or the worker's own shared memory block), run the task on it and send
+    back the result.
+    """
+    # Shutdown is driven by the parent; Ctrl+C in a terminal reaches the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shm = None
+    rings: Dict[str, FrameRing] = {}
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+
+            location, task, args = message
+            try:
+                if isinstance(location, FrameRef):
+                    ring = rings.pop(location.name, None)
+                    if ring is None:
+                        ring = FrameRing.attach(location.name, location.shape, location.slots, location.dtype)
+                        if len(rings) >= MAX_ATTACHED_RINGS:
+                            rings.pop(next(iter(rings))).close()
+                    # Most recently used last
+                    rings[location.name] = ring
+                    frame = ring.resolve(location)
+                else:
+                    name, shape, dtype = location
+                    if shm is None or shm.name != name:
+                        if shm is not None:
+                            shm.close()
+                        shm = shared_memory.SharedMemory(name=name)
+                    frame = np.ndarray(shape, dtype, buffer=shm.buf)
+                result = (True, task(frame, *args))
+            except Exception as e:
+                result = (False, f"{type(e).__name__}: {e}")
+            # Views must be gone before the blocks can be closed
+            frame = None
+            conn.send(result)
+    finally:
+        for ring in rings.values():
+            ring.close()
+        if shm is not None:
+            shm.close()
+
+
+class _Worker:
+    """A worker process with its own pipe and shared memory frame block."""
+
+    def __init__(self, context, frame_bytes: int):
+        self.context = context
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, frame_bytes))
+        self._start_process()
+
+    def _start_process(self):
+        self.conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(target=_worker_main, args=(child_conn,), name="inference-worker",
+                                            daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def _resize(self, nbytes: int):
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+
+    def run(self, task: Callable, frame: np.ndarray, args: tuple):
+        # Frames already in shared memory are passed by reference, others copied
+        # once into memory the worker maps too
+        location = find_frame(frame)
+        if location is None:
+            if frame.nbytes > self.shm.size:
+                self._resize(frame.nbytes)
+            np.ndarray(frame.shape, frame.dtype, buffer=self.shm.buf)[...] = frame
+            location = (self.shm.name, frame.shape, frame.dtype.str)
+
+        try:
+            self.conn.send((location, task, args))
+            ok, result = self.conn.recv()
+        except (EOFError, OSError):
+            # The worker died (e.g. a crash in native code): replace it for the next call
+            self.conn.close()
+            self._start_process()
+            raise RuntimeError("Inference worker exited unexpectedly")
+
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def close(self, timeout: float):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessInferencePool:
+    """
+    Runs inference calls in worker processes instead of threads.
+
+    Detector post-processing, tracking of results and color segmentation have
+    enough Python-level work that threads contend for the GIL; worker
+    processes run them truly in parallel.
+
+    Each worker keeps its own state between calls: tasks are module-level
+    functions (importable by the workers) that cache what they load, such as a
+    detector model or segmentation buffers, in module globals of the worker
+    process. Frames are not pickled: a frame living in a FrameRing slot is
+    passed as a reference to the slot (the caller must hold the slot until run()
+    returns), any other frame is copied once into the worker's own shared memory
+    block. Only the task arguments and the (small) results go through the
+    worker's pipe.
+
+    ``run()`` blocks the calling thread until a worker is free and has returned
+    the result; call it from several threads (e.g. the pipeline's detection
+    workers) to keep all processes busy. Workers are started on first use.
+    """
+
+    def __init__(self, workers: int = 2, frame_bytes: int = DEFAULT_FRAME_BYTES, start_method: str = "spawn"):
+        """
+        Args:
+            workers: Number of worker processes
+            frame_bytes: Initial size of each worker's frame block
+            start_method: multiprocessing start method. "spawn" is the default because
+                forking a process with running threads (or a loaded torch) is unsafe
+        """
+        self.workers = max(1, workers)
+        self.frame_bytes = frame_bytes
+        self.start_method = start_method
+        self.calls = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+        self._workers: List[_Worker] = []
+        self._idle: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return
+            context = multiprocessing.get_context(self.start_method)
+            self._workers = [_Worker(context, self.frame_bytes) for _ in range(self.workers)]
+            for worker in self._workers:
+                self._idle.put(worker)
+            self._started_at = time.monotonic()
+
+    def run(self, task: Callable, frame: np.ndarray, *args):
+        """
+        Run ``task(frame, *args)`` in a worker process and return its result.
+
+        Raises:
+            RuntimeError: If the task raised (the message names the original exception)
+                or the worker process died
+        """
+        if not self._workers:
+            self.start()
+
+        worker = self._idle.get()
+        start = time.monotonic()
+        failed = False
+        try:
+            return worker.run(task, frame, args)
+        except RuntimeError:
+            failed = True
+            raise
+        finally:
+            busy = time.monotonic() - start
+            # Called from several detection workers at once
+            with self._lock:
+                self.calls += 1
+                self.errors += int(failed)
+                self.busy_seconds += busy
+            self._idle.put(worker)
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._idle = queue.Queue()
+        for worker in workers:
+            worker.close(timeout)
+
+    def stats(self) -> Dict:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        with self._lock:
+            calls, errors, busy_seconds = self.calls, self.errors, self.busy_seconds
+        return {
+            "workers": self.workers,
+            "running": self.is_running,
+            "calls": calls,
+            "errors": errors,
+            # Fraction of the workers' wall time spent on calls
+            "utilization": round(busy_seconds / (elapsed * self.workers), 3) if elapsed else 0.0,
+        }
+
+
+# Tasks for the API's detection modes. They run inside the worker processes,
+# where each keeps its model or buffers for the life of the process.
+
+_segmenters = {}
+
+
+def detect_objects_task(frame: np.ndarray, detector_module: str, with_timings: bool = False):
+    """
+    Structured detection array from a detector module (e.g. od_models.mobilenet_ssd_detector);
+    with with_timings, a (detections, stage timings) tuple.
+    """
+    timings = {} if with_timings else None
+    detections = importlib.import_module(detector_module).detect_batch([frame], as_array=True, timings=timings)[0]
+    return (detections, timings) if with_timings else detections
+
+
+def segment_colors_task(frame: np.ndarray, enabled_colors, min_area: int, regions=None, scale: float = 1.0,
+                        with_timings: bool = False):
+    """
+    Color blobs from a ColorSegmenter kept per processing scale; with with_timings,
+    a (blobs, stage timings) tuple.
+    """
+    segmenter = _segmenters.get(scale)
+    if segmenter is None:
+        from cv_utils.segmentation import ColorSegmenter
+        from cv_utils.tracker import COLOR_RANGES
+        segmenter = _segmenters[scale] = ColorSegmenter(COLOR_RANGES, scale=scale)
+    blobs = segmenter.segment(frame, enabled_colors, min_area, regions)
+    return (blobs, segmenter.last_timings) if with_timings else blobs
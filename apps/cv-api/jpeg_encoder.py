@@ -0,0 +1,180 @@
+import time
+from typing import Callable, Dict
+
+import cv2 as cv
+import numpy as np
+
+# Encoders tried, in order, when none is named: libjpeg-turbo bindings first
+AUTO_ORDER = ("simplejpeg", "turbojpeg", "opencv")
+
+
+class JpegEncoder:
+    """
+    JPEG encoder of BGR frames, backed by one of several libraries.
+
+    simplejpeg and PyTurboJPEG call libjpeg-turbo directly, skipping OpenCV's
+    generic imwrite layer and its extra buffer copy; both are optional and
+    imported on creation. OpenCV is always available.
+    """
+
+    def __init__(self, name: str, encode: Callable[[np.ndarray, int], bytes]):
+        self.name = name
+        self._encode = encode
+
+    def encode(self, frame: np.ndarray, quality: int) -> bytes:
+        return self._encode(frame, quality)
+
+    def __repr__(self):
+        return f"JpegEncoder({self.name!r})"
+
+
+def _opencv() -> Callable[[np.ndarray, int], bytes]:
+    def encode(frame, quality):
+        _, buffer = cv.imencode('.jpg', frame, [cv.IMWRITE_JPEG_QUALITY, quality])
+        return buffer.tobytes()
+    return encode
+
+
+def _simplejpeg() -> Callable[[np.ndarray, int], bytes]:
+    import simplejpeg
+
+    def encode(frame, quality):
+        # simplejpeg needs C-contiguous rows
+        return simplejpeg.encode_jpeg(np.ascontiguousarray(frame), quality=quality, colorspace='BGR')
+    return encode
+
+
+def _turbojpeg() -> Callable[[np.ndarray, int], bytes]:
+    from turbojpeg import TurboJPEG
+
+    jpeg = TurboJPEG()
+
+    def encode(frame, quality):
+        return jpeg.encode(frame, quality=quality)
+    return encode
+
+
+ENCODERS: Dict[str, Callable[[], Callable[[np.ndarray, int], bytes]]] = {
+    "simplejpeg": _simplejpeg,
+    "turbojpeg": _turbojpeg,
+    "opencv": _opencv,
+}
+
+
+def create_encoder(name: str = "auto") -> JpegEncoder:
+    """
+    Create a JPEG encoder by name ("simplejpeg", "turbojpeg", "opencv"), or the
+    fastest one installed with "auto".
+
+    Raises:
+        ValueError: For an unknown name
+        ImportError: When the named encoder's library is not installed
+    """
+    if name == "auto":
+        for candidate in AUTO_ORDER:
+            try:
+                return create_encoder(candidate)
+            except (ImportError, OSError):
+                # Not installed, or PyTurboJPEG without the libjpeg-turbo shared library
+                continue
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown JPEG encoder: {name}. Must be one of auto, {', '.join(ENCODERS)}")
+    return JpegEncoder(name, ENCODERS[name]())
+
+
+def available_encoders() -> Dict[str, bool]:
+    """Whether each encoder can be created here."""
+    available = {}
+    for name in ENCODERS:
+        try:
+            create_encoder(name)
+            available[name] = True
+        except (ImportError, OSError):
+            available[name] = False
+    return available
+
+
+def resize_preview(frame: np.ndarray, max_width: int) -> np.ndarray:
+    """
+    The frame downscaled to at most max_width pixels wide (aspect ratio kept),
+    or the frame itself when it is narrower or max_width is 0.
+    """
+    height, width = frame.shape[:2]
+    if not max_width or width <= max_width:
+        return frame
+    size = (max_width, max(1, round(height * max_width / width)))
+    # INTER_AREA looks marginally better but is several times slower than the
+    # JPEG encode itself at non-integer factors (e.g. 1080p to 1280 wide)
+    return cv.resize(frame, size, interpolation=cv.INTER_LINEAR)
+
+
+class BitrateController:
+    """
+    JPEG quality of one client, adapted towards a target bitrate.
+
+    The bytes sent are summed over windows of ``window`` seconds; when a window
+    ran over the target by more than ``tolerance`` the quality goes down a step,
+    when it stayed well below the target it goes up a step. Qualities move in
+    steps of ``step`` so clients with similar links share the same encoded
+    frames (each distinct quality is encoded once per frame).
+    """
+
+    def __init__(self, target_kbps: float, quality: int = 80, min_quality: int = 30, max_quality: int = 90,
+                 step: int = 5, window: float = 1.0, tolerance: float = 0.1,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            target_kbps: Bitrate to stay under, in kilobits per second
+            quality: Initial JPEG quality
+            min_quality: Lowest quality used
+            max_quality: Highest quality used
+            step: Quality change per adjustment
+            window: Seconds of traffic measured per adjustment
+            tolerance: Fraction the bitrate may exceed the target by before lowering the quality
+            clock: Time source, replaceable in tests
+        """
+        self.target_kbps = target_kbps
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.step = step
+        self.window = window
+        self.tolerance = tolerance
+        self.clock = clock
+        self.quality = min(max(quality // step * step, min_quality), max_quality)
+        self.kbps = 0.0
+        self.adjustments = 0
+        self._window_start = clock()
+        self._window_bytes = 0
+
+    def record(self, sent_bytes: int) -> bool:
+        """
+        Account a sent frame; returns whether the quality changed.
+        """
+        now = self.clock()
+        self._window_bytes += sent_bytes
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return False
+
+        self.kbps = self._window_bytes * 8 / 1000 / elapsed
+        self._window_start, self._window_bytes = now, 0
+        quality = self.quality
+        if self.kbps > self.target_kbps * (1 + self.tolerance):
+            # Lower further the more the target is overshot
+            steps = 2 if self.kbps > self.target_kbps * 2 else 1
+            quality = max(self.min_quality, quality - steps * self.step)
+        elif self.kbps < self.target_kbps * 0.7:
+            quality = min(self.max_quality, quality + self.step)
+        if quality == self.quality:
+            return False
+        self.quality = quality
+        self.adjustments += 1
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            "target_kbps": self.target_kbps,
+            "kbps": round(self.kbps, 1),
+            "quality": self.quality,
+            "adjustments": self.adjustments,
+        }
@@ -1,18 +1,80 @@
 import os
 import json
 import asyncio
-from typing import List, Dict
+from typing import List, Dict, Hashable, Optional
 import aiohttp
 
+from narration_cache import NarrationCache, scene_signature
+from rate_limit import RateLimiter
+
+DEFAULT_GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+
 class LLMService:
-    def __init__(self):
+    """
+    Scene narration with an LLM.
+
+    Narrations are cached by scene signature (the multiset of detected object
+    types and positions), so a scene that has not changed reuses its previous
+    narration instead of calling the LLM again; only new scenes, or scenes whose
+    narration is older than the cache TTL, reach the provider. Concurrent
+    requests for the same scene share one LLM call.
+
+    Calls that do reach the provider are rate limited and capped in number
+    running at once, whichever cameras and viewers they come from.
+    """
+
+    def __init__(self, base_url: str = None, cache_size: int = None, cache_ttl: float = None,
+                 include_positions: bool = None, timeout: float = None, max_concurrent: int = None,
+                 rate_per_minute: float = None):
+        """
+        Args:
+            base_url: Gemini API base URL (default: GEMINI_BASE_URL or Google's endpoint)
+            cache_size: Scenes kept in the narration cache (default: LLM_NARRATION_CACHE_SIZE or 128)
+            cache_ttl: Seconds a cached narration is reused (default: LLM_NARRATION_CACHE_TTL or 60; 0 disables caching)
+            include_positions: Whether object positions are part of the scene signature
+                (default: LLM_NARRATION_INCLUDE_POSITIONS, on)
+            timeout: Seconds an LLM request may take in total (default: LLM_TIMEOUT_SECONDS or 10)
+            max_concurrent: LLM requests in flight at most (default: LLM_MAX_CONCURRENT or 2)
+            rate_per_minute: LLM requests per minute at most, on average (default: LLM_RATE_PER_MINUTE
+                or 30; 0 disables the limit)
+        """
         self.api_key = os.getenv("GEMINI_API_KEY")
         self.provider = os.getenv("LLM_PROVIDER", "gemini")
         self.model = os.getenv("LLM_MODEL", "gemini-2.0-flash")
 
         # Define the base URL
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models"
-        
+        self.base_url = base_url or os.getenv("GEMINI_BASE_URL", DEFAULT_GEMINI_BASE_URL)
+
+        if cache_size is None:
+            cache_size = int(os.getenv("LLM_NARRATION_CACHE_SIZE", "128"))
+        if cache_ttl is None:
+            cache_ttl = float(os.getenv("LLM_NARRATION_CACHE_TTL", "60"))
+        if include_positions is None:
+            include_positions = os.getenv("LLM_NARRATION_INCLUDE_POSITIONS", "1") != "0"
+        self.include_positions = include_positions
+        self.cache = NarrationCache(cache_size, cache_ttl)
+
+        # One long-lived HTTP session: its connection pool keeps the connection to the
+        # provider alive between narrations instead of paying DNS and TLS every time
+        self.timeout = aiohttp.ClientTimeout(total=timeout or float(os.getenv("LLM_TIMEOUT_SECONDS", "10")), connect=5)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+
+        # Global limits against the provider
+        self.max_concurrent = max_concurrent or int(os.getenv("LLM_MAX_CONCURRENT", "2"))
+        if rate_per_minute is None:
+            rate_per_minute = float(os.getenv("LLM_RATE_PER_MINUTE", "30"))
+        self.rate_limiter = RateLimiter(rate_per_minute, burst=self.max_concurrent)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.in_flight = 0
+
+        # LLM calls in flight by scene signature, shared by concurrent requests for the same scene
+        self._pending: Dict[Hashable, asyncio.Task] = {}
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.shared_calls = 0
+
     async def generate_narration(self, valid_objects: List[Dict]) -> str:
         """
         Generates a natural language description of the scene based on detected objects.
@@ -25,23 +87,85 @@ class LLMService:
         """
         if not valid_objects:
             return "The scene is empty."
-            
-        prompt = self._construct_prompt(valid_objects)
-        
+
         if not self.api_key:
             # Fallback mock response if no API key is set
             print("Warning: GEMINI_API_KEY not set. Using mock response.")
             return self._mock_response(valid_objects)
-            
-        try:
-            if self.provider == "gemini":
-                return await self._call_gemini(prompt)
+
+        if self.provider != "gemini":
             # Add other providers here
-            else:
-                return self._mock_response(valid_objects)
-        except Exception as e:
-            print(f"LLM Error: {e}")
-            return "I'm having trouble seeing right now."
+            return self._mock_response(valid_objects)
+
+        key = scene_signature(valid_objects, self.include_positions)
+        narration = self.cache.get(key)
+        if narration is not None:
+            return narration
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._narrate(key, self._construct_prompt(valid_objects)))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.shared_calls += 1
+        # A caller going away must not cancel the call other callers are waiting for
+        return await asyncio.shield(task)
+
+    async def _narrate(self, key: Hashable, prompt: str) -> str:
+        """Call the LLM for a scene and cache the narration; failures are not cached."""
+        async with self._get_semaphore():
+            await self.rate_limiter.acquire()
+            self.llm_calls += 1
+            self.in_flight += 1
+            try:
+                narration = await self._call_gemini(prompt)
+            except Exception as e:
+                self.llm_errors += 1
+                print(f"LLM Error: {e}")
+                return "I'm having trouble seeing right now."
+            finally:
+                self.in_flight -= 1
+        self.cache.put(key, narration)
+        return narration
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """The concurrency cap, created for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """The pooled session, created on first use (sessions belong to the running event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=8, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Close the pooled session, e.g. on application shutdown."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> Dict:
+        """LLM call counts and narration cache effectiveness, e.g. for status endpoints."""
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "llm_calls": self.llm_calls,
+            "llm_errors": self.llm_errors,
+            # Requests that joined an identical call already in flight
+            "shared_calls": self.shared_calls,
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "rate_limit": self.rate_limiter.stats(),
+            "cache": self.cache.stats(),
+        }
 
     def _construct_prompt(self, objects: List[Dict]) -> str:
         descriptions = []
@@ -91,7 +215,7 @@ class LLMService:
                 "parts":[{"text":system_instruction}]
             },
             # Configuration for concise output
-             "config":{
+             "generationConfig":{
                 "maxOutputTokens":51,
                 "temperature":0.3
              }
@@ -101,15 +225,14 @@ class LLMService:
         headers = {
             "Content-Type":"application/json"
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    # Navigate the JSON response structure
-                    candidate = result.get('candidate', [{}])[0]
-                    text_part = candidate.get('content', {}).get('parts', [{}])[0]
-                    return text_part.get('text', 'Narration unavailable.')
-                else:
-                    error_text = await response.text()
-                    print(f"Gemini API returned status{response.status}:{error_text}")
-                    return f"Error: Failed to connect to Gemini API (Status {response.status})"
+        async with self._get_session().post(url, headers=headers, json=payload) as response:
+            if response.status == 200:
+                result = await response.json()
+                # Navigate the JSON response structure
+                candidate = (result.get('candidates') or [{}])[0]
+                text_part = (candidate.get('content', {}).get('parts') or [{}])[0]
+                return text_part.get('text', 'Narration unavailable.')
+            else:
+                error_text = await response.text()
+                # Raised rather than returned so error messages are never cached as narrations
+                raise RuntimeError(f"Gemini API returned status {response.status}: {error_text}")
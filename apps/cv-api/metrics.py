@@ -0,0 +1,150 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds of the latency histogram buckets: from sub-millisecond
+# image operations up to multi-second LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets (Prometheus semantics: each bucket
+    counts the observations less than or equal to its upper bound). Recording
+    is a bisect and a few additions under a lock, cheap enough for every frame.
+    Safe to update from several threads.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # Per-bucket (non-cumulative) counts; the last entry is the +Inf bucket
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def cumulative_counts(self) -> List[int]:
+        """Observations up to each bucket bound, ending with the +Inf bucket (the total count)."""
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        for index, count in enumerate(counts):
+            total += count
+            counts[index] = total
+        return counts
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimated q-quantile in seconds, interpolated linearly inside the bucket
+        it falls in (as Prometheus' histogram_quantile does); None without data.
+        Values in the +Inf bucket are reported as the largest finite bound.
+        """
+        counts = self.cumulative_counts()
+        if not counts[-1]:
+            return None
+        rank = q * counts[-1]
+        index = bisect.bisect_left(counts, rank)
+        if index >= len(self.buckets):
+            return self.buckets[-1]
+        lower = self.buckets[index - 1] if index else 0.0
+        below = counts[index - 1] if index else 0
+        in_bucket = counts[index] - below
+        return lower + (self.buckets[index] - lower) * (rank - below) / in_bucket if in_bucket else lower
+
+    def summary(self) -> Dict:
+        def ms(seconds):
+            return round(seconds * 1e3, 3) if seconds is not None else None
+
+        count = self.count
+        return {
+            "count": count,
+            "avg_ms": ms(self.sum / count) if count else None,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p90_ms": ms(self.quantile(0.9)),
+            "p99_ms": ms(self.quantile(0.99)),
+        }
+
+
+class StageMetrics:
+    """
+    Latency histograms of the frame processing stages, per camera.
+
+    Stages are reported by whoever runs them: the pipeline (capture, detect,
+    draw, jpeg_encode, encode, end_to_end), the color segmenter (blur_hsv,
+    segmentation, contours), the detectors (preprocess, forward, nms,
+    postprocess), the WebSocket handlers (send) and narration. New stage
+    names simply start a new histogram.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, camera_id: str, stage: str) -> Histogram:
+        key = (camera_id, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, camera_id: str, stage: str, seconds: float):
+        self.histogram(camera_id, stage).observe(seconds)
+
+    def observe_all(self, camera_id: str, timings: Dict[str, float]):
+        """Record a dict of stage timings, e.g. ColorSegmenter.last_timings."""
+        for stage, seconds in timings.items():
+            self.observe(camera_id, stage, seconds)
+
+    def summary(self, camera_id: str) -> Dict[str, Dict]:
+        """Count, average and estimated percentiles of each stage of a camera."""
+        with self._lock:
+            items = sorted((stage, histogram) for (camera, stage), histogram in self._histograms.items()
+                           if camera == camera_id)
+        return {stage: histogram.summary() for stage, histogram in items}
+
+    def remove(self, camera_id: str):
+        """Forget a camera's histograms, e.g. when it is unregistered."""
+        with self._lock:
+            for key in [key for key in self._histograms if key[0] == camera_id]:
+                del self._histograms[key]
+
+    def render(self, name: str = "cv_stage_duration_seconds") -> str:
+        """The histograms in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+
+        lines = [f"# HELP {name} Time spent per frame in each processing stage.", f"# TYPE {name} histogram"]
+        for (camera_id, stage), histogram in items:
+            labels = {"camera": camera_id, "stage": stage}
+            counts = histogram.cumulative_counts()
+            for bound, count in zip(histogram.buckets, counts):
+                lines.append(f"{name}_bucket{format_labels({**labels, 'le': repr(float(bound))})} {count}")
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {counts[-1]}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum!r}")
+            lines.append(f"{name}_count{format_labels(labels)} {counts[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """Prometheus label set, e.g. {camera="default",stage="forward"}."""
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f"{key}=\"{value}\"" for key, value in zip(labels, escaped)) + "}"
+
+
+def render_metric(name: str, metric_type: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> str:
+    """A gauge or counter family in the Prometheus text exposition format."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines += [f"{name}{format_labels(labels)} {value}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
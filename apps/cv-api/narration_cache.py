@@ -0,0 +1,92 @@
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+def scene_signature(objects: List[Dict], include_positions: bool = True) -> tuple:
+    """
+    Canonical key of a detected scene: the multiset of (type, position) pairs,
+    independent of detection order (and of track ids, confidences and boxes).
+
+    Positions are already quantized to the 3x3 grid labels ("top-left", ...);
+    with include_positions=False they are dropped too, so objects moving around
+    the frame keep the same signature and only arrivals and departures count.
+
+    Args:
+        objects: Narration objects, e.g. [{"color": "Red", "position": "left"}]
+            or [{"object": "person", "position": "center", "track_id": 3}]
+        include_positions: Whether an object's position is part of the signature
+    """
+    counts = Counter(
+        (obj.get('color') or obj.get('object', 'unknown'), obj.get('position', '') if include_positions else '')
+        for obj in objects
+    )
+    return tuple(sorted(counts.items()))
+
+
+class NarrationCache:
+    """
+    LRU cache of narrations by scene signature, with a time-to-live.
+
+    Entries expire ttl_seconds after they were stored, so even a scene that
+    never changes is re-narrated now and then; the least recently used entry
+    is evicted when the cache is full. Used from the event loop only.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries: Scenes kept at most
+            ttl_seconds: Age after which a narration is generated anew (0 disables caching)
+            clock: Time source, replaceable in tests
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, narration = entry
+            if self.clock() - stored_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return narration
+            del self._entries[key]
+            self.expirations += 1
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, narration: str):
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (self.clock(), narration)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,171 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+from llm_service import LLMService
+
+
+class StreamNarrator:
+    """
+    Narration of one video source, generated in the background.
+
+    request() is called with the current detections and ``latest`` is read
+    whenever a frame is sent; neither waits for the LLM, so a slow narration
+    never delays frame delivery. At most one narration is in flight:
+    requests made while it runs are coalesced, keeping only the newest
+    detections, which are narrated as soon as the running one finishes.
+    """
+
+    def __init__(self, service: LLMService, observe: Optional[Callable[[float], None]] = None):
+        """
+        Args:
+            service: The LLM service generating narrations
+            observe: Called with the duration in seconds of every finished narration
+        """
+        self.service = service
+        self.observe = observe
+        self.latest = ""
+        self.requests = 0
+        self.narrations = 0
+        self.coalesced = 0
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[List[Dict]] = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def request(self, detected_objects: List[Dict]):
+        """Ask for a narration of these detections without waiting for it."""
+        self.requests += 1
+        if self.in_flight:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = detected_objects
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(detected_objects))
+
+    async def _run(self, detected_objects: List[Dict]):
+        while detected_objects is not None:
+            start = time.monotonic()
+            try:
+                self.latest = await self.service.generate_narration(detected_objects)
+            except Exception as e:
+                print(f"Narration failed: {e}")
+            self.narrations += 1
+            if self.observe is not None:
+                self.observe(time.monotonic() - start)
+            detected_objects, self._pending = self._pending, None
+
+    async def close(self):
+        """Cancel the narration in flight, e.g. when the client disconnects."""
+        self._pending = None
+        if self.in_flight:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "narrations": self.narrations,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
+
+
+class _Source:
+    """Narration state of one camera: its narrator, loop task and subscriber count."""
+
+    def __init__(self, narrator: StreamNarrator, get_objects: Callable[[], Optional[List[Dict]]]):
+        self.narrator = narrator
+        self.get_objects = get_objects
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class NarrationScheduler:
+    """
+    Narration of every camera, computed once per interval for all its viewers.
+
+    Streams subscribe to a camera's narration and read ``latest(camera_id)``
+    with every frame they send, so ten viewers of a camera cost the LLM one
+    request per interval instead of ten. While a camera has subscribers, a
+    loop on the event loop takes its current detections every ``interval``
+    seconds and hands them to the camera's StreamNarrator (one request in
+    flight, newer detections coalesced). The LLMService enforces the rate limit
+    and concurrency cap shared by all cameras.
+    """
+
+    def __init__(self, service: LLMService, interval: float = 3.0,
+                 observe: Optional[Callable[[str, float], None]] = None):
+        """
+        Args:
+            service: The LLM service generating narrations
+            interval: Seconds between narrations of a camera
+            observe: Called with (camera_id, seconds) for every finished narration
+        """
+        self.service = service
+        self.interval = interval
+        self.observe = observe
+        self._sources: Dict[str, _Source] = {}
+
+    def subscribe(self, camera_id: str, get_objects: Callable[[], Optional[List[Dict]]]):
+        """
+        Start receiving a camera's narration (starting its narration loop for the first subscriber).
+
+        Args:
+            camera_id: The camera
+            get_objects: Returns the camera's current narration objects, or None
+                while there is nothing to narrate (e.g. the camera is stopped)
+        """
+        source = self._sources.get(camera_id)
+        if source is None:
+            observe = (lambda seconds: self.observe(camera_id, seconds)) if self.observe else None
+            source = self._sources[camera_id] = _Source(StreamNarrator(self.service, observe), get_objects)
+        source.get_objects = get_objects
+        source.subscribers += 1
+        if source.task is None:
+            source.task = asyncio.get_running_loop().create_task(self._run(source))
+
+    async def unsubscribe(self, camera_id: str):
+        """Stop receiving a camera's narration; the last subscriber stops its loop."""
+        source = self._sources.get(camera_id)
+        if source is None:
+            return
+        source.subscribers -= 1
+        if source.subscribers <= 0:
+            del self._sources[camera_id]
+            await self._stop(source)
+
+    def latest(self, camera_id: str) -> str:
+        source = self._sources.get(camera_id)
+        return source.narrator.latest if source else ""
+
+    async def close(self):
+        sources, self._sources = list(self._sources.values()), {}
+        for source in sources:
+            await self._stop(source)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {camera_id: {"subscribers": source.subscribers, **source.narrator.stats()}
+                for camera_id, source in self._sources.items()}
+
+    async def _run(self, source: _Source):
+        while True:
+            await asyncio.sleep(self.interval)
+            objects = source.get_objects()
+            if objects is not None:
+                source.narrator.request(objects)
+
+    @staticmethod
+    async def _stop(source: _Source):
+        if source.task is not None:
+            source.task.cancel()
+            try:
+                await source.task
+            except asyncio.CancelledError:
+                pass
+        await source.narrator.close()
@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class FramePacer:
+    """
+    Deadline-based frame pacing for the capture stage.
+
+    Instead of sleeping a fixed delay after each frame (which makes the real rate
+    lower than the target by however long the frame took), frames are scheduled
+    on absolute deadlines, so time spent reading and processing counts towards
+    the interval. When a deadline is missed by more than a whole interval the
+    missed slots are skipped rather than caught up in a burst.
+
+    The interval adapts to the pipeline:
+
+    - it is never shorter than the measured per-frame cost of the slowest stage
+      (plus headroom), so frames are not captured only to be dropped later;
+    - backpressure (frames dropped between stages or for slow clients) cuts the
+      rate multiplicatively, and it recovers additively while things keep up.
+    """
+
+    def __init__(self, max_fps: Callable[[], float], min_fps: float = 1.0, headroom: float = 1.1,
+                 backoff: float = 0.8, recovery_fps: float = 0.5):
+        """
+        Args:
+            max_fps: Callable returning the current target (maximum) frame rate,
+                e.g. depending on the detection mode
+            min_fps: Lowest rate backpressure can push the pacer to
+            headroom: Factor applied to the slowest stage's per-frame cost
+            backoff: Rate multiplier applied on backpressure
+            recovery_fps: Rate regained per frame without backpressure
+        """
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.headroom = headroom
+        self.backoff = backoff
+        self.recovery_fps = recovery_fps
+
+        self.fps_limit = float(max_fps())
+        self.bottleneck_seconds = 0.0
+        self.skipped_frames = 0
+        self.backpressure_events = 0
+        self._last_drop_count = 0
+        self._next_deadline: Optional[float] = None
+
+    @property
+    def interval(self) -> float:
+        """Current delay between frames in seconds."""
+        max_fps = float(self.max_fps())
+        fps_limit = min(self.fps_limit, max_fps)
+        return max(1.0 / fps_limit, self.bottleneck_seconds * self.headroom)
+
+    @property
+    def target_fps(self) -> float:
+        return 1.0 / self.interval
+
+    def reset(self):
+        """Forget the schedule, e.g. after the pipeline idled without viewers."""
+        self._next_deadline = None
+
+    def wait(self, stop_event: threading.Event) -> bool:
+        """
+        Block until the next frame is due.
+
+        Returns:
+            bool: False if stop_event was set while waiting
+        """
+        interval = self.interval
+        now = time.monotonic()
+        if self._next_deadline is None:
+            self._next_deadline = now
+        elif now - self._next_deadline > interval:
+            # Fell behind by more than a frame: drop the missed slots instead of bursting
+            self.skipped_frames += int((now - self._next_deadline) / interval)
+            self._next_deadline = now
+
+        if stop_event.wait(max(0.0, self._next_deadline - now)):
+            return False
+        self._next_deadline += interval
+        return True
+
+    def update(self, bottleneck_seconds: float, drop_count: int):
+        """
+        Feed back the pipeline's state after a frame.
+
+        Args:
+            bottleneck_seconds: Per-frame cost of the slowest stage (its latency
+                divided by its parallelism)
+            drop_count: Running total of frames dropped anywhere downstream
+        """
+        self.bottleneck_seconds = bottleneck_seconds
+        max_fps = float(self.max_fps())
+
+        if drop_count > self._last_drop_count:
+            self.backpressure_events += 1
+            self.fps_limit = max(self.min_fps, min(self.fps_limit, max_fps) * self.backoff)
+        else:
+            self.fps_limit = min(max_fps, self.fps_limit + self.recovery_fps)
+        self._last_drop_count = drop_count
+
+    def stats(self) -> Dict:
+        return {
+            "max_fps": float(self.max_fps()),
+            "target_fps": round(self.target_fps, 2),
+            "bottleneck_ms": round(self.bottleneck_seconds * 1e3, 3),
+            "skipped_frames": self.skipped_frames,
+            "backpressure_events": self.backpressure_events,
+        }
@@ -0,0 +1,558 @@
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from cv_utils.frame_ring import FrameRing
+from frame_hub import FrameHub, FramePacket
+from jpeg_encoder import JpegEncoder, create_encoder, resize_preview
+from pacing import FramePacer
+
+
+class StageStats:
+    """Latency statistics of one pipeline stage. Safe to update from several threads."""
+
+    def __init__(self, smoothing: float = 0.1):
+        self.smoothing = smoothing
+        self.count = 0
+        self.last = 0.0
+        self.average = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.last = seconds
+            self.max = max(self.max, seconds)
+            # Exponential moving average, seeded with the first sample
+            if self.count == 1:
+                self.average = seconds
+            else:
+                self.average += self.smoothing * (seconds - self.average)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "last_ms": round(self.last * 1e3, 3),
+                "avg_ms": round(self.average * 1e3, 3),
+                "max_ms": round(self.max * 1e3, 3),
+            }
+
+
+@dataclass
+class _StagedFrame:
+    """A frame travelling through the pipeline stages."""
+    sequence: int
+    captured_at: float  # time.monotonic() when the frame was returned by the camera
+    frame: np.ndarray
+    stats: Dict = field(default_factory=dict)
+    detected_objects: List[Dict] = field(default_factory=list)
+    render: Optional[Callable[[np.ndarray], np.ndarray]] = None
+    # Ring and slot holding the frame, or None for an ordinary array
+    ring: Optional[FrameRing] = None
+    slot: Optional[int] = None
+
+    def release(self):
+        """Give the frame's ring slot back once no stage needs the pixels anymore."""
+        if self.ring is not None:
+            self.ring.release(self.slot)
+            self.ring = None
+
+
+def _put_latest(stage_queue: queue.Queue, item):
+    """
+    Put an item into a bounded queue, discarding the oldest queued item when it is
+    full so downstream stages always work on the freshest frames.
+
+    Returns:
+        The item that was dropped to make room, or None
+    """
+    dropped = None
+    while True:
+        try:
+            stage_queue.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                dropped = stage_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class DetectionPool:
+    """
+    Detection worker threads shared by any number of frame pipelines.
+
+    Each registered pipeline has its own small queue of frames waiting for
+    detection (oldest dropped when full). Idle workers take the next frame
+    round-robin across pipelines, so every camera gets an equal share of the
+    workers no matter how fast it captures, and adding cameras spreads work over
+    the same pool instead of multiplying threads.
+
+    Frames of a pipeline whose detection keeps state from frame to frame (its
+    ``ordered()`` is true, e.g. motion gating or object tracking) are taken one
+    at a time: the next frame of that pipeline is only handed out once the
+    previous one is done, so they are processed in capture order. The other
+    pipelines' frames are independent and may be spread over several workers.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 2):
+        """
+        Args:
+            workers: Number of detection worker threads
+            queue_size: Frames each pipeline may have waiting for detection
+        """
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self._queues: Dict["FramePipeline", deque] = {}
+        # Frames of each pipeline currently being processed by a worker
+        self._in_flight: Dict["FramePipeline", int] = {}
+        self._order: List["FramePipeline"] = []
+        self._next = 0
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+
+    @property
+    def pipeline_count(self) -> int:
+        return len(self._order)
+
+    def register(self, pipeline: "FramePipeline"):
+        with self._condition:
+            if pipeline not in self._queues:
+                self._queues[pipeline] = deque()
+                self._order.append(pipeline)
+            if not self._threads:
+                self._stopped = False
+                self._threads = [threading.Thread(target=self._worker_loop, name=f"frame-detect-{i}", daemon=True)
+                                 for i in range(self.workers)]
+                for thread in self._threads:
+                    thread.start()
+
+    def unregister(self, pipeline: "FramePipeline"):
+        with self._condition:
+            if self._queues.pop(pipeline, None) is not None:
+                self._order.remove(pipeline)
+
+    def submit(self, pipeline: "FramePipeline", staged):
+        """
+        Queue a frame of a registered pipeline for detection.
+
+        Returns:
+            The older frame of the same pipeline dropped to make room, or None
+        """
+        with self._condition:
+            frames = self._queues.get(pipeline)
+            if frames is None:
+                return staged
+            dropped = frames.popleft() if len(frames) >= self.queue_size else None
+            frames.append(staged)
+            self._condition.notify()
+            return dropped
+
+    def queued(self, pipeline: "FramePipeline") -> int:
+        with self._condition:
+            return len(self._queues.get(pipeline, ()))
+
+    def stop(self, timeout: float = 5.0):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def in_flight(self, pipeline: "FramePipeline") -> int:
+        with self._condition:
+            return self._in_flight.get(pipeline, 0)
+
+    def drain(self, pipeline: "FramePipeline", timeout: float = 5.0) -> bool:
+        """
+        Wait until no worker is processing a frame of the pipeline anymore.
+
+        Returns:
+            bool: False if frames were still in flight after the timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._in_flight.get(pipeline), timeout)
+
+    def _take(self):
+        """Next (pipeline, frame) in round-robin order, or None once stopped."""
+        with self._condition:
+            while not self._stopped:
+                for offset in range(len(self._order)):
+                    index = (self._next + offset) % len(self._order)
+                    pipeline = self._order[index]
+                    frames = self._queues[pipeline]
+                    busy = self._in_flight.get(pipeline, 0)
+                    if frames and not (busy and pipeline.ordered()):
+                        self._next = index + 1
+                        self._in_flight[pipeline] = busy + 1
+                        return pipeline, frames.popleft()
+                self._condition.wait(0.1)
+            return None
+
+    def _done(self, pipeline: "FramePipeline"):
+        """A worker finished a frame of the pipeline."""
+        with self._condition:
+            busy = self._in_flight.get(pipeline, 0) - 1
+            if busy > 0:
+                self._in_flight[pipeline] = busy
+            else:
+                self._in_flight.pop(pipeline, None)
+            # Its next frame may be waiting for this one
+            self._condition.notify_all()
+
+    def _worker_loop(self):
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            pipeline, staged = item
+            try:
+                pipeline._detect(staged)
+            except Exception as e:
+                # The workers are shared: one pipeline's failure must not stop the others' detection
+                print(f"Error in detection worker: {e}")
+            finally:
+                self._done(pipeline)
+
+
+class FramePipeline:
+    """
+    Staged capture -> detection -> encode pipeline shared by all viewers.
+
+    Each stage runs in its own thread(s), connected by small bounded queues:
+
+    - capture: one thread reading frames from the camera
+    - detect: worker threads running ``process_frame``, from a DetectionPool that
+      may be shared with the pipelines of other cameras
+    - encode: one thread drawing the annotations, downscaling the frame to the
+      preview width and JPEG-encoding it (once per quality the hub's subscribers
+      asked for), then publishing it to the hub, from which the WebSocket
+      handlers send it
+
+    Stages overlap across frames, so throughput is limited by the slowest stage
+    instead of the sum of all of them, and none of the OpenCV work runs on the
+    event loop. Queues keep only the newest frames: a stage that falls behind
+    drops old frames rather than building latency. Frames that finish detection
+    out of order are dropped at the encode stage if a newer frame was already
+    published.
+
+    Frames are read straight into the slots of a shared memory FrameRing and
+    every stage works on views of them, so a frame is not copied (or
+    reallocated) between capture and encoding, nor when detection hands it to
+    another process. Captures that cannot read into a given array fall back to
+    ordinary arrays.
+
+    Capture is paced by a FramePacer fed with the slowest stage's per-frame cost
+    and with frames dropped between stages or for slow clients, so the capture
+    rate follows what the pipeline and its viewers can actually keep up with.
+
+    The pipeline idles while nobody is subscribed so an unwatched camera costs nothing.
+    While its hub has listeners but no frame subscribers, frames are detected
+    but neither drawn nor encoded.
+    """
+
+    STAGES = ("capture", "detect", "encode", "end_to_end")
+
+    def __init__(self, capture, process_frame: Callable[[np.ndarray], tuple], hub: FrameHub,
+                 pacer: FramePacer, detect_workers: int = 2, queue_size: int = 2,
+                 jpeg_quality: int = 80, pool: Optional[DetectionPool] = None, ring_slots: Optional[int] = None,
+                 observe: Optional[Callable[[str, float], None]] = None,
+                 on_frame: Optional[Callable[[int, Dict, List[Dict]], None]] = None,
+                 encoder: Optional[JpegEncoder] = None, preview_width: int = 0,
+                 ordered: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            capture: An opened cv.VideoCapture (or anything with a compatible read())
+            process_frame: Callable taking a BGR frame and returning
+                (frame_stats, detected_objects, render), where render is None or a
+                callable drawing the detections onto the frame in place. Called
+                concurrently from the detection workers, unless ordered() is true.
+            hub: Hub the encoded frames are published to
+            pacer: Schedules frame captures
+            detect_workers: Number of detection worker threads when no shared pool is given
+            queue_size: Capacity of each queue between stages
+            jpeg_quality: JPEG quality of the published frames, for subscribers that
+                did not ask for their own
+            pool: Shared detection pool (default: a private pool with detect_workers threads)
+            ring_slots: Frame slots in the ring (default: enough for every queue and
+                worker to hold a frame); 0 disables the ring
+            observe: Called with (stage, seconds) for every timed stage of every frame
+                (the STAGES plus "draw", "resize" and "jpeg_encode"), e.g. to feed latency histograms.
+                Called from the pipeline's threads
+            on_frame: Called from the encode thread with (sequence, frame_stats,
+                detected_objects) of every frame that is not stale, in frame order,
+                e.g. to diff consecutive scenes
+            encoder: JPEG encoder (default: the fastest one installed, see create_encoder)
+            preview_width: Width the published frames are downscaled to, independently
+                of the resolution frames are processed at (0 keeps the full resolution)
+            ordered: Returns whether process_frame currently keeps state from one frame to
+                the next (default: never). While it does, the pool processes this pipeline's
+                frames one at a time in capture order instead of concurrently
+        """
+        self.capture = capture
+        self.process_frame = process_frame
+        self.hub = hub
+        self.pacer = pacer
+        self._owns_pool = pool is None
+        self.pool = pool or DetectionPool(detect_workers, queue_size)
+        self.jpeg_quality = jpeg_quality
+        self.encoder = encoder or create_encoder()
+        self.preview_width = preview_width
+        self.fps = 0
+        self.frames_processed = 0
+        self.dropped_frames = {"detect_queue": 0, "encode_queue": 0, "stale": 0, "errors": 0}
+        self.stage_stats = {stage: StageStats() for stage in self.STAGES}
+        self.observe = observe
+        self.on_frame = on_frame
+        self._ordered = ordered
+
+        self._encode_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        # Frames in flight at most: one per queue entry, detection worker and the capture/encode threads
+        self.ring_slots = 2 * queue_size + self.pool.workers + 2 if ring_slots is None else ring_slots
+        self.ring: Optional[FrameRing] = None
+        self._rings: List[FrameRing] = []
+        self._read_into = self.ring_slots > 0
+        self._sequence = 0
+        self._last_published = 0
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def ordered(self) -> bool:
+        """Whether frames must currently be processed one at a time, in capture order."""
+        return self._ordered is not None and self._ordered()
+
+    def start(self):
+        self._stop_event.clear()
+        self.pool.register(self)
+        targets = [("frame-capture", self._capture_loop), ("frame-encode", self._encode_loop)]
+        self._threads = [threading.Thread(target=target, name=name, daemon=True) for name, target in targets]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        self.pool.unregister(self)
+        # Workers of a shared pool may still be detecting frames held in the rings closed below
+        if not self.pool.drain(self, timeout):
+            print("Detection still running after the pipeline stopped")
+        if self._owns_pool:
+            self.pool.stop(timeout)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        # Queued frames hold views into the rings
+        while not self._encode_queue.empty():
+            self._encode_queue.get_nowait()
+        for ring in self._rings:
+            ring.close()
+        self._rings = []
+        self.ring = None
+
+    def stats(self) -> Dict:
+        """Per-stage latencies, queue depths and drop counters, e.g. for status endpoints."""
+        return {
+            "fps": self.fps,
+            "frames_processed": self.frames_processed,
+            "detect_workers": self.pool.workers,
+            "pacing": self.pacer.stats(),
+            "stages": {stage: stats.snapshot() for stage, stats in self.stage_stats.items()},
+            "queues": {"detect": self.pool.queued(self), "encode": self._encode_queue.qsize()},
+            "dropped_frames": dict(self.dropped_frames),
+            "ring": self.ring.stats() if self.ring else None,
+            "encoder": {"name": self.encoder.name, "quality": self.jpeg_quality, "preview_width": self.preview_width,
+                        "qualities": sorted({quality or self.jpeg_quality for quality in self.hub.qualities})},
+        }
+
+    def _next_sequence(self) -> int:
+        self._sequence += 1
+        return self._sequence
+
+    def _get(self, stage_queue: queue.Queue):
+        """Wait for the next item of a stage, returning None once the pipeline stops."""
+        while not self._stop_event.is_set():
+            try:
+                return stage_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _record(self, stage: str, seconds: float):
+        stats = self.stage_stats.get(stage)
+        if stats is not None:
+            stats.record(seconds)
+        if self.observe is not None:
+            self.observe(stage, seconds)
+
+    def _bottleneck_seconds(self) -> float:
+        """Per-frame cost of the slowest stage after capture."""
+        # Shared workers are split evenly between the pipelines using them, but the frames
+        # of an ordered pipeline are detected one at a time however many workers there are
+        share = max(1, self.pool.pipeline_count) / self.pool.workers
+        if self.ordered():
+            share = max(share, 1.0)
+        detect = self.stage_stats["detect"].average * share
+        return max(detect, self.stage_stats["encode"].average)
+
+    def _backpressure_drops(self) -> int:
+        """Frames dropped because a stage or a client could not keep up."""
+        return self.dropped_frames["detect_queue"] + self.dropped_frames["encode_queue"] + self.hub.dropped_frames
+
+    def _capture_loop(self):
+        while not self._stop_event.is_set():
+            if not self.hub.wait_for_subscribers(timeout=0.1):
+                self.pacer.reset()
+                continue
+
+            if not self.pacer.wait(self._stop_event):
+                return
+
+            start = time.monotonic()
+            staged = self._read()
+            if staged is None:
+                self.hub.publish(FramePacket(type="error", sequence=self._next_sequence(),
+                                             timestamp=time.time(), message="Could not read frame"))
+                self._stop_event.wait(0.1)
+                continue
+            staged.captured_at = time.monotonic()
+            self._record("capture", staged.captured_at - start)
+
+            dropped = self.pool.submit(self, staged)
+            if dropped is not None:
+                self.dropped_frames["detect_queue"] += 1
+                dropped.release()
+
+            self.pacer.update(self._bottleneck_seconds(), self._backpressure_drops())
+
+    def _read(self) -> Optional[_StagedFrame]:
+        """Read the next frame, into a free ring slot when possible."""
+        ring = self.ring
+        slot = ring.acquire() if ring is not None and self._read_into else None
+        if slot is None:
+            ret, frame = self.capture.read()
+            if not ret:
+                return None
+            if self._read_into and (ring is None or frame.shape != ring.shape):
+                # First frame or new resolution. Frames of the previous ring may still be in
+                # flight, so it is only closed when the pipeline stops
+                self.ring = FrameRing(frame.shape, self.ring_slots, frame.dtype)
+                self._rings.append(self.ring)
+            return _StagedFrame(self._next_sequence(), 0.0, frame)
+
+        view = ring.view(slot)
+        try:
+            ret, frame = self.capture.read(view)
+        except TypeError:
+            # read() without an output array argument
+            ring.release(slot)
+            self._read_into = False
+            return self._read()
+        if not ret or frame.__array_interface__['data'][0] != view.__array_interface__['data'][0]:
+            # Failed, or the capture allocated its own array (e.g. the resolution changed)
+            ring.release(slot)
+            if ret and frame.shape != ring.shape:
+                self.ring = None
+            return _StagedFrame(self._next_sequence(), 0.0, frame) if ret else None
+
+        staged = _StagedFrame(self._next_sequence(), 0.0, view, ring=ring, slot=slot)
+        ring.publish(slot, staged.sequence)
+        return staged
+
+    def _detect(self, staged: _StagedFrame):
+        """Detection stage for one frame, run by a pool worker."""
+        start = time.monotonic()
+        try:
+            staged.stats, staged.detected_objects, staged.render = self.process_frame(staged.frame)
+        except Exception as e:
+            print(f"Error processing frame: {e}")
+            self.dropped_frames["errors"] += 1
+            staged.release()
+            return
+        self._record("detect", time.monotonic() - start)
+
+        dropped = _put_latest(self._encode_queue, staged)
+        if dropped is not None:
+            self.dropped_frames["encode_queue"] += 1
+            dropped.release()
+
+    def _encode_loop(self):
+        # FPS calculation variables
+        fps_counter = 0
+        fps_start_time = time.monotonic()
+
+        while True:
+            staged = self._get(self._encode_queue)
+            if staged is None:
+                return
+
+            # A newer frame overtook this one in the detection pool
+            if staged.sequence < self._last_published:
+                self.dropped_frames["stale"] += 1
+                staged.release()
+                continue
+
+            if self.on_frame is not None:
+                try:
+                    self.on_frame(staged.sequence, staged.stats, staged.detected_objects)
+                except Exception as e:
+                    print(f"Error in frame callback: {e}")
+
+            start = time.monotonic()
+            # Drawing and encoding are skipped while nobody receives the frames
+            # (only listeners such as event streams)
+            jpeg = None
+            if self.hub.subscriber_count:
+                # Drawing is deferred to here, the only consumer that needs pixels
+                if staged.render is not None:
+                    staged.render(staged.frame)
+                drawn = time.monotonic()
+                preview = resize_preview(staged.frame, self.preview_width)
+                resized = time.monotonic()
+                qualities = {quality or self.jpeg_quality for quality in self.hub.qualities} or {self.jpeg_quality}
+                jpegs = {quality: self.encoder.encode(preview, quality) for quality in sorted(qualities)}
+                jpeg = jpegs.get(self.jpeg_quality) or jpegs[max(jpegs)]
+                self._record("draw", drawn - start)
+                self._record("resize", resized - drawn)
+                self._record("jpeg_encode", time.monotonic() - resized)
+            staged.release()
+
+            # Calculate FPS
+            fps_counter += 1
+            now = time.monotonic()
+            if now - fps_start_time >= 1.0:  # Update every second
+                self.fps = fps_counter
+                fps_counter = 0
+                fps_start_time = now
+
+            # Add FPS to frame stats
+            staged.stats['fps'] = self.fps
+
+            self.frames_processed += 1
+            self._last_published = staged.sequence
+            now = time.monotonic()
+            if jpeg is not None:
+                self.hub.publish(FramePacket(
+                    type="frame",
+                    sequence=staged.sequence,
+                    timestamp=time.time(),
+                    jpeg=jpeg,
+                    jpegs=jpegs,
+                    stats=staged.stats,
+                    detected_objects=staged.detected_objects,
+                ))
+                now = time.monotonic()
+                self._record("encode", now - start)
+            self._record("end_to_end", now - staged.captured_at)
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from typing import Callable, Dict
+
+
+class RateLimiter:
+    """
+    Token bucket limiting how often something may happen, e.g. requests to an
+    LLM provider: ``rate_per_minute`` on average, with bursts of up to ``burst``.
+
+    acquire() reserves the next free slot and sleeps until it, so concurrent
+    callers are spread out in order instead of all retrying at once. Used from
+    the event loop only.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate_per_minute: Average rate allowed; 0 or less disables limiting
+            burst: Events allowed back to back after an idle period
+            clock: Time source, replaceable in tests
+        """
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.throttled = 0
+        self.waited_seconds = 0.0
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait until it is actually available."""
+        if self.rate <= 0:
+            return 0.0
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Tokens may go negative: each caller queues behind the reservations before it
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            self.throttled += 1
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict:
+        return {
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "throttled": self.throttled,
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
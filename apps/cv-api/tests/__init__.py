@@ -0,0 +1 @@
+"""cv-api unit tests."""
@@ -0,0 +1,15 @@
+"""Synthetic video clips for tests, shared with the cv-app tests."""
+
+import cv2 as cv
+import numpy as np
+
+
+def build_clip(path, color, frames=5, size=(160, 120)):
+    """Write a short MJPG clip with a colored square moving across a grey background."""
+    writer = cv.VideoWriter(str(path), cv.VideoWriter_fourcc(*'MJPG'), 10, size)
+    for i in range(frames):
+        frame = np.full((size[1], size[0], 3), 128, np.uint8)
+        frame[30:80, 10 + 10 * i:60 + 10 * i] = color
+        writer.write(frame)
+    writer.release()
+    return str(path)
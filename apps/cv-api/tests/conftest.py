@@ -0,0 +1,34 @@
+"""Unit tests configuration module."""
+
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from .clips import build_clip
+
+# The API modules live at the project root and import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# The monorepo libraries, as api_server adds them (inherited by spawned worker processes)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../libs/cv-utils/src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../libs/od-models/src'))
+
+
+@pytest.fixture
+def write_clip():
+    """Factory writing test clips, see build_clip."""
+    return build_clip
+
+
+@pytest.fixture
+def client():
+    """API test client; cameras registered by the test are removed afterwards."""
+    import api_server
+
+    with TestClient(api_server.app) as client:
+        yield client
+    for camera_id in list(api_server.cameras):
+        if camera_id != api_server.DEFAULT_CAMERA:
+            del api_server.cameras[camera_id]
@@ -0,0 +1,88 @@
+"""Camera sources and multi-camera API tests."""
+
+import numpy as np
+
+from cameras import LoopingCapture, open_capture, parse_source
+
+
+def test_parse_source():
+    assert parse_source("0") == 0
+    assert parse_source(" 2 ") == 2
+    assert parse_source(1) == 1
+    assert parse_source("rtsp://camera.local/stream") == "rtsp://camera.local/stream"
+    assert parse_source("/videos/front.avi") == "/videos/front.avi"
+
+
+def test_video_files_loop(tmp_path, write_clip):
+    capture = open_capture(write_clip(tmp_path / "clip.avi", (0, 0, 255), frames=3))
+    assert isinstance(capture, LoopingCapture)
+    assert capture.isOpened()
+
+    frames = [capture.read() for _ in range(7)]
+    capture.release()
+    assert all(ret for ret, _ in frames)
+    assert frames[0][1].shape == (120, 160, 3)
+
+
+def test_color_segmenters_of_unused_scales_are_retired(monkeypatch):
+    import api_server
+
+    camera = api_server.tracker_state
+    frame = np.full((120, 160, 3), 128, np.uint8)
+    monkeypatch.setattr(camera, "color_scale", 0.5)
+    api_server.segment_colors(camera, frame)
+    assert 0.5 in {segmenter.scale for segmenter in api_server.color_segmenters}
+
+    camera.color_scale = 0.25
+    api_server.segment_colors(camera, frame)
+    scales = [segmenter.scale for segmenter in api_server.color_segmenters]
+    assert 0.5 not in scales
+    assert scales.count(0.25) == 1
+
+
+def test_cameras_stream_independently(client, tmp_path, write_clip):
+    sources = {"front": write_clip(tmp_path / "front.avi", (0, 0, 255)),
+               "back": write_clip(tmp_path / "back.avi", (255, 0, 0))}
+    for camera_id, source in sources.items():
+        assert client.post("/api/cameras", params={"camera_id": camera_id, "source": source}).status_code == 200
+    assert client.post("/api/cameras", params={"camera_id": "front", "source": "1"}).status_code == 400
+
+    listed = {camera["camera_id"]: camera for camera in client.get("/api/cameras").json()["cameras"]}
+    assert listed["front"]["source"] == sources["front"]
+    assert listed["default"]["source"] == 0
+
+    client.post("/api/cameras/back/colors/toggle/red")
+    for camera_id in sources:
+        assert client.post(f"/api/cameras/{camera_id}/start").json()["camera_id"] == camera_id
+
+    try:
+        stats = {}
+        for camera_id in sources:
+            with client.websocket_connect(f"/ws/video/{camera_id}") as websocket:
+                messages = [websocket.receive_json() for _ in range(3)]
+            assert [message["type"] for message in messages] == ["frame"] * 3
+            stats[camera_id] = messages[-1]["stats"]
+
+        # Each camera runs its own detection settings on its own video
+        assert stats["front"]["Red"] == 1
+        assert stats["back"]["Blue"] == 1 and stats["back"]["Red"] == 0
+        pipeline = client.get("/api/cameras/front/status").json()["pipeline"]
+        assert pipeline["frames_processed"] > 0
+        # Video files are decoded straight into the frame ring
+        assert pipeline["ring"]["writes"] > 0
+
+        # Every stage of the camera's frames is timed
+        stages = client.get("/api/cameras/front/stats").json()["stages"]
+        for stage in ("capture", "blur_hsv", "segmentation", "contours", "draw", "jpeg_encode", "send"):
+            assert stages[stage]["count"] > 0
+        metrics = client.get("/metrics").text
+        assert 'cv_stage_duration_seconds_count{camera="front",stage="detect"}' in metrics
+        assert 'cv_frames_processed_total{camera="back"}' in metrics
+        assert client.get("/api/status").json()["is_running"] is False
+    finally:
+        for camera_id in sources:
+            client.post(f"/api/cameras/{camera_id}/stop")
+
+    assert client.delete("/api/cameras/back").status_code == 200
+    assert client.get("/api/cameras/back/status").status_code == 404
+    assert client.delete("/api/cameras/default").status_code == 400
@@ -0,0 +1,103 @@
+"""Scene event stream tests."""
+
+import asyncio
+
+from events import SceneEventStream, diff_scenes
+
+
+def test_diff_follows_tracks_by_id():
+    previous = [{"object": "person", "position": "left", "track_id": 1},
+                {"object": "dog", "position": "center", "track_id": 2}]
+    current = [{"object": "person", "position": "top-left", "track_id": 1},
+               {"object": "person", "position": "right", "track_id": 3}]
+
+    events = diff_scenes(previous, current)
+    assert events == [
+        {"type": "disappeared", "object": "dog", "track_id": 2, "zone": "center"},
+        {"type": "appeared", "object": "person", "track_id": 3, "zone": "right"},
+        {"type": "moved", "object": "person", "track_id": 1, "from_zone": "left", "zone": "top-left"},
+        {"type": "count_changed", "object": "dog", "count": 0, "previous_count": 1},
+        {"type": "count_changed", "object": "person", "count": 2, "previous_count": 1},
+    ]
+    assert diff_scenes(current, list(reversed(current))) == []
+
+
+def test_diff_pairs_zones_of_untracked_blobs():
+    previous = [{"color": "Red", "position": "left"}, {"color": "Blue", "position": "center"}]
+    current = [{"color": "Red", "position": "right"}, {"color": "Blue", "position": "center"},
+               {"color": "Blue", "position": "bottom"}]
+
+    assert diff_scenes(previous, current) == [
+        {"type": "appeared", "object": "Blue", "zone": "bottom"},
+        {"type": "moved", "object": "Red", "from_zone": "left", "zone": "right"},
+        {"type": "count_changed", "object": "Blue", "count": 2, "previous_count": 1},
+    ]
+
+
+def test_ring_buffer_replays_and_reports_evicted_events():
+    stream = SceneEventStream("front", capacity=3)
+    stream.update([{"color": "Red", "position": "left"}], frame=1)  # appeared + count_changed
+    stream.update([{"color": "Red", "position": "left"}], frame=2)  # no change
+    stream.update([{"color": "Red", "position": "right"}], frame=3)  # moved
+    stream.clear()  # disappeared + count_changed
+
+    assert stream.sequence == 5
+    events, missed = stream.since(0)
+    assert [event["sequence"] for event in events] == [3, 4, 5]
+    assert missed == 2
+    assert events[0]["type"] == "moved" and events[0]["frame"] == 3 and events[0]["camera_id"] == "front"
+    assert stream.since(4) == (events[2:], 0)
+    assert stream.since(5) == ([], 0)
+
+
+def test_follow_replays_then_streams_without_duplicates():
+    async def scenario():
+        stream = SceneEventStream("front", capacity=2)
+        stream.update([{"color": "Red", "position": "left"}])
+        stream.update([{"color": "Red", "position": "right"}])
+        received = []
+        events = stream.follow(after=0, idle=0.05)
+        for _ in range(3):
+            received.append(await events.__anext__())
+        # Published from another thread while following
+        await asyncio.get_running_loop().run_in_executor(None, stream.clear)
+        for _ in range(3):
+            received.append(await events.__anext__())
+        await events.aclose()
+        return received, stream.subscriber_count
+
+    received, subscribers = asyncio.run(scenario())
+    assert received[0] == {"type": "gap", "camera_id": "front", "missed": 1, "sequence": 1}
+    assert [event["sequence"] for event in received[1:5]] == [2, 3, 4, 5]
+    assert [event["type"] for event in received[3:5]] == ["disappeared", "count_changed"]
+    # Nothing happened for a while: a keep-alive
+    assert received[5] is None
+    assert subscribers == 0
+
+
+def test_event_clients_get_scene_changes_without_video(client, tmp_path, write_clip):
+    source = write_clip(tmp_path / "porch.avi", (0, 0, 255), frames=10)
+    client.post("/api/cameras", params={"camera_id": "porch", "source": source})
+    client.post("/api/cameras/porch/start")
+    try:
+        with client.websocket_connect("/ws/events/porch?since=0") as websocket:
+            events = [websocket.receive_json() for _ in range(3)]
+        assert events[0]["type"] == "appeared" and events[0]["object"] == "Red"
+        assert [event["sequence"] for event in events] == [1, 2, 3]
+
+        pipeline = client.get("/api/cameras/porch/status").json()["pipeline"]
+        assert pipeline["frames_processed"] > 0
+        stages = client.get("/api/cameras/porch/stats").json()["stages"]
+        # Nobody watched the video, so no frame was encoded
+        assert "jpeg_encode" not in stages
+    finally:
+        client.post("/api/cameras/porch/stop")
+
+    history = client.get("/api/cameras/porch/events/history", params={"since": 2}).json()
+    assert history["missed"] == 0
+    assert history["events"][0]["sequence"] == 3
+    assert history["events"][-1]["type"] == "count_changed" and history["events"][-1]["count"] == 0
+    assert client.get("/api/cameras/porch/status").json()["events"]["sequence"] == history["sequence"]
+
+    with client.websocket_connect("/ws/events/porch?since=soon") as websocket:
+        assert websocket.receive_json()["type"] == "error"
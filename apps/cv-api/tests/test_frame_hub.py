@@ -0,0 +1,41 @@
+"""Frame hub unit tests."""
+
+import asyncio
+
+from frame_hub import FrameHub, FramePacket
+
+
+def make_packet(sequence):
+    return FramePacket(type="frame", sequence=sequence, timestamp=0.0, jpeg=b"jpeg")
+
+
+def test_hub_fans_out_to_every_subscriber():
+    async def scenario():
+        hub = FrameHub()
+        first, second = hub.subscribe(), hub.subscribe()
+        hub.publish(make_packet(1))
+        await asyncio.sleep(0)
+        return (await first.get()).sequence, (await second.get()).sequence
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_hub_drops_stale_frames_for_slow_consumers():
+    async def scenario():
+        hub = FrameHub(queue_size=2)
+        queue = hub.subscribe()
+        for sequence in range(1, 6):
+            hub.publish(make_packet(sequence))
+        await asyncio.sleep(0)
+        received = [queue.get_nowait().sequence for _ in range(queue.qsize())]
+        return received, hub.dropped_frames
+
+    received, dropped = asyncio.run(scenario())
+    assert received == [4, 5]
+    assert dropped == 3
+
+
+def test_packet_base64_is_encoded_once():
+    packet = make_packet(1)
+    assert packet.base64_data is packet.base64_data
+    assert packet.base64_data == "anBlZw=="
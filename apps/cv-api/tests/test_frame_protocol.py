@@ -0,0 +1,35 @@
+"""Frame protocol unit tests."""
+
+import base64
+import json
+
+import pytest
+
+from frame_protocol import decode_binary_frame, encode_binary_frame, encode_json_frame
+
+JPEG = b"\xff\xd8fake-jpeg\xff\xd9"
+STATS = {"Red": 1, "fps": 30}
+
+
+def test_binary_frame_round_trip():
+    message = encode_binary_frame(JPEG, STATS, "A red object.", 12.5, sequence=7)
+    header, jpeg = decode_binary_frame(message)
+
+    assert jpeg == JPEG
+    assert header == {"type": "frame", "stats": STATS, "narration": "A red object.",
+                      "timestamp": 12.5, "sequence": 7}
+
+
+def test_binary_frame_is_smaller_than_json():
+    jpeg = bytes(range(256)) * 400
+    binary = encode_binary_frame(jpeg, STATS, "", 0.0)
+    text = json.dumps(encode_json_frame(base64.b64encode(jpeg).decode("utf-8"), STATS, "", 0.0))
+
+    assert len(binary) < len(text.encode("utf-8")) * 0.8
+
+
+def test_decode_rejects_unknown_messages():
+    with pytest.raises(ValueError):
+        decode_binary_frame(b"XXXX\x00\x00\x00\x00")
+    with pytest.raises(ValueError):
+        decode_binary_frame(b"CV")
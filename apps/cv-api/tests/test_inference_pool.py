@@ -0,0 +1,80 @@
+"""Process inference pool tests."""
+
+import threading
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from cv_utils.segmentation import ColorSegmenter
+from cv_utils.tracker import COLOR_RANGES
+from cv_utils.frame_ring import FrameRing
+from inference_pool import ProcessInferencePool, segment_colors_task
+
+
+def colored_frame(width, height, offset=0):
+    frame = np.full((height, width, 3), 128, np.uint8)
+    cv.rectangle(frame, (20 + offset, 20), (120 + offset, 100), (0, 0, 220), -1)
+    cv.rectangle(frame, (200, 150 + offset), (300, 230 + offset), (220, 40, 0), -1)
+    return frame
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ProcessInferencePool(workers=2, frame_bytes=320 * 240 * 3)
+    yield pool
+    pool.stop()
+
+
+def test_results_match_in_process_segmentation(pool):
+    frame = colored_frame(320, 240)
+    expected = ColorSegmenter(COLOR_RANGES).segment(frame, {"Red", "Blue"}, 500)
+
+    assert pool.run(segment_colors_task, frame, {"Red", "Blue"}, 500) == expected
+    assert pool.stats()["workers"] == 2 and pool.is_running
+
+
+def test_concurrent_calls_and_larger_frames(pool):
+    # 640x480 frames do not fit the initial 320x240 blocks, which are grown on the fly
+    frames = [colored_frame(640, 480, offset) for offset in range(0, 80, 10)]
+    results = [None] * len(frames)
+
+    def run(i):
+        results[i] = pool.run(segment_colors_task, frames[i], {"Red"}, 500)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(frames))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    segmenter = ColorSegmenter(COLOR_RANGES)
+    assert results == [segmenter.segment(frame, {"Red"}, 500) for frame in frames]
+    assert len({blobs[0].x for blobs in results}) == len(frames)
+
+
+def test_task_errors_are_raised_in_the_caller(pool):
+    # Grayscale frames cannot be converted to HSV
+    with pytest.raises(RuntimeError, match="error"):
+        pool.run(segment_colors_task, np.zeros((240, 320), np.uint8), {"Red"}, 500)
+    # The worker is still usable
+    assert len(pool.run(segment_colors_task, colored_frame(320, 240), {"Blue"}, 500)) == 1
+
+
+def test_ring_frames_are_passed_by_reference():
+    pool = ProcessInferencePool(workers=1, frame_bytes=1)
+    ring = FrameRing((240, 320, 3), slots=2)
+    try:
+        slot = ring.acquire()
+        frame = ring.view(slot)
+        frame[:] = colored_frame(320, 240)
+        ring.publish(slot, 1)
+
+        assert pool.run(segment_colors_task, frame, {"Red", "Blue"}, 500) == \
+            ColorSegmenter(COLOR_RANGES).segment(frame, {"Red", "Blue"}, 500)
+        # Nothing was copied into the worker's own block
+        assert pool._workers[0].shm.size < frame.nbytes
+    finally:
+        pool.stop()
+        del frame
+        ring.close()
@@ -0,0 +1,70 @@
+"""JPEG encoder, preview and bitrate control tests."""
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from frame_hub import FramePacket
+from jpeg_encoder import BitrateController, available_encoders, create_encoder, resize_preview
+
+
+def noisy_frame(width=320, height=240):
+    return np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("name", [name for name, available in available_encoders().items() if available])
+def test_encoders_produce_decodable_jpegs(name):
+    encoder = create_encoder(name)
+    frame = noisy_frame()
+    high, low = encoder.encode(frame, 90), encoder.encode(frame, 30)
+
+    decoded = cv.imdecode(np.frombuffer(high, np.uint8), cv.IMREAD_COLOR)
+    assert decoded.shape == frame.shape
+    assert len(low) < len(high)
+
+
+def test_auto_falls_back_to_an_installed_encoder():
+    assert available_encoders()["opencv"] is True
+    assert create_encoder("auto").name in [name for name, available in available_encoders().items() if available]
+    with pytest.raises(ValueError):
+        create_encoder("gif")
+
+
+def test_preview_is_downscaled_keeping_aspect_ratio():
+    frame = noisy_frame(1920, 1080)
+    assert resize_preview(frame, 640).shape == (360, 640, 3)
+    assert resize_preview(frame, 0) is frame
+    assert resize_preview(frame, 4000) is frame
+
+
+def test_bitrate_controller_converges_towards_target():
+    now = [0.0]
+    controller = BitrateController(target_kbps=800, quality=80, clock=lambda: now[0])
+
+    def send(frames, size):
+        changed = False
+        for _ in range(frames):
+            now[0] += 0.125
+            changed = controller.record(size) or changed
+        return changed
+
+    # 8 frames/s of 40 kB = 2560 kbps: over twice the target, two steps down
+    assert send(8, 40_000) and controller.quality == 70
+    assert send(8, 15_000) and controller.quality == 65
+    # Within the target: quality holds
+    assert not send(8, 11_250) and controller.quality == 65
+    # Far below the target: quality comes back up, capped at max_quality
+    for _ in range(10):
+        send(8, 1_000)
+    assert controller.quality == 90
+    assert controller.stats()["adjustments"] == 7
+
+
+def test_packets_serve_the_closest_encoded_quality():
+    packet = FramePacket(type="frame", sequence=1, timestamp=0.0, jpeg=b"q80",
+                         jpegs={40: b"q40", 80: b"q80"})
+    assert packet.jpeg_for(None) == b"q80"
+    assert packet.jpeg_for(40) == b"q40"
+    assert packet.jpeg_for(50) == b"q40"
+    assert packet.base64_for(40) is packet.base64_for(40)
+    assert packet.base64_for(80) is packet.base64_data
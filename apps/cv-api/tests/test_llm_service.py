@@ -0,0 +1,275 @@
+"""Narration cache tests against a local stand-in for the Gemini API."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+from llm_service import LLMService
+from narration_cache import NarrationCache, scene_signature
+from narrator import NarrationScheduler, StreamNarrator
+from rate_limit import RateLimiter
+
+
+class FakeGemini:
+    """Local HTTP server answering generateContent requests with numbered narrations."""
+
+    def __init__(self, delay: float = 0.0, status: int = 200):
+        self.delay = delay
+        self.status = status
+        self.requests = []
+        # Client side port of each request's connection, to tell reused connections apart
+        self.client_ports = []
+
+    async def handle(self, request):
+        self.requests.append((request.path, request.query.get("key"), await request.json()))
+        self.client_ports.append(request.transport.get_extra_info("peername")[1])
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status, text="quota exceeded")
+        text = f"Narration {len(self.requests)}"
+        return web.json_response({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+    @asynccontextmanager
+    async def serve(self):
+        app = web.Application()
+        app.router.add_post("/{tail:.*}", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        port = runner.addresses[0][1]
+        try:
+            yield f"http://127.0.0.1:{port}/v1beta/models"
+        finally:
+            await runner.cleanup()
+
+
+RED_LEFT = {"color": "Red", "position": "left"}
+BLUE_CENTER = {"color": "Blue", "position": "center"}
+
+
+def test_unchanged_scenes_reuse_the_narration(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    gemini = FakeGemini()
+
+    async def scenario():
+        async with gemini.serve() as base_url:
+            service = LLMService(base_url=base_url)
+            first = await service.generate_narration([RED_LEFT, BLUE_CENTER])
+            # Same scene, detected in another order
+            again = await service.generate_narration([BLUE_CENTER, RED_LEFT])
+            moved = await service.generate_narration([{"color": "Red", "position": "right"}, BLUE_CENTER])
+            await service.close()
+            return service, first, again, moved
+
+    service, first, again, moved = asyncio.run(scenario())
+    assert first == again == "Narration 1"
+    assert moved == "Narration 2"
+    path, key, payload = gemini.requests[0]
+    assert path == "/v1beta/models/gemini-2.0-flash:generateContent" and key == "test-key"
+    assert payload["generationConfig"]["maxOutputTokens"] == 51
+    stats = service.stats()
+    assert stats["llm_calls"] == 2
+    assert stats["cache"]["hits"] == 1 and stats["cache"]["hit_rate"] == 0.333
+
+
+def test_concurrent_requests_share_one_call_and_errors_are_not_cached(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    gemini = FakeGemini(delay=0.1)
+
+    async def scenario():
+        async with gemini.serve() as base_url:
+            service = LLMService(base_url=base_url)
+            shared = await asyncio.gather(*[service.generate_narration([RED_LEFT]) for _ in range(5)])
+            gemini.status = 500
+            failed = await service.generate_narration([BLUE_CENTER])
+            gemini.status = 200
+            retried = await service.generate_narration([BLUE_CENTER])
+            await service.close()
+            return service, shared, failed, retried
+
+    service, shared, failed, retried = asyncio.run(scenario())
+    assert shared == ["Narration 1"] * 5
+    assert service.stats()["shared_calls"] == 4
+    assert failed == "I'm having trouble seeing right now."
+    assert retried == "Narration 3"
+    assert service.stats()["llm_errors"] == 1
+
+
+def test_cache_expiry_and_eviction():
+    now = [0.0]
+    cache = NarrationCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+
+    # "b" is now the least recently used
+    cache.put("c", "C")
+    assert cache.get("b") is None and cache.get("c") == "C"
+
+    now[0] = 10.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expirations"], stats["entries"]) == (1, 1, 1)
+
+
+def test_scene_signature():
+    people = [{"object": "person", "position": "left", "track_id": 1},
+              {"object": "person", "position": "right", "track_id": 2}]
+    swapped = [{"object": "person", "position": "right", "track_id": 7},
+               {"object": "person", "position": "left", "track_id": 9}]
+    assert scene_signature(people) == scene_signature(swapped)
+    assert scene_signature(people) != scene_signature(people[:1])
+
+    # Without positions only the object counts matter
+    walked = [{"object": "person", "position": "center"}] * 2
+    assert scene_signature(people, include_positions=False) == scene_signature(walked, include_positions=False)
+    assert scene_signature(people) != scene_signature(walked)
+
+
+def test_requests_reuse_one_pooled_connection(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    gemini = FakeGemini()
+
+    async def scenario():
+        async with gemini.serve() as base_url:
+            service = LLMService(base_url=base_url)
+            for objects in ([RED_LEFT], [BLUE_CENTER], [RED_LEFT, BLUE_CENTER]):
+                await service.generate_narration(objects)
+            await service.close()
+
+    asyncio.run(scenario())
+    assert len(gemini.client_ports) == 3
+    assert len(set(gemini.client_ports)) == 1
+
+
+def test_slow_requests_time_out(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    gemini = FakeGemini(delay=2.0)
+
+    async def scenario():
+        async with gemini.serve() as base_url:
+            service = LLMService(base_url=base_url, timeout=0.2)
+            start = time.monotonic()
+            narration = await service.generate_narration([RED_LEFT])
+            await service.close()
+            return narration, time.monotonic() - start
+
+    narration, seconds = asyncio.run(scenario())
+    assert narration == "I'm having trouble seeing right now."
+    assert seconds < 1.5
+
+
+def test_stream_narrator_does_not_block_and_coalesces(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    gemini = FakeGemini(delay=0.2)
+    durations = []
+
+    async def scenario():
+        async with gemini.serve() as base_url:
+            service = LLMService(base_url=base_url)
+            narrator = StreamNarrator(service, durations.append)
+
+            start = time.monotonic()
+            narrator.request([RED_LEFT])
+            # Requests while the first narration runs: only the newest is narrated next
+            for objects in ([BLUE_CENTER], [RED_LEFT, BLUE_CENTER], [{"color": "Green", "position": "top"}]):
+                narrator.request(objects)
+            returned_after = time.monotonic() - start
+            first_latest = narrator.latest
+
+            while narrator.in_flight:
+                await asyncio.sleep(0.05)
+            await narrator.close()
+            await service.close()
+            return narrator, returned_after, first_latest
+
+    narrator, returned_after, first_latest = asyncio.run(scenario())
+    assert returned_after < 0.05 and first_latest == ""
+    assert narrator.latest == "Narration 2"
+    assert len(gemini.requests) == 2
+    assert "Green" in gemini.requests[1][2]["contents"][0]["parts"][0]["text"]
+    assert narrator.stats()["coalesced"] == 2
+    assert len(durations) == 2 and min(durations) >= 0.2
+
+
+def test_scheduler_narrates_each_camera_once_for_all_viewers(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    gemini = FakeGemini(delay=0.05)
+    scenes = {"front": [RED_LEFT], "back": [BLUE_CENTER]}
+
+    def requested_colors():
+        return [payload["contents"][0]["parts"][0]["text"].split()[8] for _, _, payload in gemini.requests]
+
+    async def scenario():
+        async with gemini.serve() as base_url:
+            service = LLMService(base_url=base_url, cache_ttl=0, rate_per_minute=0)
+            scheduler = NarrationScheduler(service, interval=0.1)
+            for camera_id in scenes:
+                for _ in range(10):
+                    scheduler.subscribe(camera_id, lambda camera_id=camera_id: scenes[camera_id])
+            scheduler.subscribe("stopped", lambda: None)
+            await asyncio.sleep(0.35)
+            latest = {camera_id: scheduler.latest(camera_id) for camera_id in scenes}
+            stats = scheduler.stats()
+            watched = requested_colors()
+
+            # The last viewer of a camera leaving stops its narration
+            for _ in range(10):
+                await scheduler.unsubscribe("front")
+            await asyncio.sleep(0.25)
+            unwatched = requested_colors()[len(watched):]
+            await scheduler.close()
+            await service.close()
+            return latest, stats, watched, unwatched
+
+    latest, stats, watched, unwatched = asyncio.run(scenario())
+    assert all(latest.values())
+    # About one request per interval and camera, whatever the number of viewers
+    assert 2 <= watched.count("Red") <= 3 and 2 <= watched.count("Blue") <= 3
+    assert stats["front"]["subscribers"] == 10 and stats["stopped"]["requests"] == 0
+    assert unwatched and set(unwatched) == {"Blue"}
+
+
+def test_provider_concurrency_and_rate_limits(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    gemini = FakeGemini(delay=0.1)
+    active = []
+    peak = [0]
+    handle = gemini.handle
+
+    async def tracked(request):
+        active.append(request)
+        peak[0] = max(peak[0], len(active))
+        try:
+            return await handle(request)
+        finally:
+            active.remove(request)
+
+    gemini.handle = tracked
+
+    async def scenario():
+        async with gemini.serve() as base_url:
+            service = LLMService(base_url=base_url, max_concurrent=2, rate_per_minute=600)
+            start = time.monotonic()
+            scenes = [[{"color": color, "position": "left"}] for color in ("Red", "Blue", "Yellow", "Green", "Cyan")]
+            await asyncio.gather(*[service.generate_narration(scene) for scene in scenes])
+            seconds = time.monotonic() - start
+            await service.close()
+            return service.stats(), seconds
+
+    stats, seconds = asyncio.run(scenario())
+    assert peak[0] == 2
+    # After a burst of 2, at most one request starts per 0.1 s
+    assert stats["rate_limit"]["throttled"] >= 1
+    assert seconds >= 0.35
+
+
+def test_rate_limiter_spreads_reservations():
+    now = [0.0]
+    limiter = RateLimiter(rate_per_minute=60, burst=2, clock=lambda: now[0])
+    assert [limiter.reserve() for _ in range(4)] == [0.0, 0.0, 1.0, 2.0]
+    now[0] = 10.0
+    assert limiter.reserve() == 0.0
+    assert RateLimiter(0).reserve() == 0.0
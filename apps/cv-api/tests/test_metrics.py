@@ -0,0 +1,86 @@
+"""Stage latency histogram tests."""
+
+import sys
+import threading
+
+from metrics import Histogram, StageMetrics, format_labels, render_metric
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    assert histogram.quantile(0.5) is None
+
+    for seconds in [0.005] * 50 + [0.05] * 40 + [0.5] * 9 + [5.0]:
+        histogram.observe(seconds)
+
+    assert histogram.cumulative_counts() == [50, 90, 99, 100]
+    assert histogram.count == 100 and abs(histogram.sum - 11.75) < 1e-9
+    # Interpolated inside the bucket holding the rank
+    assert histogram.quantile(0.5) == 0.01
+    assert abs(histogram.quantile(0.7) - 0.055) < 1e-9
+    # Beyond the last finite bound
+    assert histogram.quantile(1.0) == 1.0
+    assert histogram.summary()["p50_ms"] == 10.0
+
+
+def test_concurrent_observations():
+    histogram = Histogram()
+
+    def observe():
+        for _ in range(1000):
+            histogram.observe(0.002)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert histogram.count == 4000 and histogram.cumulative_counts()[-1] == 4000
+
+
+def test_prometheus_rendering():
+    metrics = StageMetrics(buckets=(0.01, 0.1))
+    metrics.observe_all("front", {"forward": 0.05, "nms": 0.001})
+    metrics.observe("back", "forward", 0.2)
+
+    text = metrics.render()
+    assert "# TYPE cv_stage_duration_seconds histogram" in text
+    assert 'cv_stage_duration_seconds_bucket{camera="front",stage="forward",le="0.01"} 0' in text
+    assert 'cv_stage_duration_seconds_bucket{camera="front",stage="forward",le="0.1"} 1' in text
+    assert 'cv_stage_duration_seconds_bucket{camera="back",stage="forward",le="+Inf"} 1' in text
+    assert 'cv_stage_duration_seconds_count{camera="front",stage="nms"} 1' in text
+    assert list(metrics.summary("front")) == ["forward", "nms"]
+
+    metrics.remove("back")
+    assert 'camera="back"' not in metrics.render()
+    assert metrics.summary("back") == {}
+
+
+def test_summary_while_cameras_are_removed():
+    metrics = StageMetrics()
+    stop = threading.Event()
+
+    def churn():
+        while not stop.is_set():
+            metrics.observe_all("front", {"forward": 0.05, "nms": 0.001})
+            metrics.remove("front")
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    thread = threading.Thread(target=churn)
+    thread.start()
+    try:
+        for _ in range(20000):
+            assert set(metrics.summary("front")) <= {"forward", "nms"}
+    finally:
+        stop.set()
+        thread.join()
+        sys.setswitchinterval(interval)
+
+
+def test_label_escaping():
+    assert format_labels({}) == ""
+    assert format_labels({"camera": 'a"b\\c\nd'}) == '{camera="a\\"b\\\\c\\nd"}'
+    assert render_metric("cv_up", "gauge", "Up.", [({"camera": "x"}, 1)]) == \
+        '# HELP cv_up Up.\n# TYPE cv_up gauge\ncv_up{camera="x"} 1\n'
@@ -0,0 +1,70 @@
+"""Frame pacer unit tests."""
+
+import threading
+import time
+
+import pytest
+
+from pacing import FramePacer
+
+
+def test_processing_time_counts_towards_the_interval():
+    pacer = FramePacer(lambda: 50)
+    stop = threading.Event()
+
+    start = time.monotonic()
+    for _ in range(10):
+        assert pacer.wait(stop)
+        time.sleep(0.01)  # Simulated work, half the 20 ms interval
+    elapsed = time.monotonic() - start
+
+    # 10 frames at 50 FPS: deadlines at 0..180 ms plus the last frame's work,
+    # not 10 * (20 + 10) ms as with a fixed sleep after each frame
+    assert elapsed == pytest.approx(0.19, abs=0.03)
+
+
+def test_missed_deadlines_are_skipped_not_bursted():
+    pacer = FramePacer(lambda: 100)
+    stop = threading.Event()
+    pacer.wait(stop)
+    time.sleep(0.055)
+
+    start = time.monotonic()
+    pacer.wait(stop)
+    pacer.wait(stop)
+
+    assert pacer.skipped_frames >= 4
+    # After resyncing, the following frame still waits a full interval
+    assert time.monotonic() - start >= 0.009
+
+
+def test_rate_follows_the_slowest_stage():
+    pacer = FramePacer(lambda: 30, headroom=1.0)
+    pacer.update(bottleneck_seconds=0.1, drop_count=0)
+
+    assert pacer.target_fps == pytest.approx(10)
+
+    pacer.update(bottleneck_seconds=0.01, drop_count=0)
+    assert pacer.target_fps == pytest.approx(30)
+
+
+def test_backpressure_backs_off_and_recovers():
+    pacer = FramePacer(lambda: 30, backoff=0.5, recovery_fps=5)
+
+    pacer.update(0.0, drop_count=3)
+    pacer.update(0.0, drop_count=4)
+    assert pacer.target_fps == pytest.approx(7.5)
+    assert pacer.backpressure_events == 2
+
+    for _ in range(3):
+        pacer.update(0.0, drop_count=4)
+    assert pacer.target_fps == pytest.approx(22.5)
+
+
+def test_wait_returns_false_when_stopped():
+    pacer = FramePacer(lambda: 1)
+    stop = threading.Event()
+    pacer.wait(stop)
+    stop.set()
+
+    assert not pacer.wait(stop)
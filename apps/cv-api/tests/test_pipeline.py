@@ -0,0 +1,336 @@
+"""Staged frame pipeline unit tests."""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from frame_hub import FrameHub
+from pacing import FramePacer
+from jpeg_encoder import JpegEncoder, create_encoder
+from pipeline import DetectionPool, FramePipeline, StageStats
+
+
+class FakeCapture:
+    """Capture returning numbered frames and counting reads."""
+
+    def __init__(self):
+        self.reads = 0
+
+    def read(self):
+        self.reads += 1
+        return True, np.full((48, 64, 3), self.reads % 255, dtype=np.uint8)
+
+
+class InPlaceCapture(FakeCapture):
+    """Capture that decodes into a given array, like cv.VideoCapture.read(image)."""
+
+    def read(self, image=None):
+        ret, frame = super().read()
+        if image is None:
+            return ret, frame
+        image[...] = frame
+        return ret, image
+
+
+def run_pipeline(pipeline: FramePipeline, hub: FrameHub, viewers: int, seconds: float):
+    """Run the pipeline with subscribed viewers; return the sequences each viewer received."""
+    async def scenario():
+        queues = [hub.subscribe() for _ in range(viewers)]
+        pipeline.start()
+        await asyncio.sleep(seconds)
+        pipeline.stop()
+        await asyncio.sleep(0)
+        return [[queue.get_nowait().sequence for _ in range(queue.qsize())] for queue in queues]
+
+    return asyncio.run(scenario())
+
+
+def test_each_frame_is_processed_once_for_all_viewers():
+    processed = []
+    rendered = []
+
+    def process_frame(frame):
+        processed.append(frame)
+        return {}, [], rendered.append
+
+    hub = FrameHub(queue_size=100)
+    pipeline = FramePipeline(FakeCapture(), process_frame, hub, FramePacer(lambda: 200), detect_workers=1)
+    sequences = run_pipeline(pipeline, hub, viewers=3, seconds=0.2)
+
+    assert sequences[0] == sequences[1] == sequences[2]
+    assert len(sequences[0]) == len(rendered) == pipeline.frames_processed > 0
+    assert sequences[0] == sorted(sequences[0])
+    assert len(processed) >= len(rendered)
+
+
+def test_frames_are_captured_into_the_ring():
+    hub = FrameHub(queue_size=100)
+    pipeline = FramePipeline(InPlaceCapture(), lambda frame: ({}, [], None), hub, FramePacer(lambda: 200))
+    rings = []
+
+    def stop_after_stats():
+        rings.append(pipeline.ring.stats())
+        FramePipeline.stop(pipeline)
+
+    pipeline.stop = stop_after_stats
+    sequences = run_pipeline(pipeline, hub, viewers=1, seconds=0.2)
+
+    # The first frame reveals the frame size; every later one is read into a slot,
+    # and slots are given back: far more frames than slots never ran out of them
+    stats = rings[0]
+    assert stats["writes"] >= len(sequences[0]) - 1
+    assert stats["writes"] > 2 * stats["slots"]
+    assert stats["overruns"] == 0
+    assert stats["slot_bytes"] == 48 * 64 * 3
+    assert pipeline.ring is None
+
+
+def test_stages_overlap_across_frames():
+    # Detection and encoding each take 40 ms: run back to back that caps at 12.5 FPS
+    def process_frame(frame):
+        time.sleep(0.04)
+        return {}, [], lambda annotated: time.sleep(0.04)
+
+    hub = FrameHub(queue_size=100)
+    pipeline = FramePipeline(FakeCapture(), process_frame, hub, FramePacer(lambda: 100), detect_workers=2)
+    sequences = run_pipeline(pipeline, hub, viewers=1, seconds=1.0)
+
+    assert len(sequences[0]) >= 18
+    assert sequences[0] == sorted(set(sequences[0]))
+    stats = pipeline.stats()
+    assert stats["stages"]["detect"]["avg_ms"] >= 40
+    assert stats["stages"]["end_to_end"]["count"] == pipeline.frames_processed
+
+
+def test_pipeline_idles_without_subscribers():
+    hub = FrameHub()
+    capture = FakeCapture()
+    pipeline = FramePipeline(capture, lambda frame: ({}, [], None), hub, FramePacer(lambda: 1000))
+    pipeline.start()
+    time.sleep(0.15)
+    pipeline.stop()
+
+    assert capture.reads == 0
+
+
+def test_stage_stats_track_latency():
+    stats = StageStats(smoothing=0.5)
+    for seconds in (0.01, 0.03, 0.02):
+        stats.record(seconds)
+
+    assert stats.snapshot() == {"count": 3, "last_ms": 20.0, "avg_ms": 20.0, "max_ms": 30.0}
+
+
+def test_shared_pool_is_fair_between_pipelines():
+    # One worker shared by a fast and a slow camera: the fast one must not starve the other
+    pool = DetectionPool(workers=1)
+    processed = {"fast": 0, "slow": 0}
+
+    def process_for(name):
+        def process_frame(frame):
+            processed[name] += 1
+            time.sleep(0.01)
+            return {}, [], None
+        return process_frame
+
+    async def scenario():
+        hubs = [FrameHub(), FrameHub()]
+        queues = [hub.subscribe() for hub in hubs]
+        pipelines = [FramePipeline(FakeCapture(), process_for("fast"), hubs[0], FramePacer(lambda: 500), pool=pool),
+                     FramePipeline(FakeCapture(), process_for("slow"), hubs[1], FramePacer(lambda: 40), pool=pool)]
+        for pipeline in pipelines:
+            pipeline.start()
+        await asyncio.sleep(1.0)
+        for pipeline in pipelines:
+            pipeline.stop()
+        pool.stop()
+        return pipelines, queues
+
+    pipelines, _ = asyncio.run(scenario())
+
+    # The slow camera gets (nearly) every frame it captures detected
+    assert pipelines[1].dropped_frames["detect_queue"] <= 2
+    assert processed["slow"] >= 0.8 * pipelines[1].stage_stats["capture"].count
+    assert processed["fast"] > processed["slow"]
+    assert pipelines[0].stats()["detect_workers"] == 1
+
+
+def test_pacing_accounts_for_ordered_detection():
+    ordered = [False]
+    pipeline = FramePipeline(FakeCapture(), lambda frame: ({}, [], None), FrameHub(), FramePacer(lambda: 100),
+                             pool=DetectionPool(workers=4), ordered=lambda: ordered[0])
+    pipeline.stage_stats["detect"].record(0.04)
+
+    # Four workers share the detection of independent frames; ordered frames go one at a time
+    assert pipeline._bottleneck_seconds() == 0.01
+    ordered[0] = True
+    assert pipeline._bottleneck_seconds() == 0.04
+
+
+def test_stopping_a_pipeline_keeps_the_shared_workers_alive():
+    # A worker is still detecting a frame of the pipeline when it stops
+    pool = DetectionPool(workers=1)
+    detecting = threading.Event()
+
+    def slow_process_frame(frame):
+        detecting.set()
+        time.sleep(0.2)
+        return {}, [], None
+
+    async def scenario():
+        hubs = [FrameHub(), FrameHub()]
+        queues = [hub.subscribe() for hub in hubs]
+        stopping = FramePipeline(InPlaceCapture(), slow_process_frame, hubs[0], FramePacer(lambda: 100), pool=pool)
+        stopping.start()
+        while not detecting.is_set():
+            await asyncio.sleep(0.01)
+        stopping.stop()
+        assert pool.in_flight(stopping) == 0
+
+        other = FramePipeline(FakeCapture(), lambda frame: ({}, [], None), hubs[1], FramePacer(lambda: 100), pool=pool)
+        other.start()
+        await asyncio.sleep(0.3)
+        other.stop()
+        pool.stop()
+        return other, queues
+
+    other, queues = asyncio.run(scenario())
+
+    assert other.frames_processed > 0
+    assert queues[1].qsize() > 0
+
+
+def test_worker_errors_do_not_stop_the_pool():
+    pool = DetectionPool(workers=1)
+    hub = FrameHub(queue_size=100)
+    pipeline = FramePipeline(FakeCapture(), lambda frame: ({}, [], None), hub, FramePacer(lambda: 100), pool=pool)
+    detect = pipeline._detect
+    failures = []
+
+    def failing_detect(staged):
+        if not failures:
+            failures.append(staged.sequence)
+            raise RuntimeError("detection stage failed")
+        detect(staged)
+
+    pipeline._detect = failing_detect
+    sequences = run_pipeline(pipeline, hub, viewers=1, seconds=0.3)
+    pool.stop()
+
+    assert failures and len(sequences[0]) > 0
+
+
+def test_ordered_pipelines_process_one_frame_at_a_time_in_capture_order():
+    # Stateful detection (motion gating, tracking) must see frames in order even with several workers
+    active = [0]
+    overlaps = []
+    frames = []
+
+    def process_frame(frame):
+        active[0] += 1
+        overlaps.append(active[0])
+        frames.append(int(frame[0, 0, 0]))
+        time.sleep(0.01)
+        active[0] -= 1
+        return {}, [], None
+
+    pool = DetectionPool(workers=3)
+    hub = FrameHub(queue_size=100)
+    pipeline = FramePipeline(FakeCapture(), process_frame, hub, FramePacer(lambda: 500), pool=pool,
+                             ordered=lambda: True)
+    run_pipeline(pipeline, hub, viewers=1, seconds=0.5)
+    pool.stop()
+
+    assert len(frames) > 10
+    assert max(overlaps) == 1
+    assert frames == sorted(frames)
+    assert pool.in_flight(pipeline) == 0
+
+
+class JumpingCapture:
+    """Capture of a red square jumping from the left to the center to the right side, and over again."""
+
+    POSITIONS = {49: "left", 289: "center", 529: "right"}
+
+    def __init__(self):
+        self.reads = 0
+
+    def read(self):
+        self.reads += 1
+        frame = np.full((480, 640, 3), 128, np.uint8)
+        x = self.left_x(self.reads)
+        frame[200:250, x:x + 50] = (0, 0, 255)
+        return True, frame
+
+    @classmethod
+    def left_x(cls, sequence: int) -> int:
+        return list(cls.POSITIONS)[sequence % 3]
+
+
+def test_motion_gated_detection_follows_a_moving_object_with_two_workers(monkeypatch):
+    import api_server
+
+    # Slow segmentation down so that, run concurrently, the next frame would be gated before this one is done
+    segment_colors = api_server.segment_colors
+
+    def slow_segment_colors(*args, **kwargs):
+        time.sleep(0.005)
+        return segment_colors(*args, **kwargs)
+
+    monkeypatch.setattr(api_server, "segment_colors", slow_segment_colors)
+    camera = api_server.TrackerState("jumping")
+    camera.motion_gating = True
+    pool = DetectionPool(workers=2)
+    hub = FrameHub(queue_size=200)
+    pipeline = FramePipeline(JumpingCapture(), lambda frame: api_server.process_frame(camera, frame), hub,
+                             FramePacer(lambda: 200), pool=pool,
+                             ordered=lambda: api_server.detection_is_stateful(camera))
+
+    async def scenario():
+        frames = hub.subscribe()
+        pipeline.start()
+        await asyncio.sleep(0.5)
+        pipeline.stop()
+        pool.stop()
+        await asyncio.sleep(0)
+        return [frames.get_nowait() for _ in range(frames.qsize())]
+
+    packets = asyncio.run(scenario())
+
+    # Every published frame reports the square where that frame has it, never where an earlier one had it
+    assert len(packets) > 10
+    for packet in packets:
+        expected = JumpingCapture.POSITIONS[JumpingCapture.left_x(packet.sequence)]
+        assert [obj["position"] for obj in packet.detected_objects] == [expected]
+
+
+def test_frames_are_encoded_once_per_requested_quality_at_preview_width():
+    encoded = []
+    encoder = create_encoder("opencv")
+    recording = JpegEncoder("recording", lambda frame, quality: encoded.append((frame.shape, quality))
+                            or encoder.encode(frame, quality))
+
+    async def scenario():
+        hub = FrameHub(queue_size=100)
+        default, low, also_low = hub.subscribe(), hub.subscribe(), hub.subscribe()
+        hub.set_quality(low, 40)
+        hub.set_quality(also_low, 40)
+        pipeline = FramePipeline(FakeCapture(), lambda frame: ({}, [], None), hub, FramePacer(lambda: 200),
+                                 encoder=recording, preview_width=32)
+        pipeline.start()
+        await asyncio.sleep(0.2)
+        pipeline.stop()
+        await asyncio.sleep(0)
+        return default.get_nowait(), pipeline.stats()["encoder"], pipeline.frames_processed
+
+    packet, stats, frames = asyncio.run(scenario())
+    assert set(packet.jpegs) == {40, 80}
+    assert packet.jpeg is packet.jpegs[80]
+    assert len(packet.jpeg_for(40)) < len(packet.jpeg_for(80))
+    # Two qualities per frame for three viewers, encoded at the preview size
+    assert {quality for _, quality in encoded} == {40, 80}
+    assert len(encoded) == 2 * frames
+    assert all(shape == (24, 32, 3) for shape, _ in encoded)
+    assert stats == {"name": "recording", "quality": 80, "preview_width": 32, "qualities": [40, 80]}
@@ -0,0 +1,400 @@
+"""
+Headless batch processing of video files and image directories.
+
+Runs color, MobileNet SSD or YOLOv8 detection over every frame without a
+display, spread over worker processes, and writes the detections to JSONL
+(one line per frame) or a columnar file (one row per detection: .parquet,
+needs pyarrow, or .npz). Optionally writes annotated copies of the inputs.
+
+    python batch.py archive/*.mp4 snapshots/ --mode object --workers 4 \\
+        --output detections.jsonl --annotate annotated/
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+
+MODES = ("color", "object", "object_yolo")
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+STAGES = ("decode", "detect", "annotate", "write")
+
+
+@dataclass(frozen=True)
+class BatchOptions:
+    mode: str = "color"
+    min_area: int = 500
+    color_scale: float = 1.0
+
+
+@dataclass
+class Chunk:
+    """A run of consecutive frames of one input, processed by one worker."""
+    source: str
+    start: int
+    count: int  # -1: until the end of the video
+    images: list[str] = field(default_factory=list)  # Image paths, for image inputs
+
+
+@dataclass
+class ChunkResult:
+    """Detections of a chunk as columns, one entry per detection."""
+    source: str
+    frames: np.ndarray  # Index of every processed frame
+    timestamps_ms: np.ndarray  # Per processed frame; NaN for images
+    frame: np.ndarray
+    label: list[str]
+    confidence: np.ndarray  # NaN for color blobs
+    bbox: np.ndarray  # (N, 4) [x1, y1, x2, y2]
+    decode_seconds: float = 0.0
+    detect_seconds: float = 0.0
+
+
+# Per worker process: detection engines are created on first use and reused for every chunk,
+# one color segmenter per processing scale
+_segmenters = {}
+
+
+def _detector(mode: str):
+    if mode == "object":
+        from od_models import mobilenet_ssd_detector
+        return mobilenet_ssd_detector
+    from od_models import object_detection_tracker
+    return object_detection_tracker
+
+
+def detect_frame(frame: np.ndarray, options: BatchOptions) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """
+    Run the selected detection on a frame.
+
+    Returns:
+        tuple: (labels, confidences, (N, 4) [x1, y1, x2, y2] boxes)
+    """
+    if options.mode == "color":
+        segmenter = _segmenters.get(options.color_scale)
+        if segmenter is None:
+            from cv_utils.segmentation import ColorSegmenter
+            from cv_utils.tracker import COLOR_RANGES
+            segmenter = _segmenters[options.color_scale] = ColorSegmenter(COLOR_RANGES, scale=options.color_scale)
+        blobs = segmenter.segment(frame, min_area=options.min_area)
+        boxes = np.array([[b.x, b.y, b.x + b.w, b.y + b.h] for b in blobs], dtype=np.int32).reshape(-1, 4)
+        return [blob.color for blob in blobs], np.full(len(blobs), np.nan, np.float32), boxes
+
+    detector = _detector(options.mode)
+    detections = detector.detect_batch([frame], as_array=True)[0]
+    names = detector.class_names()
+    labels = [names[class_id] for class_id in detections['class_id'].tolist()]
+    return labels, detections['confidence'].astype(np.float32), detections['bbox'].astype(np.int32)
+
+
+def _frames(chunk: Chunk):
+    """Yield (frame index, timestamp in ms, frame) for a chunk, decoding lazily."""
+    if chunk.images:
+        for offset, path in enumerate(chunk.images):
+            yield chunk.start + offset, np.nan, cv.imread(path)
+        return
+
+    capture = cv.VideoCapture(chunk.source)
+    try:
+        fps = capture.get(cv.CAP_PROP_FPS) or 0
+        if chunk.start:
+            capture.set(cv.CAP_PROP_POS_FRAMES, chunk.start)
+        index = chunk.start
+        while chunk.count < 0 or index < chunk.start + chunk.count:
+            ret, frame = capture.read()
+            if not ret:
+                return
+            yield index, index * 1000 / fps if fps else np.nan, frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def process_chunk(chunk: Chunk, options: BatchOptions) -> ChunkResult:
+    """Decode and detect one chunk. Runs in a worker process."""
+    frames, timestamps, frame_column, labels, confidences, boxes = [], [], [], [], [], []
+    decode_seconds = detect_seconds = 0.0
+
+    frame_iter = _frames(chunk)
+    while True:
+        start = time.perf_counter()
+        item = next(frame_iter, None)
+        decode_seconds += time.perf_counter() - start
+        if item is None:
+            break
+        index, timestamp_ms, frame = item
+        if frame is None:
+            print(f"Could not read {chunk.images[index - chunk.start]}", file=sys.stderr)
+            continue
+
+        start = time.perf_counter()
+        frame_labels, frame_confidences, frame_boxes = detect_frame(frame, options)
+        detect_seconds += time.perf_counter() - start
+
+        frames.append(index)
+        timestamps.append(timestamp_ms)
+        frame_column.extend([index] * len(frame_labels))
+        labels.extend(frame_labels)
+        confidences.append(frame_confidences)
+        boxes.append(frame_boxes)
+
+    return ChunkResult(
+        source=chunk.source,
+        frames=np.array(frames, dtype=np.int64),
+        timestamps_ms=np.array(timestamps, dtype=np.float64),
+        frame=np.array(frame_column, dtype=np.int64),
+        label=labels,
+        confidence=np.concatenate(confidences) if confidences else np.empty(0, np.float32),
+        bbox=np.concatenate(boxes) if boxes else np.empty((0, 4), np.int32),
+        decode_seconds=decode_seconds,
+        detect_seconds=detect_seconds,
+    )
+
+
+def _init_worker():
+    # Parallelism comes from the processes; OpenCV's own threads would oversubscribe the cores
+    cv.setNumThreads(1)
+
+
+def plan_chunks(inputs: list[str], chunk_size: int) -> list[Chunk]:
+    """Split video files, image files and image directories into chunks of up to chunk_size frames."""
+    chunks = []
+    for path in inputs:
+        if os.path.isdir(path):
+            images = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)
+            chunks += [Chunk(path, start, len(images[start:start + chunk_size]), images[start:start + chunk_size])
+                       for start in range(0, len(images), chunk_size)]
+        elif os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS:
+            chunks.append(Chunk(path, 0, 1, [path]))
+        else:
+            capture = cv.VideoCapture(path)
+            if not capture.isOpened():
+                raise ValueError(f"Could not open video: {path}")
+            frame_count = int(capture.get(cv.CAP_PROP_FRAME_COUNT))
+            capture.release()
+            if frame_count <= 0:
+                # Unknown length (e.g. some streams): one worker reads it to the end
+                chunks.append(Chunk(path, 0, -1))
+            else:
+                chunks += [Chunk(path, start, min(chunk_size, frame_count - start))
+                           for start in range(0, frame_count, chunk_size)]
+    return chunks
+
+
+class JsonlWriter:
+    """One JSON object per processed frame, with its detections."""
+
+    def __init__(self, path: str):
+        self.file = open(path, "w")
+
+    def write(self, result: ChunkResult):
+        rows = np.searchsorted(result.frame, result.frames, side="left")
+        ends = np.searchsorted(result.frame, result.frames, side="right")
+        for index, timestamp_ms, start, end in zip(result.frames.tolist(), result.timestamps_ms.tolist(),
+                                                   rows.tolist(), ends.tolist()):
+            detections = [{
+                "label": result.label[row],
+                "confidence": None if np.isnan(result.confidence[row]) else round(float(result.confidence[row]), 4),
+                "bbox": result.bbox[row].tolist(),
+            } for row in range(start, end)]
+            self.file.write(json.dumps({
+                "source": result.source,
+                "frame": index,
+                "timestamp_ms": None if np.isnan(timestamp_ms) else round(timestamp_ms, 3),
+                "detections": detections,
+            }) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ColumnarWriter:
+    """
+    One row per detection in columns (source, frame, label, confidence, x1, y1, x2, y2),
+    written as Parquet (requires pyarrow) or as a NumPy .npz archive.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.columns = {name: [] for name in ("source", "frame", "label", "confidence", "bbox")}
+        if path.endswith(".parquet"):
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("Writing Parquet requires pyarrow: pip install pyarrow (or write .npz)")
+
+    def write(self, result: ChunkResult):
+        self.columns["source"] += [result.source] * len(result.label)
+        self.columns["frame"].append(result.frame)
+        self.columns["label"] += result.label
+        self.columns["confidence"].append(result.confidence)
+        self.columns["bbox"].append(result.bbox)
+
+    def close(self):
+        bbox = np.concatenate(self.columns["bbox"]) if self.columns["bbox"] else np.empty((0, 4), np.int32)
+        table = {
+            "source": np.array(self.columns["source"], dtype=str),
+            "frame": np.concatenate(self.columns["frame"]) if self.columns["frame"] else np.empty(0, np.int64),
+            "label": np.array(self.columns["label"], dtype=str),
+            "confidence": (np.concatenate(self.columns["confidence"]) if self.columns["confidence"]
+                           else np.empty(0, np.float32)),
+            **{name: bbox[:, i] for i, name in enumerate(("x1", "y1", "x2", "y2"))},
+        }
+        if self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table(table), self.path)
+        else:
+            np.savez(self.path, **table)
+
+
+def open_writer(path: str):
+    return JsonlWriter(path) if path.endswith((".jsonl", ".json")) else ColumnarWriter(path)
+
+
+def annotate(source: str, results: list[ChunkResult], options: BatchOptions, output_dir: str):
+    """Draw a source's detections onto a copy of it in output_dir (re-decoding it sequentially)."""
+    from cv_utils.segmentation import ColorBlob, draw_color_blobs
+    from cv_utils.tracker import BOX_COLORS
+    from od_models.rendering import DetectionRenderer
+
+    by_frame = {}
+    for result in results:
+        for row, index in enumerate(result.frame.tolist()):
+            by_frame.setdefault(index, []).append((result.label[row], result.confidence[row], result.bbox[row]))
+
+    # Only labels are stored, so each label gets its own id and a distinct hue
+    label_ids = {label: i for i, label in enumerate(sorted({label for result in results for label in result.label}))}
+    renderer = DetectionRenderer(color_for_class=lambda class_id: tuple(
+        int(c) for c in cv.cvtColor(np.uint8([[[class_id * 37 % 180, 255, 230]]]), cv.COLOR_HSV2BGR)[0, 0]))
+
+    def draw(frame, index):
+        rows = by_frame.get(index, [])
+        if options.mode == "color":
+            blobs = [ColorBlob(label, x1, y1, x2 - x1, y2 - y1, 0.0) for label, _, (x1, y1, x2, y2) in rows]
+            return draw_color_blobs(frame, blobs, BOX_COLORS)
+        detections = [{"class_id": label_ids[label], "class_name": label, "confidence": float(confidence),
+                       "bbox": bbox.tolist()} for label, confidence, bbox in rows]
+        return renderer.draw(frame, detections)
+
+    os.makedirs(output_dir, exist_ok=True)
+    if os.path.isdir(source) or os.path.splitext(source)[1].lower() in IMAGE_EXTENSIONS:
+        images = plan_chunks([source], sys.maxsize)[0].images
+        for index, path in enumerate(images):
+            frame = cv.imread(path)
+            if frame is not None:
+                cv.imwrite(os.path.join(output_dir, os.path.basename(path)), draw(frame, index))
+        return
+
+    capture = cv.VideoCapture(source)
+    fps = capture.get(cv.CAP_PROP_FPS) or 30
+    writer = None
+    index = 0
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        if writer is None:
+            stem = os.path.splitext(os.path.basename(source))[0]
+            writer = cv.VideoWriter(os.path.join(output_dir, f"{stem}_{options.mode}.avi"),
+                                    cv.VideoWriter_fourcc(*"MJPG"), fps, (frame.shape[1], frame.shape[0]))
+        writer.write(draw(frame, index))
+        index += 1
+    capture.release()
+    if writer is not None:
+        writer.release()
+
+
+def run_batch(inputs: list[str], output: str, options: BatchOptions, workers: int = 1, chunk_size: int = 120,
+              annotate_dir: Optional[str] = None) -> dict:
+    """
+    Process the inputs and write their detections.
+
+    Returns:
+        dict: Throughput report: frames, wall seconds, frames per second and
+            per-stage seconds (decode and detect summed over the workers)
+    """
+    start = time.perf_counter()
+    chunks = plan_chunks(inputs, chunk_size)
+    stage_seconds = dict.fromkeys(STAGES, 0.0)
+    frames = 0
+    by_source: dict[str, list[ChunkResult]] = {}
+
+    writer = open_writer(output)
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        results = (executor.map(process_chunk, chunks, [options] * len(chunks)) if executor
+                   else (process_chunk(chunk, options) for chunk in chunks))
+        # Results arrive in input order, so the output is the same for any number of workers
+        for result in results:
+            frames += len(result.frames)
+            stage_seconds["decode"] += result.decode_seconds
+            stage_seconds["detect"] += result.detect_seconds
+            write_start = time.perf_counter()
+            writer.write(result)
+            stage_seconds["write"] += time.perf_counter() - write_start
+            if annotate_dir:
+                by_source.setdefault(result.source, []).append(result)
+    finally:
+        if executor:
+            executor.shutdown()
+        write_start = time.perf_counter()
+        writer.close()
+        stage_seconds["write"] += time.perf_counter() - write_start
+
+    for source, results in by_source.items():
+        annotate_start = time.perf_counter()
+        annotate(source, results, options, annotate_dir)
+        stage_seconds["annotate"] += time.perf_counter() - annotate_start
+
+    wall_seconds = time.perf_counter() - start
+    return {
+        "frames": frames,
+        "inputs": len(inputs),
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "fps": frames / wall_seconds if wall_seconds else 0.0,
+        "stage_seconds": stage_seconds,
+    }
+
+
+def print_report(report: dict):
+    print(f"Processed {report['frames']} frames from {report['inputs']} input(s) in "
+          f"{report['wall_seconds']:.2f} s: {report['fps']:.1f} frames/s with {report['workers']} worker(s)")
+    print(f"{'stage':<10} {'seconds':>9} {'ms/frame':>9}")
+    for stage, seconds in report["stage_seconds"].items():
+        per_frame = seconds * 1e3 / report["frames"] if report["frames"] else 0.0
+        print(f"{stage:<10} {seconds:>9.2f} {per_frame:>9.2f}")
+    if report["workers"] > 1:
+        print("(decode and detect are summed over the workers)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect objects in video files and image directories, headless.")
+    parser.add_argument("inputs", nargs="+", help="Video files, images or directories of images")
+    parser.add_argument("--mode", default="color", choices=MODES)
+    parser.add_argument("--output", default="detections.jsonl",
+                        help="Detections file: .jsonl (per frame), .parquet or .npz (per detection)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=120, help="Frames per unit of work")
+    parser.add_argument("--annotate", metavar="DIR", help="Also write annotated videos/images to DIR")
+    parser.add_argument("--min-area", type=int, default=500, help="Minimum blob area in color mode")
+    parser.add_argument("--color-scale", type=float, default=1.0, help="Color segmentation scale in (0, 1]")
+    args = parser.parse_args()
+
+    options = BatchOptions(args.mode, args.min_area, args.color_scale)
+    report = run_batch(args.inputs, args.output, options, max(1, args.workers), args.chunk_size, args.annotate)
+    print_report(report)
+    print(f"Detections written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
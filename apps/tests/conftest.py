@@ -1 +1,24 @@
 """Unit tests configuration module."""
+
+import os
+import sys
+
+import pytest
+
+# The cv-app scripts live in a directory that is not an importable package name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../cv-app'))
+
+# The monorepo libraries (inherited by spawned worker processes)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../libs/cv-utils/src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../libs/od-models/src'))
+
+# The clip builder shared with the cv-api tests
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../cv-api/tests'))
+
+from clips import build_clip  # noqa: E402
+
+
+@pytest.fixture
+def write_clip():
+    """Factory writing test clips, see build_clip."""
+    return build_clip
@@ -0,0 +1,129 @@
+"""Headless batch processing unit tests."""
+
+import json
+import sys
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+import batch
+from batch import ChunkResult, ColumnarWriter, JsonlWriter, plan_chunks
+
+
+def chunk_result():
+    """Three frames: two detections on the first, none on the second, one on the third."""
+    return ChunkResult(
+        source="clip.avi",
+        frames=np.array([0, 1, 2], np.int64),
+        timestamps_ms=np.array([0.0, 100.0, np.nan]),
+        frame=np.array([0, 0, 2], np.int64),
+        label=["Red", "person", "Blue"],
+        confidence=np.array([np.nan, 0.87654, np.nan], np.float32),
+        bbox=np.array([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]], np.int32),
+    )
+
+
+@pytest.mark.parametrize("chunk_size, starts, counts", [
+    (4, [0, 4, 8], [4, 4, 2]),
+    (5, [0, 5], [5, 5]),
+    (10, [0], [10]),
+    (64, [0], [10]),
+])
+def test_video_chunks_cover_every_frame_once(tmp_path, write_clip, chunk_size, starts, counts):
+    chunks = plan_chunks([write_clip(tmp_path / "clip.avi", (0, 0, 255), frames=10)], chunk_size)
+
+    assert [chunk.start for chunk in chunks] == starts
+    assert [chunk.count for chunk in chunks] == counts
+    assert all(not chunk.images for chunk in chunks)
+
+
+def test_image_inputs_are_chunked_by_file(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    for name in ("d.png", "a.jpg", "c.PNG", "b.jpeg", "e.bmp"):
+        cv.imwrite(str(images / name), np.zeros((8, 8, 3), np.uint8))
+    (images / "notes.txt").write_text("not an image")
+    single = str(images / "a.jpg")
+
+    chunks = plan_chunks([str(images), single], 2)
+
+    assert [(chunk.start, chunk.count) for chunk in chunks] == [(0, 2), (2, 2), (4, 1), (0, 1)]
+    assert [name.rsplit("/", 1)[1] for chunk in chunks[:3] for name in chunk.images] == \
+        ["a.jpg", "b.jpeg", "c.PNG", "d.png", "e.bmp"]
+    assert chunks[3].source == single and chunks[3].images == [single]
+
+
+def test_unreadable_videos_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        plan_chunks([str(tmp_path / "missing.avi")], 4)
+
+
+def test_jsonl_has_one_line_per_frame(tmp_path):
+    path = tmp_path / "detections.jsonl"
+    writer = JsonlWriter(str(path))
+    writer.write(chunk_result())
+    writer.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == [
+        {"source": "clip.avi", "frame": 0, "timestamp_ms": 0.0, "detections": [
+            {"label": "Red", "confidence": None, "bbox": [1, 2, 3, 4]},
+            {"label": "person", "confidence": 0.8765, "bbox": [5, 6, 7, 8]},
+        ]},
+        {"source": "clip.avi", "frame": 1, "timestamp_ms": 100.0, "detections": []},
+        {"source": "clip.avi", "frame": 2, "timestamp_ms": None, "detections": [
+            {"label": "Blue", "confidence": None, "bbox": [9, 10, 11, 12]},
+        ]},
+    ]
+
+
+def test_npz_has_one_row_per_detection(tmp_path):
+    path = tmp_path / "detections.npz"
+    writer = ColumnarWriter(str(path))
+    writer.write(chunk_result())
+    writer.close()
+
+    with np.load(path) as table:
+        assert sorted(table.files) == sorted(["source", "frame", "label", "confidence", "x1", "y1", "x2", "y2"])
+        assert table["source"].tolist() == ["clip.avi"] * 3
+        assert table["frame"].tolist() == [0, 0, 2]
+        assert table["label"].tolist() == ["Red", "person", "Blue"]
+        assert table["confidence"].dtype == np.float32
+        np.testing.assert_allclose(table["confidence"], [np.nan, 0.87654, np.nan])
+        assert table["x1"].tolist() == [1, 5, 9] and table["y2"].tolist() == [4, 8, 12]
+
+
+def test_empty_npz_keeps_the_schema(tmp_path):
+    path = tmp_path / "detections.npz"
+    ColumnarWriter(str(path)).close()
+
+    with np.load(path) as table:
+        assert len(table.files) == 8
+        assert all(len(table[name]) == 0 for name in table.files)
+
+
+def test_output_does_not_depend_on_the_number_of_workers(tmp_path, monkeypatch, write_clip):
+    clip = write_clip(tmp_path / "clip.avi", (0, 0, 255), frames=12, size=(240, 120))
+    outputs = {}
+    for workers in (1, 3):
+        output = tmp_path / f"workers_{workers}.jsonl"
+        monkeypatch.setattr(sys, "argv", ["batch.py", clip, "--mode", "color", "--workers", str(workers),
+                                          "--chunk-size", "4", "--output", str(output)])
+        batch.main()
+        outputs[workers] = output.read_text()
+
+    lines = [json.loads(line) for line in outputs[1].splitlines()]
+    assert [line["frame"] for line in lines] == list(range(12))
+    assert all([d["label"] for d in line["detections"]] == ["Red"] for line in lines)
+    assert outputs[3] == outputs[1]
+
+
+def test_color_segmenters_follow_the_processing_scale():
+    frame = np.full((120, 160, 3), 128, np.uint8)
+    frame[30:80, 40:90] = (0, 0, 255)
+
+    for scale in (1.0, 0.5, 1.0):
+        labels, _, _ = batch.detect_frame(frame, batch.BatchOptions(color_scale=scale))
+        assert labels == ["Red"]
+        assert batch._segmenters[scale].scale == scale
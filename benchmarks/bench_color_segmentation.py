@@ -0,0 +1,78 @@
+"""
+Per-frame latency of the fused ColorSegmenter vs. the original per-color loop.
+
+The legacy implementation below is the loop that run_multi_color_tracking_stream
+and the API's color mode used before the segmentation engine: one inRange,
+bitwise_or, erode/dilate and findContours pass per color.
+"""
+
+import argparse
+import time
+
+import cv2 as cv
+import numpy as np
+
+from synthetic import RESOLUTIONS, synthetic_frame
+from cv_utils.segmentation import ColorSegmenter
+from cv_utils.tracker import COLOR_RANGES
+
+KERNEL = np.ones((5, 5), np.uint8)
+
+
+def legacy_color_loop(frame, min_area=500):
+    blurred_frame = cv.GaussianBlur(frame, (11, 11), 0)
+    hsv_frame = cv.cvtColor(blurred_frame, cv.COLOR_BGR2HSV)
+    boxes = []
+    for color_name, ranges in COLOR_RANGES.items():
+        color_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+        for lower_bound, upper_bound in ranges:
+            mask = cv.inRange(hsv_frame, lower_bound, upper_bound)
+            color_mask = cv.bitwise_or(color_mask, mask)
+        color_mask = cv.erode(color_mask, KERNEL, iterations=2)
+        color_mask = cv.dilate(color_mask, KERNEL, iterations=2)
+        contours, _ = cv.findContours(color_mask.copy(), cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            if cv.contourArea(contour) > min_area:
+                boxes.append((color_name, cv.boundingRect(contour)))
+    return boxes
+
+
+def time_ms(fn, frame, iterations, warmup=5) -> np.ndarray:
+    for _ in range(warmup):
+        fn(frame)
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(frame)
+        samples[i] = (time.perf_counter() - start) * 1000
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--resolutions', nargs='+', default=['720p', '1080p'], choices=list(RESOLUTIONS))
+    parser.add_argument('--scales', nargs='+', type=float, default=[0.5], help='extra segmenter processing scales')
+    args = parser.parse_args()
+
+    implementations = {
+        'legacy loop': legacy_color_loop,
+        'segmenter': ColorSegmenter(COLOR_RANGES).segment,
+    }
+    for scale in args.scales:
+        implementations[f'segmenter x{scale:g}'] = ColorSegmenter(COLOR_RANGES, scale=scale).segment
+
+    print(f"{'resolution':<10} {'implementation':<16} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'blobs':>6}")
+    for name in args.resolutions:
+        frame = synthetic_frame(*RESOLUTIONS[name])
+        baseline = None
+        for label, fn in implementations.items():
+            samples = time_ms(fn, frame, args.iterations)
+            mean = samples.mean()
+            baseline = baseline or mean
+            print(f"{name:<10} {label:<16} {mean:>8.2f} {np.percentile(samples, 50):>8.2f} "
+                  f"{np.percentile(samples, 95):>8.2f} {len(fn(frame)):>6}   ({baseline / mean:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
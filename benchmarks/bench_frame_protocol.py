@@ -0,0 +1,61 @@
+"""
+Compare the /ws/video JSON (base64) and binary frame protocols.
+
+Reports the bytes put on the wire and the server CPU time spent building each
+message, per frame, for several resolutions.
+"""
+
+import argparse
+import base64
+import json
+import time
+
+import cv2 as cv
+
+from synthetic import RESOLUTIONS, synthetic_frame
+from frame_protocol import encode_binary_frame, encode_json_frame
+
+STATS = {'Red': 2, 'Blue': 1, 'Yellow': 0, 'Green': 3, 'fps': 30}
+NARRATION = "I see Blue, Green and Red objects."
+
+
+def json_message(jpeg: bytes) -> bytes:
+    # Mirrors starlette's WebSocket.send_json serialization
+    data = encode_json_frame(base64.b64encode(jpeg).decode('utf-8'), STATS, NARRATION, time.time())
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode('utf-8')
+
+
+def binary_message(jpeg: bytes) -> bytes:
+    return encode_binary_frame(jpeg, STATS, NARRATION, time.time(), sequence=1)
+
+
+def measure(build, jpeg: bytes, iterations: int) -> tuple[int, float]:
+    """Return (bytes_per_frame, cpu_microseconds_per_frame)."""
+    size = len(build(jpeg))
+    start = time.process_time()
+    for _ in range(iterations):
+        build(jpeg)
+    return size, (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality (server default: 80)')
+    args = parser.parse_args()
+
+    print(f"{'resolution':<10} {'protocol':<8} {'bytes/frame':>12} {'cpu us/frame':>13}")
+    for name, (width, height) in RESOLUTIONS.items():
+        _, buffer = cv.imencode('.jpg', synthetic_frame(width, height), [cv.IMWRITE_JPEG_QUALITY, args.quality])
+        jpeg = buffer.tobytes()
+
+        json_size, json_cpu = measure(json_message, jpeg, args.iterations)
+        binary_size, binary_cpu = measure(binary_message, jpeg, args.iterations)
+
+        print(f"{name:<10} {'json':<8} {json_size:>12,} {json_cpu:>13.1f}")
+        print(f"{name:<10} {'binary':<8} {binary_size:>12,} {binary_cpu:>13.1f}"
+              f"   ({binary_size / json_size:.0%} of json bytes, {json_cpu / max(binary_cpu, 1e-9):.1f}x less cpu)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Cost of handing a frame to another process: pickled through a pipe, copied
+into the worker's shared memory block (ProcessInferencePool's default), or
+passed as a reference to the FrameRing slot the frame was captured into.
+
+The worker task only reads one pixel, so the numbers are the hand-off
+overhead per frame (round trip included) that process workers add.
+"""
+
+import argparse
+import multiprocessing
+import time
+
+from synthetic import RESOLUTIONS, synthetic_frame
+from cv_utils.frame_ring import FrameRing
+from inference_pool import ProcessInferencePool
+
+
+def first_pixel(frame):
+    return int(frame[0, 0, 0])
+
+
+def _pipe_worker(conn):
+    while True:
+        frame = conn.recv()
+        if frame is None:
+            return
+        conn.send(first_pixel(frame))
+
+
+def bench_pickle(frame, iterations: int) -> float:
+    context = multiprocessing.get_context("spawn")
+    conn, child_conn = context.Pipe()
+    process = context.Process(target=_pipe_worker, args=(child_conn,), daemon=True)
+    process.start()
+    conn.send(frame)
+    conn.recv()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        conn.send(frame)
+        conn.recv()
+    elapsed = time.perf_counter() - start
+    conn.send(None)
+    process.join()
+    return elapsed / iterations
+
+
+def bench_pool(frame, iterations: int) -> float:
+    pool = ProcessInferencePool(1, frame_bytes=frame.nbytes)
+    try:
+        pool.run(first_pixel, frame)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            pool.run(first_pixel, frame)
+        return (time.perf_counter() - start) / iterations
+    finally:
+        pool.stop()
+
+
+def bench_ring(frame, iterations: int) -> float:
+    ring = FrameRing(frame.shape, slots=2)
+    slot = ring.acquire()
+    view = ring.view(slot)
+    view[:] = frame
+    ring.publish(slot, 1)
+    try:
+        return bench_pool(view, iterations)
+    finally:
+        del view
+        ring.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'resolution':>10} {'pickle ms':>10} {'shm copy ms':>12} {'ring ref ms':>12}")
+    for name, (width, height) in RESOLUTIONS.items():
+        frame = synthetic_frame(width, height)
+        results = [bench(frame, args.iterations) * 1e3 for bench in (bench_pickle, bench_pool, bench_ring)]
+        print(f"{name:>10} {results[0]:>10.3f} {results[1]:>12.3f} {results[2]:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
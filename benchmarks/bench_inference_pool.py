@@ -0,0 +1,103 @@
+"""
+Inference throughput with thread vs. process workers: frames per second of
+color segmentation and MobileNet SSD detection for 1, 2 and 4 workers.
+
+Threads share one interpreter, so the Python-level parts of detection
+contend for the GIL; ProcessInferencePool workers each own their model and
+receive frames through shared memory. Process start-up and model loading are
+excluded (every worker handles one frame before timing starts).
+
+MobileNet needs the caffemodel (downloaded on first use); the mode is skipped
+if it cannot be loaded.
+"""
+
+import argparse
+import functools
+import threading
+import time
+
+from synthetic import RESOLUTIONS, synthetic_frame
+from cv_utils.segmentation import ColorSegmenter
+from cv_utils.tracker import COLOR_RANGES
+from inference_pool import ProcessInferencePool
+
+_local = threading.local()
+
+
+def color_task(frame):
+    # One segmenter per thread (segmenters reuse their buffers) and so per worker process
+    segmenter = getattr(_local, 'segmenter', None)
+    if segmenter is None:
+        segmenter = _local.segmenter = ColorSegmenter(COLOR_RANGES)
+    return segmenter.segment(frame)
+
+
+def object_task(frame):
+    from od_models import mobilenet_ssd_detector
+    return mobilenet_ssd_detector.detect_batch([frame], as_array=True)[0]
+
+
+TASKS = {'color': color_task, 'object': object_task}
+
+
+def run_threads(call, frames, workers: int) -> float:
+    """Push all frames through ``call`` from ``workers`` threads; return frames per second."""
+    remaining = list(frames)
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not remaining:
+                    return
+                frame = remaining.pop()
+            call(frame)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(frames) / (time.perf_counter() - start)
+
+
+def bench(task, frames, workers: int, backend: str) -> float:
+    if backend == 'thread':
+        run_threads(task, frames[:workers], workers)
+        return run_threads(task, frames, workers)
+
+    pool = ProcessInferencePool(workers, frame_bytes=frames[0].nbytes)
+    try:
+        call = functools.partial(pool.run, task)
+        run_threads(call, frames[:workers], workers)
+        return run_threads(call, frames, workers)
+    finally:
+        pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resolution', default='720p', choices=list(RESOLUTIONS))
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--modes', nargs='+', default=list(TASKS), choices=list(TASKS))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    frames = [synthetic_frame(*RESOLUTIONS[args.resolution], seed=i) for i in range(args.frames)]
+    print(f"{args.resolution}, {args.frames} frames")
+    print(f"{'mode':>8} {'workers':>8} {'thread FPS':>11} {'process FPS':>12}")
+    for mode in args.modes:
+        try:
+            TASKS[mode](frames[0])
+        except Exception as e:
+            print(f"{mode:>8} skipped: {e}")
+            continue
+        for workers in args.workers:
+            thread_fps = bench(TASKS[mode], frames, workers, 'thread')
+            process_fps = bench(TASKS[mode], frames, workers, 'process')
+            print(f"{mode:>8} {workers:>8} {thread_fps:>11.1f} {process_fps:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
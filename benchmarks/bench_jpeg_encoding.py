@@ -0,0 +1,61 @@
+"""
+Compare the JPEG encoders of the API's encode stage across preview sizes and qualities.
+
+Reports encode time (including the downscale to the preview width) and JPEG
+size per frame for every installed encoder (simplejpeg, PyTurboJPEG, OpenCV),
+at each capture resolution, preview width and quality. Encoders that are not
+installed are listed and skipped.
+"""
+
+import argparse
+import time
+
+from synthetic import RESOLUTIONS, synthetic_frame
+from jpeg_encoder import available_encoders, create_encoder, resize_preview
+
+
+def measure(encoder, frames: list, preview_width: int, quality: int, iterations: int) -> tuple[float, float]:
+    """Return (ms_per_frame, bytes_per_frame)."""
+    for frame in frames[:2]:
+        encoder.encode(resize_preview(frame, preview_width), quality)
+
+    sizes = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        sizes += len(encoder.encode(resize_preview(frames[i % len(frames)], preview_width), quality))
+    return (time.perf_counter() - start) / iterations * 1e3, sizes / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--frames', type=int, default=4, help='Distinct frames, cycled through')
+    parser.add_argument('--resolutions', nargs='+', default=['720p', '1080p'], choices=list(RESOLUTIONS))
+    parser.add_argument('--preview-widths', nargs='+', type=int, default=[0, 960, 640],
+                        help='Preview widths (0: full resolution)')
+    parser.add_argument('--qualities', nargs='+', type=int, default=[80, 60, 40])
+    args = parser.parse_args()
+
+    available = available_encoders()
+    missing = [name for name, ok in available.items() if not ok]
+    if missing:
+        print(f"Not installed (skipped): {', '.join(missing)}")
+    encoders = [create_encoder(name) for name, ok in available.items() if ok]
+
+    print(f"{'resolution':<10} {'preview':>7} {'quality':>7} {'encoder':<10} {'ms/frame':>9} {'bytes/frame':>12}")
+    for resolution in args.resolutions:
+        width, height = RESOLUTIONS[resolution]
+        frames = [synthetic_frame(width, height, seed) for seed in range(args.frames)]
+        for preview_width in args.preview_widths:
+            preview = preview_width if preview_width and preview_width < width else width
+            for quality in args.qualities:
+                results = {encoder.name: measure(encoder, frames, preview_width, quality, args.iterations)
+                           for encoder in encoders}
+                baseline = results["opencv"][0]
+                for name, (ms, size) in results.items():
+                    speedup = f"   ({baseline / ms:.1f}x opencv)" if name != "opencv" else ""
+                    print(f"{resolution:<10} {preview:>7} {quality:>7} {name:<10} {ms:>9.2f} {size:>12,.0f}{speedup}")
+
+
+if __name__ == '__main__':
+    main()
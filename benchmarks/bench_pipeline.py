@@ -0,0 +1,108 @@
+"""
+Compare the staged frame pipeline with a sequential capture/detect/encode loop.
+
+A fake camera delivers synthetic frames at a fixed rate and the color detection
+pipeline of the API is applied to each one. Reports published FPS and per-stage
+latencies. The detect stage can be given extra simulated inference latency
+(time spent outside the GIL, like a DNN forward pass on another device).
+"""
+
+import argparse
+import asyncio
+import time
+
+import cv2 as cv
+
+from synthetic import RESOLUTIONS, synthetic_frame
+from cv_utils.segmentation import ColorSegmenter, draw_color_blobs
+from cv_utils.tracker import BOX_COLORS, COLOR_RANGES
+from frame_hub import FrameHub
+from pacing import FramePacer
+from pipeline import FramePipeline
+
+
+class FakeCamera:
+    """Delivers a copy of the same frame, blocking like a camera running at `fps`."""
+
+    def __init__(self, frame, fps: float):
+        self.frame = frame
+        self.period = 1.0 / fps
+        self.next_frame = time.monotonic()
+
+    def read(self):
+        self.next_frame = max(self.next_frame + self.period, time.monotonic())
+        time.sleep(max(0.0, self.next_frame - time.monotonic()))
+        return True, self.frame.copy()
+
+
+def make_process_frame(extra_latency: float, segmenters: int):
+    pool = [ColorSegmenter(COLOR_RANGES) for _ in range(segmenters)]
+
+    def process_frame(frame):
+        segmenter = pool.pop()
+        try:
+            blobs = segmenter.segment(frame)
+        finally:
+            pool.append(segmenter)
+        if extra_latency:
+            time.sleep(extra_latency)
+        return {}, [], lambda annotated: draw_color_blobs(annotated, blobs, BOX_COLORS)
+
+    return process_frame
+
+
+def run_sequential(camera, process_frame, seconds: float) -> float:
+    frames = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        _, frame = camera.read()
+        _, _, render = process_frame(frame)
+        render(frame)
+        cv.imencode('.jpg', frame, [cv.IMWRITE_JPEG_QUALITY, 80])
+        frames += 1
+    return frames / seconds
+
+
+def run_pipelined(camera, process_frame, workers: int, seconds: float) -> tuple[float, dict]:
+    async def scenario():
+        hub = FrameHub(queue_size=1000)
+        queue = hub.subscribe()
+        pipeline = FramePipeline(camera, process_frame, hub, FramePacer(lambda: 1000),
+                                 detect_workers=workers)
+        pipeline.start()
+        await asyncio.sleep(seconds)
+        pipeline.stop()
+        await asyncio.sleep(0)
+        return queue.qsize(), pipeline.stats()
+
+    frames, stats = asyncio.run(scenario())
+    return frames / seconds, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resolution', default='720p', choices=list(RESOLUTIONS))
+    parser.add_argument('--camera-fps', type=float, default=30)
+    parser.add_argument('--inference-ms', type=float, default=30, help='simulated extra detection latency')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    frame = synthetic_frame(*RESOLUTIONS[args.resolution])
+    process_frame = make_process_frame(args.inference_ms / 1e3, args.workers)
+
+    sequential_fps = run_sequential(FakeCamera(frame, args.camera_fps), process_frame, args.seconds)
+    pipelined_fps, stats = run_pipelined(FakeCamera(frame, args.camera_fps), process_frame, args.workers,
+                                         args.seconds)
+
+    print(f"{args.resolution}, camera {args.camera_fps:g} FPS, +{args.inference_ms:g} ms simulated inference")
+    print(f"sequential loop: {sequential_fps:6.1f} FPS")
+    print(f"staged pipeline: {pipelined_fps:6.1f} FPS ({args.workers} detect workers)")
+    print(f"\n{'stage':<12} {'avg ms':>8} {'max ms':>8}")
+    for stage, stage_stats in stats['stages'].items():
+        print(f"{stage:<12} {stage_stats['avg_ms']:>8.2f} {stage_stats['max_ms']:>8.2f}")
+    print(f"dropped: {stats['dropped_frames']}")
+
+
+if __name__ == '__main__':
+    main()
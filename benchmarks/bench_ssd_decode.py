@@ -0,0 +1,95 @@
+"""
+Micro-benchmark of MobileNet SSD post-processing on synthetic network outputs.
+
+Compares the original per-row Python decode loop with the vectorized
+od_models.postprocess stage (threshold, scale, clip, filter, NMS, positions)
+for 100 and 1000 candidate rows.
+"""
+
+import argparse
+import time
+
+import cv2 as cv
+import numpy as np
+
+import synthetic  # noqa: F401  (puts the monorepo libs on sys.path)
+from od_models.postprocess import assign_positions, decode_ssd, non_max_suppression
+
+FRAME_SHAPE = (720, 1280)
+CONFIDENCE_THRESHOLD = 0.3
+NMS_THRESHOLD = 0.4
+TOP_K = 10
+
+
+def synthetic_ssd_rows(count: int, seed: int = 0) -> np.ndarray:
+    """Random (N, 7) DetectionOutput rows with a realistic share of low-confidence candidates."""
+    rng = np.random.default_rng(seed)
+    rows = np.zeros((count, 7), dtype=np.float32)
+    rows[:, 1] = rng.integers(0, 21, count)
+    rows[:, 2] = rng.beta(1, 3, count)
+    corners = rng.uniform(-0.05, 1.05, (count, 2, 2))
+    rows[:, 3:5] = corners.min(axis=1)
+    rows[:, 5:7] = corners.max(axis=1)
+    return rows
+
+
+def legacy_postprocess(rows):
+    h, w = FRAME_SHAPE
+    boxes, confidences, class_ids = [], [], []
+    for i in range(rows.shape[0]):
+        confidence = rows[i, 2]
+        class_id = int(rows[i, 1])
+        if class_id == 0 or confidence < CONFIDENCE_THRESHOLD:
+            continue
+        box = rows[i, 3:7] * np.array([w, h, w, h])
+        x1, y1, x2, y2 = box.astype(int)
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(w, x2), min(h, y2)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        boxes.append([x1, y1, x2, y2])
+        confidences.append(float(confidence))
+        class_ids.append(class_id)
+
+    detections = []
+    if boxes:
+        indices = cv.dnn.NMSBoxes(boxes, confidences, CONFIDENCE_THRESHOLD, NMS_THRESHOLD)
+        for idx in np.array(indices).flatten()[:TOP_K]:
+            x1, y1, x2, y2 = boxes[idx]
+            center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
+            h_pos = "left" if center_x < w // 3 else "right" if center_x > 2 * w // 3 else "center"
+            v_pos = "top" if center_y < h // 3 else "bottom" if center_y > 2 * h // 3 else ""
+            detections.append((class_ids[idx], confidences[idx], boxes[idx], f"{v_pos} {h_pos}".strip()))
+    return detections
+
+
+def vectorized_postprocess(rows):
+    detections = decode_ssd(rows, FRAME_SHAPE, CONFIDENCE_THRESHOLD)
+    detections = non_max_suppression(detections, CONFIDENCE_THRESHOLD, NMS_THRESHOLD, TOP_K)
+    return assign_positions(detections, FRAME_SHAPE)
+
+
+def time_us(fn, rows, iterations):
+    fn(rows)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(rows)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'legacy us':>10} {'vectorized us':>14} {'speedup':>8}")
+    for count in args.rows:
+        rows = synthetic_ssd_rows(count)
+        legacy = time_us(legacy_postprocess, rows, args.iterations)
+        vectorized = time_us(vectorized_postprocess, rows, args.iterations)
+        print(f"{count:>6} {legacy:>10.1f} {vectorized:>14.1f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
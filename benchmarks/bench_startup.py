@@ -0,0 +1,66 @@
+"""
+Measure API startup cost: how long importing api_server takes in a fresh
+interpreter, which modules dominate it, and whether any model framework
+(ultralytics/torch) gets imported before a model is actually used.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+from synthetic import REPO_ROOT
+
+API_DIR = os.path.join(REPO_ROOT, 'apps', 'cv-api')
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import api_server
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in ('ultralytics', 'torch') if name in sys.modules)
+print(f"{elapsed:.6f} {','.join(heavy) or '-'}")
+"""
+
+
+def import_once() -> tuple[float, str]:
+    """Import api_server in a fresh interpreter; return (seconds, heavy modules imported)."""
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=API_DIR, capture_output=True, text=True, check=True)
+    seconds, heavy = result.stdout.split()[-2:]
+    return float(seconds), heavy
+
+
+def slowest_imports(count: int) -> list[tuple[int, str]]:
+    """Packages with the largest cumulative import time (including their dependencies), from -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import api_server'],
+                            cwd=API_DIR, capture_output=True, text=True, check=True)
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        # Submodules are already included in their package's cumulative time
+        if '.' not in name:
+            totals[name] = totals.get(name, 0) + int(cumulative)
+    return sorted(((us, name) for name, us in totals.items()), reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to time')
+    parser.add_argument('--top', type=int, default=8, help='slowest imports to list')
+    args = parser.parse_args()
+
+    runs = [import_once() for _ in range(args.runs)]
+    times = sorted(seconds for seconds, _ in runs)
+    print(f"import api_server: median {times[len(times) // 2] * 1e3:.0f} ms, "
+          f"min {times[0] * 1e3:.0f} ms over {args.runs} runs")
+    print(f"model frameworks imported at startup: {runs[0][1]}")
+
+    print(f"\n{'module':<24}{'cumulative ms':>14}")
+    for us, name in slowest_imports(args.top):
+        print(f"{name:<24}{us / 1e3:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
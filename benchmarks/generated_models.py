@@ -0,0 +1,138 @@
+"""
+Locally generated model weights for benchmarks.
+
+The MobileNet SSD caffemodel is a download the benchmark hosts may not have.
+For timing, the weights' values do not matter, only the architecture: this
+module writes a .caffemodel with random (He-initialized) weights for the
+bundled MobileNetSSD_deploy.prototxt, so the real network runs at its real
+cost. It finds few or no objects, so detection counts are not meaningful.
+
+The caffemodel is a protobuf NetParameter; only the fields OpenCV needs to
+attach weights to layers (layer name, type and blobs) are encoded, by hand, so
+no protobuf package is required.
+"""
+
+import os
+import re
+
+import numpy as np
+
+from synthetic import REPO_ROOT
+
+CACHE_DIR = os.path.join(REPO_ROOT, 'benchmarks/.cache')
+
+
+def parse_prototxt(text: str) -> dict:
+    """Parse protobuf text format into nested dicts of lists (every field may repeat)."""
+    tokens = iter(re.findall(r'"[^"]*"|[{}]|[^\s{}"]+', re.sub(r'#.*', '', text)))
+    stack = [{}]
+    key = None
+    for token in tokens:
+        if token == '{':
+            child = {}
+            stack[-1].setdefault(key, []).append(child)
+            stack.append(child)
+        elif token == '}':
+            stack.pop()
+        elif token.endswith(':'):
+            # Scalar field: the next token is its value
+            stack[-1].setdefault(token[:-1], []).append(next(tokens).strip('"'))
+        else:
+            # Message field: the next token opens it
+            key = token
+    return stack[0]
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    """Length-delimited field (wire type 2)."""
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _blob(array: np.ndarray) -> bytes:
+    shape = _field(1, b''.join(_varint(dim) for dim in array.shape))  # BlobShape.dim, packed
+    data = _field(5, array.astype('<f4').tobytes())  # BlobProto.data, packed floats
+    return _field(7, shape) + data  # BlobProto.shape
+
+
+def _layer(name: str, layer_type: str, blobs: list) -> bytes:
+    payload = _field(1, name.encode()) + _field(2, layer_type.encode())
+    payload += b''.join(_field(7, _blob(blob)) for blob in blobs)  # LayerParameter.blobs
+    return _field(100, payload)  # NetParameter.layer
+
+
+def _first(message: dict, key: str, default=None):
+    values = message.get(key)
+    return values[0] if values else default
+
+
+def random_weights(prototxt_path: str, seed: int = 0) -> bytes:
+    """Serialized NetParameter with random weights for the Convolution, BatchNorm and Scale layers."""
+    with open(prototxt_path) as f:
+        net = parse_prototxt(f.read())
+    rng = np.random.default_rng(seed)
+
+    channels = {name: 3 for name in net.get('input', ['data'])}
+    out = bytearray()
+    for layer in net['layer']:
+        name, layer_type = _first(layer, 'name'), _first(layer, 'type')
+        bottoms, tops = layer.get('bottom', []), layer.get('top', [])
+        in_channels = channels.get(bottoms[0]) if bottoms else None
+        blobs = []
+
+        if layer_type == 'Convolution':
+            params = layer['convolution_param'][0]
+            out_channels = int(_first(params, 'num_output'))
+            group = int(_first(params, 'group', 1))
+            kernel = int(_first(params, 'kernel_size'))
+            fan_in = in_channels // group * kernel * kernel
+            blobs.append(rng.normal(0, np.sqrt(2 / fan_in), (out_channels, in_channels // group, kernel, kernel)))
+            if _first(params, 'bias_term', 'true') == 'true':
+                blobs.append(np.zeros(out_channels))
+            channels[tops[0]] = out_channels
+        elif layer_type == 'BatchNorm':
+            blobs = [np.zeros(in_channels), np.ones(in_channels), np.ones(1)]
+        elif layer_type == 'Scale':
+            blobs = [np.ones(in_channels)]
+            if _first(layer.get('scale_param', [{}])[0], 'bias_term') == 'true':
+                blobs.append(np.zeros(in_channels))
+        elif layer_type == 'Concat':
+            channels[tops[0]] = None
+        if tops and tops[0] not in channels:
+            channels[tops[0]] = in_channels
+
+        if blobs:
+            out += _layer(name, layer_type, blobs)
+    return bytes(out)
+
+
+def mobilenet_ssd_model() -> tuple[str, str, bool]:
+    """
+    Paths of a MobileNet SSD model for benchmarks: the downloaded caffemodel if
+    present, otherwise generated random weights (cached in benchmarks/.cache).
+
+    Returns:
+        tuple: (model_path, config_path, generated)
+    """
+    from od_models.mobilenet_ssd_detector import DEFAULT_CONFIG_PATH, DEFAULT_MODEL_PATH
+
+    if os.path.exists(DEFAULT_MODEL_PATH):
+        return DEFAULT_MODEL_PATH, DEFAULT_CONFIG_PATH, False
+
+    path = os.path.join(CACHE_DIR, 'MobileNetSSD_random.caffemodel')
+    if not os.path.exists(path):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(random_weights(DEFAULT_CONFIG_PATH))
+    return path, DEFAULT_CONFIG_PATH, True
@@ -0,0 +1,386 @@
+"""
+Reproducible benchmark suite for every detection mode: latency percentiles,
+FPS and peak memory per mode and resolution, saved as JSON to compare commits.
+
+Cases:
+    color            ColorSegmenter + drawing, the per-frame work of cv_utils.tracker
+    mobilenet_ssd    MobileNetSSDDetector detect + draw
+    yolo             YOLOv8 detect + draw (skipped without ultralytics)
+    api_color        The API's per-frame loop in color mode: process_frame, render, JPEG encode
+    api_object       The same in MobileNet SSD mode (with tracking, detector on every frame)
+    api_object_yolo  The same in YOLOv8 mode (skipped without ultralytics)
+
+Frames are synthetic (seeded, so every run sees the same pixels) or, with
+--video, decoded from a recording and resized to each resolution. Without the
+downloaded MobileNet SSD caffemodel, the MobileNet cases run the bundled
+architecture with generated random weights (see generated_models.py): the cost
+is the real network's, the detections are not.
+
+Each case runs untimed warm-up frames first, then times every frame of the
+run. Peak memory is the process's resident set high-water mark during the
+timed run (reset per case where Linux allows it) and, separately, the peak of
+memory allocated through Python/NumPy while processing a few frames under
+tracemalloc (kept out of the timed run, which it would slow down).
+
+Save a run and compare a later one against it:
+
+    python benchmarks/harness.py --output before.json
+    python benchmarks/harness.py --compare before.json --output after.json
+
+--compare exits with status 1 when any case's median latency regressed by more
+than --threshold, so it can gate CI.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import cv2 as cv
+import numpy as np
+
+from synthetic import REPO_ROOT, RESOLUTIONS, synthetic_frame
+from generated_models import mobilenet_ssd_model
+from jpeg_encoder import create_encoder
+
+SCHEMA_VERSION = 1
+
+
+class SkipCase(Exception):
+    """A case whose model or dependencies are not available here."""
+
+
+# -- Cases: each builds a per-frame callable; setup cost (model loading) is not timed --
+
+def color_case():
+    from cv_utils.segmentation import ColorSegmenter, draw_color_blobs
+    from cv_utils.tracker import BOX_COLORS, COLOR_RANGES
+
+    segmenter = ColorSegmenter(COLOR_RANGES)
+    canvas = None
+
+    def run(frame):
+        nonlocal canvas
+        # The tracker draws onto the frame it captured; draw onto a reused copy instead
+        if canvas is None or canvas.shape != frame.shape:
+            canvas = np.empty_like(frame)
+        np.copyto(canvas, frame)
+        blobs = segmenter.segment(canvas)
+        draw_color_blobs(canvas, blobs, BOX_COLORS)
+        return len(blobs)
+    return run
+
+
+def _mobilenet_detector():
+    from od_models import mobilenet_ssd_detector
+    from od_models.mobilenet_ssd_detector import MobileNetSSDDetector
+
+    model_path, config_path, generated = mobilenet_ssd_model()
+    detector = MobileNetSSDDetector(model_path=model_path, config_path=config_path)
+    if generated:
+        # Stand in for the default shared detector, which the API's object mode uses
+        mobilenet_ssd_detector._detectors[mobilenet_ssd_detector._detector_key()] = detector
+    return detector
+
+
+def mobilenet_ssd_case():
+    detector = _mobilenet_detector()
+
+    def run(frame):
+        detections = detector.detect(frame)
+        detector.draw(frame.copy(), detections)
+        return len(detections)
+    return run
+
+
+def _load_yolo():
+    from od_models import object_detection_tracker
+    try:
+        object_detection_tracker.get_model()
+    except ImportError as e:
+        raise SkipCase(f"YOLOv8 unavailable ({e})")
+    return object_detection_tracker
+
+
+def yolo_case():
+    yolo = _load_yolo()
+
+    def run(frame):
+        detections = yolo.detect(frame)
+        yolo.draw_detections(frame.copy(), detections)
+        return len(detections)
+    return run
+
+
+def _api_case(mode: str):
+    import api_server
+
+    camera = api_server.TrackerState("benchmark")
+    camera.detection_mode = mode
+    # Full-frame work on every frame: the benchmark frames do not form a video
+    camera.motion_gating = False
+
+    def run(frame):
+        _, detected, render = api_server.process_frame(camera, frame)
+        annotated = frame.copy()
+        render(annotated)
+        # The server's encoder (CV_API_JPEG_ENCODER, the fastest installed by default)
+        api_server.jpeg_encoder.encode(annotated, api_server.JPEG_QUALITY)
+        return len(detected)
+    return run
+
+
+def api_color_case():
+    return _api_case("color")
+
+
+def api_object_case():
+    _mobilenet_detector()
+    return _api_case("object")
+
+
+def api_object_yolo_case():
+    _load_yolo()
+    return _api_case("object_yolo")
+
+
+CASES = {
+    'color': color_case,
+    'mobilenet_ssd': mobilenet_ssd_case,
+    'yolo': yolo_case,
+    'api_color': api_color_case,
+    'api_object': api_object_case,
+    'api_object_yolo': api_object_yolo_case,
+}
+
+
+# -- Frames --
+
+def synthetic_frames(resolution: str, count: int) -> list:
+    return [synthetic_frame(*RESOLUTIONS[resolution], seed=i) for i in range(count)]
+
+
+def recorded_frames(path: str, resolution: str, count: int) -> list:
+    """Up to ``count`` frames of a video file, resized to the resolution."""
+    capture = cv.VideoCapture(path)
+    if not capture.isOpened():
+        raise SystemExit(f"Cannot open video: {path}")
+    size = RESOLUTIONS[resolution]
+    frames = []
+    while len(frames) < count:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        if (frame.shape[1], frame.shape[0]) != size:
+            frame = cv.resize(frame, size, interpolation=cv.INTER_AREA)
+        frames.append(frame)
+    capture.release()
+    if not frames:
+        raise SystemExit(f"No frames in video: {path}")
+    return frames
+
+
+# -- Measurement --
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's resident set high-water mark (Linux); False if not possible."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def percentiles(samples_ms: list) -> dict:
+    samples = np.asarray(samples_ms)
+    return {
+        'mean': round(float(samples.mean()), 3),
+        'min': round(float(samples.min()), 3),
+        'p50': round(float(np.percentile(samples, 50)), 3),
+        'p90': round(float(np.percentile(samples, 90)), 3),
+        'p99': round(float(np.percentile(samples, 99)), 3),
+        'max': round(float(samples.max()), 3),
+    }
+
+
+def measure(run, frames: list, iterations: int, warmup: int, traced: int) -> dict:
+    for i in range(warmup):
+        run(frames[i % len(frames)])
+
+    rss_reset = _reset_peak_rss()
+    samples = []
+    outputs = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        frame_start = time.perf_counter()
+        outputs += run(frames[i % len(frames)])
+        samples.append((time.perf_counter() - frame_start) * 1000)
+    elapsed = time.perf_counter() - start
+    peak_rss = _peak_rss_mb()
+
+    tracemalloc.start()
+    for i in range(traced):
+        run(frames[i % len(frames)])
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'latency_ms': percentiles(samples),
+        'fps': round(iterations / elapsed, 2),
+        'peak_rss_mb': round(peak_rss, 1),
+        # Without a reset, the high-water mark covers the whole process so far
+        'peak_rss_scope': 'case' if rss_reset else 'process',
+        'alloc_peak_mb': round(alloc_peak / (1024 * 1024), 2),
+        'outputs_per_frame': round(outputs / iterations, 2),
+    }
+
+
+def environment(args) -> dict:
+    def git(*command):
+        try:
+            return subprocess.run(['git', *command], cwd=REPO_ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'opencv_threads': cv.getNumThreads(),
+        # Encoder of the api_* cases' JPEG encode step
+        'jpeg_encoder': create_encoder(os.getenv('CV_API_JPEG_ENCODER', 'auto')).name,
+        'settings': {
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'distinct_frames': args.frames,
+            'video': os.path.basename(args.video) if args.video else None,
+        },
+    }
+
+
+# -- Comparison --
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """Print the change of every case present in both runs; True if any median latency regressed."""
+    def key(result):
+        return result['case'], result['resolution'], result['source']
+
+    previous = {key(result): result for result in baseline['results']}
+    print(f"\nCompared with {(baseline['environment']['commit'] or 'unknown')[:10]} "
+          f"(regression threshold {threshold:.0%})")
+    print(f"{'case':<16} {'res':>6} {'p50 ms':>17} {'change':>8} {'p99 ms':>17} {'FPS':>15} {'peak RSS MB':>17}")
+
+    regressed = False
+    for result in current['results']:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        old, new = before['latency_ms']['p50'], result['latency_ms']['p50']
+        change = (new - old) / old if old else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSED'
+            regressed = True
+        elif change < -threshold:
+            flag = '  improved'
+        print(f"{result['case']:<16} {result['resolution']:>6} {old:>8.2f} -> {new:<6.2f} {change:>+8.1%} "
+              f"{before['latency_ms']['p99']:>8.2f} -> {result['latency_ms']['p99']:<6.2f} "
+              f"{before['fps']:>6.1f} -> {result['fps']:<6.1f} "
+              f"{before['peak_rss_mb']:>7.1f} -> {result['peak_rss_mb']:<7.1f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog='\n'.join(__doc__.strip().splitlines()[3:]))
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    parser.add_argument('--resolutions', nargs='+', default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument('--video', help='Benchmark on frames of this recording instead of synthetic frames')
+    parser.add_argument('--frames', type=int, default=16, help='Distinct frames, cycled through')
+    parser.add_argument('--iterations', type=int, default=100, help='Timed frames per case and resolution')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed frames before timing')
+    parser.add_argument('--traced', type=int, default=5, help='Frames processed under tracemalloc')
+    parser.add_argument('--threads', type=int, help='OpenCV threads (default: OpenCV\'s choice)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Median latency increase counted as a regression (default: 0.10)')
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        cv.setNumThreads(args.threads)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('schema_version') != SCHEMA_VERSION:
+            raise SystemExit(f"{args.compare}: unsupported results schema {baseline.get('schema_version')}")
+
+    source = f"recorded:{os.path.basename(args.video)}" if args.video else 'synthetic'
+    report = {'schema_version': SCHEMA_VERSION, 'environment': environment(args), 'results': [], 'skipped': {}}
+
+    print(f"{source}, {args.iterations} frames per case ({args.warmup} warm-up)")
+    print(f"{'case':<16} {'res':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'FPS':>7} "
+          f"{'peak RSS MB':>12} {'alloc MB':>9}")
+    for name in args.cases:
+        try:
+            run = CASES[name]()
+        except SkipCase as e:
+            report['skipped'][name] = str(e)
+            print(f"{name:<16} skipped: {e}")
+            continue
+
+        for resolution in args.resolutions:
+            if args.video:
+                frames = recorded_frames(args.video, resolution, args.frames)
+            else:
+                frames = synthetic_frames(resolution, args.frames)
+            result = {'case': name, 'resolution': resolution, 'source': source,
+                      **measure(run, frames, args.iterations, args.warmup, args.traced)}
+            report['results'].append(result)
+            latency = result['latency_ms']
+            print(f"{name:<16} {resolution:>6} {latency['p50']:>8.2f} {latency['p90']:>8.2f} "
+                  f"{latency['p99']:>8.2f} {result['fps']:>7.1f} {result['peak_rss_mb']:>12.1f} "
+                  f"{result['alloc_peak_mb']:>9.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if baseline is not None and compare(baseline, report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
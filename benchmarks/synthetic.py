@@ -0,0 +1,42 @@
+"""Synthetic test frames shared by the benchmark scripts."""
+
+import os
+import sys
+
+import cv2 as cv
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Make the monorepo's Python projects importable without installing them
+for path in ('libs/cv-utils/src', 'libs/od-models/src', 'apps/cv-api'):
+    sys.path.insert(0, os.path.join(REPO_ROOT, path))
+
+RESOLUTIONS = {
+    '480p': (640, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+}
+
+# BGR colors that land inside the tracker's Red, Blue, Yellow and Green HSV ranges
+_BLOB_COLORS = [(0, 0, 220), (220, 40, 0), (0, 220, 220), (0, 200, 0)]
+
+
+def synthetic_frame(width: int, height: int, seed: int = 0, blobs: int = 8) -> np.ndarray:
+    """
+    Build a camera-like BGR frame: a noisy gradient background with a few
+    colored rectangles that the color tracker picks up.
+    """
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(40, 160, width, dtype=np.float32)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = gradient[None, :, None].astype(np.uint8)
+    frame = cv.add(frame, rng.integers(0, 25, frame.shape, dtype=np.uint8))
+
+    for i in range(blobs):
+        w = int(rng.integers(width // 20, width // 6))
+        h = int(rng.integers(height // 20, height // 6))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        cv.rectangle(frame, (x, y), (x + w, y + h), _BLOB_COLORS[i % len(_BLOB_COLORS)], -1)
+    return frame
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class FrameBufferArena:
+    """
+    Named, preallocated arrays reused from frame to frame.
+
+    Hot loops ask the arena for a buffer by name and pass it as the ``dst=``
+    output of OpenCV calls. As long as the frame resolution does not change,
+    the same arrays are handed out every frame, so the steady state performs no
+    large allocations. A buffer is reallocated only when the requested shape or
+    dtype differs, e.g. after a camera resolution change.
+
+    Not thread-safe: each thread running a pipeline needs its own arena.
+    """
+
+    def __init__(self):
+        self._buffers: dict[str, np.ndarray] = {}
+        # Number of buffers ever allocated and their total size, for verifying the steady state
+        self.allocations = 0
+        self.allocated_bytes = 0
+
+    def get(self, name: str, shape: tuple, dtype=np.uint8, reserve: tuple = None) -> np.ndarray:
+        """
+        Return the buffer registered under `name`, allocating it on first use or
+        when the shape/dtype changed. The contents are left over from the previous
+        frame and must be fully overwritten by the caller.
+
+        With `reserve`, the largest shape the buffer will be asked for (e.g. the
+        full frame when `shape` is the size of a region of it, which changes from
+        call to call), the buffer is allocated for the reserved size and a
+        contiguous view of `shape` into it is returned; it is only reallocated
+        when the reservation changes or is exceeded.
+        """
+        if reserve is not None:
+            return self._reserved(name, shape, dtype, reserve)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self._allocate(name, shape, dtype)
+        return buffer
+
+    def _reserved(self, name: str, shape: tuple, dtype, reserve: tuple) -> np.ndarray:
+        size = int(np.prod(shape))
+        capacity = max(int(np.prod(reserve)), size)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.ndim != 1 or buffer.size != capacity or buffer.dtype != dtype:
+            buffer = self._allocate(name, (capacity,), dtype)
+        return buffer[:size].reshape(shape)
+
+    def _allocate(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        buffer = np.empty(shape, dtype=dtype)
+        self._buffers[name] = buffer
+        self.allocations += 1
+        self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    @property
+    def nbytes(self) -> int:
+        """Memory currently held by the arena."""
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def stats(self) -> dict:
+        """Allocation counters, e.g. for status endpoints."""
+        return {
+            "buffers": len(self._buffers),
+            "nbytes": self.nbytes,
+            "allocations": self.allocations,
+            "allocated_bytes": self.allocated_bytes,
+        }
+
+    def clear(self):
+        """Release all buffers (the counters are kept)."""
+        self._buffers.clear()
@@ -0,0 +1,200 @@
+import threading
+import weakref
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+# Per-slot header fields (int64)
+_SEQUENCE = 0
+_REFCOUNT = 1
+_HEADER_FIELDS = 2
+
+# Rings created by this process, to find the ring a frame view lives in
+_owned_rings: "weakref.WeakSet[FrameRing]" = weakref.WeakSet()
+
+
+@dataclass(frozen=True)
+class FrameRef:
+    """
+    Picklable reference to a frame in a ring slot, which another process can
+    resolve with ``FrameRing.attach(ref.name, ...)``.
+    """
+    name: str
+    slots: int
+    shape: tuple
+    dtype: str
+    slot: int
+    sequence: int
+
+
+class FrameRing:
+    """
+    Fixed number of frame-sized slots in one shared memory block.
+
+    Capture writes each frame straight into a free slot (e.g. with
+    ``cv.VideoCapture.read(ring.view(slot))``), and every later stage works
+    on NumPy views of that slot, so a frame is never copied on its way through
+    the pipeline, not even when it is handed to another process.
+
+    Each slot has a sequence number and a reference count. A slot is written
+    only while free (count 0); stages that hold on to a frame retain() it and
+    release() it when done, and the slot is reused once the last holder lets
+    go. When every slot is in use, acquire() returns None and the caller falls
+    back to an ordinary array rather than waiting.
+
+    Reference counts are managed by the process that created the ring (under
+    a lock); other processes attach() by name and only read slots the owner has
+    retained for them. The sequence number lets a reader check that a slot still
+    holds the frame it was given.
+    """
+
+    def __init__(self, shape: tuple, slots: int = 8, dtype=np.uint8, name: Optional[str] = None):
+        """
+        Args:
+            shape: Shape of every frame, e.g. (1080, 1920, 3)
+            slots: Number of frame slots
+            dtype: Frame element type
+            name: Attach to the existing ring with this shared memory name instead of creating one
+        """
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        header_bytes = slots * _HEADER_FIELDS * 8
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * self.frame_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self._header = np.ndarray((slots, _HEADER_FIELDS), np.int64, buffer=self.shm.buf)
+        self._frames = np.ndarray((slots, *self.shape), self.dtype, buffer=self.shm.buf, offset=header_bytes)
+        self._next = 0
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.overruns = 0
+        self.closed = False
+
+        if self.owner:
+            self._header[:] = 0
+            _owned_rings.add(self)
+
+    @classmethod
+    def attach(cls, name: str, shape: tuple, slots: int, dtype=np.uint8) -> "FrameRing":
+        """Map a ring created by another process."""
+        return cls(shape, slots, dtype, name=name)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def view(self, slot: int) -> np.ndarray:
+        """The frame in a slot, as a view into shared memory."""
+        return self._frames[slot]
+
+    def acquire(self) -> Optional[int]:
+        """
+        Claim a free slot for writing, holding one reference to it.
+
+        Returns:
+            int: Slot index, or None if every slot is in use
+        """
+        with self._lock:
+            for offset in range(self.slots):
+                slot = (self._next + offset) % self.slots
+                if self._header[slot, _REFCOUNT] == 0:
+                    self._header[slot, _REFCOUNT] = 1
+                    self._next = slot + 1
+                    return slot
+            self.overruns += 1
+            return None
+
+    def publish(self, slot: int, sequence: int):
+        """Stamp a written slot with the sequence number of its frame."""
+        self._header[slot, _SEQUENCE] = sequence
+        self.writes += 1
+
+    def sequence(self, slot: int) -> int:
+        return int(self._header[slot, _SEQUENCE])
+
+    def refcount(self, slot: int) -> int:
+        return int(self._header[slot, _REFCOUNT])
+
+    def retain(self, slot: int):
+        with self._lock:
+            self._header[slot, _REFCOUNT] += 1
+
+    def release(self, slot: int):
+        """Drop a reference to a slot; a no-op once the ring is closed (e.g. for a frame still in flight then)."""
+        with self._lock:
+            if self.closed:
+                return
+            if self._header[slot, _REFCOUNT] <= 0:
+                raise ValueError(f"Slot {slot} released more often than retained")
+            self._header[slot, _REFCOUNT] -= 1
+
+    def ref(self, slot: int) -> FrameRef:
+        return FrameRef(self.name, self.slots, self.shape, self.dtype.str, slot, self.sequence(slot))
+
+    def resolve(self, ref: FrameRef) -> np.ndarray:
+        """
+        The frame a reference points to, as a view.
+
+        Raises:
+            ValueError: If the slot has been reused for another frame
+        """
+        if self.sequence(ref.slot) != ref.sequence:
+            raise ValueError(f"Slot {ref.slot} no longer holds frame {ref.sequence}")
+        return self.view(ref.slot)
+
+    def locate(self, frame: np.ndarray) -> Optional[int]:
+        """The slot a whole-frame view lives in, or None if it is not one of this (open) ring's slots."""
+        if frame.shape != self.shape or frame.dtype != self.dtype:
+            return None
+        with self._lock:
+            if self.closed:
+                return None
+            start = self._frames.__array_interface__['data'][0]
+        offset = frame.__array_interface__['data'][0] - start
+        if offset < 0 or offset % self.frame_bytes or offset // self.frame_bytes >= self.slots:
+            return None
+        return offset // self.frame_bytes
+
+    def stats(self) -> dict:
+        """Slot usage and write counters; no slot is in use once the ring is closed."""
+        with self._lock:
+            in_use = 0 if self.closed else int(np.count_nonzero(self._header[:, _REFCOUNT]))
+        return {
+            "slots": self.slots,
+            "in_use": in_use,
+            "slot_bytes": self.frame_bytes,
+            "writes": self.writes,
+            "overruns": self.overruns,
+        }
+
+    def close(self):
+        """
+        Unmap the ring; the owner also frees the shared memory. If views of the
+        frames are still alive somewhere, the mapping is left to be released with them.
+        """
+        _owned_rings.discard(self)
+        if self.owner:
+            self.shm.unlink()
+        with self._lock:
+            self.closed = True
+            del self._header, self._frames
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+
+
+def find_frame(frame: np.ndarray) -> Optional[FrameRef]:
+    """Reference to the ring slot a frame view lives in, if it is in a ring created by this process."""
+    for ring in list(_owned_rings):
+        slot = ring.locate(frame)
+        if slot is not None:
+            return ring.ref(slot)
+    return None
@@ -0,0 +1,201 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import cv2 as cv
+import numpy as np
+
+
+@dataclass
+class MotionResult:
+    """Outcome of motion gating one frame."""
+    moved: bool
+    # Changed regions as (x, y, w, h) in full-resolution pixels; the whole frame when full_frame is set
+    regions: list[tuple[int, int, int, int]] = field(default_factory=list)
+    # Fraction of (downscaled) pixels that changed
+    changed_fraction: float = 0.0
+    # The whole frame must be processed: no previous frame to compare with (first frame,
+    # resolution change, periodic refresh) or changes spread over most of it
+    full_frame: bool = False
+
+
+class MotionGate:
+    """
+    Decides which parts of a frame need processing by comparing it with the previous one.
+
+    Frames are downscaled to a small working width and blurred, then
+    differenced against the previous frame (largest difference over the color
+    channels). Changed pixels are
+    dilated and grouped into bounding regions, mapped back to full resolution
+    with some padding. When (almost) nothing changed, the frame can be skipped
+    and the previous results reused; otherwise only the changed regions need to
+    be processed.
+
+    Every refresh_interval frames the whole frame is reported as changed, so
+    results cannot drift forever on slow changes (e.g. lighting).
+
+    Calls are serialized with a lock, but frames must be fed in capture order.
+    """
+
+    def __init__(self, width: int = 160, threshold: int = 25, min_changed_fraction: float = 0.002,
+                 padding: int = 16, max_regions: int = 8, max_region_fraction: float = 0.5,
+                 refresh_interval: int = 150):
+        """
+        Args:
+            width: Width of the downscaled frame the difference is computed on
+            threshold: Minimum channel difference for a pixel to count as changed
+            min_changed_fraction: Fraction of changed pixels below which the frame is skipped
+            padding: Pixels added around each region at full resolution
+            max_regions: Above this many regions, a single bounding region is returned
+            max_region_fraction: Process the whole frame when the regions cover more than this
+                fraction of it, where cropping no longer pays off
+            refresh_interval: Force a full-frame update every this many frames (0 = never)
+        """
+        self.width = width
+        self.threshold = threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.padding = padding
+        self.max_regions = max_regions
+        self.max_region_fraction = max_region_fraction
+        self.refresh_interval = refresh_interval
+        self.kernel = np.ones((3, 3), np.uint8)
+
+        self.frames = 0
+        self.skipped_frames = 0
+        self.processed_pixels = 0
+        self.total_pixels = 0
+        self._previous: Optional[np.ndarray] = None
+        self._frames_since_refresh = 0
+        self._lock = threading.Lock()
+
+    def _small(self, frame: np.ndarray) -> np.ndarray:
+        scale = self.width / frame.shape[1]
+        small = cv.resize(frame, (self.width, max(1, round(frame.shape[0] * scale))), interpolation=cv.INTER_AREA)
+        return cv.GaussianBlur(small, (5, 5), 0)
+
+    def update(self, frame: np.ndarray) -> MotionResult:
+        """Compare a frame with the previous one and return what needs processing."""
+        with self._lock:
+            h, w = frame.shape[:2]
+            small = self._small(frame)
+            previous, self._previous = self._previous, small
+            self.frames += 1
+            self.total_pixels += h * w
+            self._frames_since_refresh += 1
+
+            if (previous is None or previous.shape != small.shape or
+                    (self.refresh_interval and self._frames_since_refresh >= self.refresh_interval)):
+                self._frames_since_refresh = 0
+                self.processed_pixels += h * w
+                return MotionResult(True, [(0, 0, w, h)], 1.0, full_frame=True)
+
+            # Largest per-channel difference, so color changes at equal brightness count too
+            diff = cv.absdiff(small, previous)
+            if diff.ndim == 3:
+                diff = diff.max(axis=2)
+            _, changed = cv.threshold(diff, self.threshold, 255, cv.THRESH_BINARY)
+            changed_fraction = cv.countNonZero(changed) / changed.size
+            if changed_fraction < self.min_changed_fraction:
+                self.skipped_frames += 1
+                return MotionResult(False, [], changed_fraction)
+
+            changed = cv.dilate(changed, self.kernel, iterations=2)
+            regions = self._regions(changed, w / small.shape[1], h / small.shape[0], w, h)
+            region_pixels = sum(rw * rh for _, _, rw, rh in regions)
+            if region_pixels > self.max_region_fraction * h * w:
+                self.processed_pixels += h * w
+                return MotionResult(True, [(0, 0, w, h)], changed_fraction, full_frame=True)
+            self.processed_pixels += region_pixels
+            return MotionResult(True, regions, changed_fraction)
+
+    def _regions(self, changed: np.ndarray, sx: float, sy: float, w: int, h: int) -> list[tuple]:
+        contours, _ = cv.findContours(changed, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+        boxes = np.array([cv.boundingRect(contour) for contour in contours], dtype=np.float64).reshape(-1, 4)
+
+        # To full resolution [x1, y1, x2, y2] with padding, clipped to the frame
+        boxes[:, 2:] += boxes[:, :2]
+        boxes *= (sx, sy, sx, sy)
+        boxes += (-self.padding, -self.padding, self.padding, self.padding)
+        boxes = np.clip(np.round(boxes), 0, (w, h, w, h)).astype(int)
+
+        regions = merge_overlapping([tuple(box) for box in boxes])
+        if len(regions) > self.max_regions:
+            regions = [(min(r[0] for r in regions), min(r[1] for r in regions),
+                        max(r[2] for r in regions), max(r[3] for r in regions))]
+        return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in regions]
+
+    def reset(self):
+        """Forget the previous frame, so the next one is processed in full."""
+        with self._lock:
+            self._previous = None
+
+    def stats(self) -> dict:
+        """How much work gating saved so far."""
+        return {
+            "frames": self.frames,
+            "skipped_frames": self.skipped_frames,
+            "skipped_fraction": self.skipped_frames / self.frames if self.frames else 0.0,
+            "processed_pixel_fraction": self.processed_pixels / self.total_pixels if self.total_pixels else 0.0,
+        }
+
+
+def merge_overlapping(boxes: list[tuple]) -> list[tuple]:
+    """Merge overlapping or touching [x1, y1, x2, y2] boxes until none overlap."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for i, other in enumerate(result):
+                if box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]:
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                                 max(box[2], other[2]), max(box[3], other[3]))
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return boxes
+
+
+def overlaps(a: tuple, b: tuple) -> bool:
+    """Whether two (x, y, w, h) boxes overlap."""
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def expand_regions(regions: list[tuple], boxes: list[tuple]) -> list[tuple]:
+    """
+    Grow (x, y, w, h) regions to fully contain every box they touch, so an object
+    that only partly moved is processed as a whole.
+    """
+    grown = [(x, y, x + w, y + h) for x, y, w, h in regions]
+    grown += [(x, y, x + w, y + h) for x, y, w, h in boxes if any(overlaps((x, y, w, h), r) for r in regions)]
+    return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in merge_overlapping(grown)]
+
+
+def update_regional(motion: MotionResult, previous: list, process: Callable[[Optional[list]], list],
+                    bbox: Callable[[object], tuple]) -> list:
+    """
+    Update per-frame results using only the regions that changed.
+
+    - nothing moved: the previous results are returned as they are
+    - full frame: ``process(None)`` is run on the whole frame
+    - otherwise the regions are grown to cover the previous results they touch,
+      ``process(regions)`` recomputes them, and previous results outside the
+      regions are kept
+
+    Args:
+        motion: Result of MotionGate.update for the current frame
+        previous: Results of the previous frame
+        process: Computes results for a list of (x, y, w, h) regions, or the whole frame for None
+        bbox: Returns the (x, y, w, h) box of a result
+    """
+    if not motion.moved:
+        return previous
+    if motion.full_frame:
+        return process(None)
+
+    regions = expand_regions(motion.regions, [bbox(item) for item in previous])
+    kept = [item for item in previous if not any(overlaps(bbox(item), region) for region in regions)]
+    return kept + list(process(regions))
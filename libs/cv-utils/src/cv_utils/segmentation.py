@@ -0,0 +1,292 @@
+import time
+
+import cv2 as cv
+import numpy as np
+from dataclasses import dataclass
+
+from cv_utils.buffers import FrameBufferArena
+
+
+@dataclass
+class ColorBlob:
+    """A connected region of a single tracked color."""
+    color: str
+    x: int
+    y: int
+    w: int
+    h: int
+    area: float
+
+    @property
+    def bbox(self) -> tuple[int, int, int, int]:
+        """Bounding box as (x, y, w, h)."""
+        return self.x, self.y, self.w, self.h
+
+    @property
+    def center(self) -> tuple[int, int]:
+        """Center of the bounding box."""
+        return self.x + self.w // 2, self.y + self.h // 2
+
+
+class ColorSegmenter:
+    """
+    Single-pass multi-color segmentation engine.
+
+    Instead of running inRange, morphology and contour detection once per color
+    on freshly allocated masks, every pixel is classified against all colors at
+    once using lookup tables:
+
+    1. HSV ranges are grouped by color and (S, V) bounds, and each group gets one
+       bit. Three 256-entry tables map the H, S and V values of a pixel to the
+       groups that channel value falls in, so ``H_lut[h] & S_lut[s] & V_lut[v]``
+       is exactly the set of colors whose HSV ranges contain the pixel.
+    2. Morphological cleanup runs once on the combined foreground mask.
+    3. Each enabled color is extracted from the cleaned flag image with a single
+       bitwise AND and its external contours are traced.
+
+    Contour tracing is used rather than connected components: with OpenCV's
+    connectedComponentsWithStats a full-frame label image costs far more than
+    findContours on the same mask, and contours keep the min_area semantics of
+    the original tracker.
+
+    All intermediate images live in a FrameBufferArena and are written through
+    OpenCV ``dst=`` outputs, so steady-state frames allocate no large arrays.
+    The buffers are sized for the whole frame, so segmenting regions of
+    varying size (see segment()) uses views of the same buffers.
+    Because of that a segmenter must not be shared between threads.
+
+    The time each stage took on the last frame is kept in ``last_timings``
+    (seconds per stage in ``STAGES``), for latency instrumentation.
+    """
+
+    # Stages reported in last_timings: downscale, blur and HSV conversion; color
+    # classification and morphology; contour tracing and filtering
+    STAGES = ("blur_hsv", "segmentation", "contours")
+
+    def __init__(self, color_ranges: dict, min_area: int = 500, blur_size: int = 11, kernel_size: int = 5,
+                 morph_iterations: int = 2, scale: float = 1.0):
+        """
+        Args:
+            color_ranges (dict): Color name to list of (lower_bound, upper_bound) HSV ranges,
+                e.g. cv_utils.tracker.COLOR_RANGES
+            min_area (int): Minimum contour area threshold to filter out noise (default: 500)
+            blur_size (int): Gaussian blur kernel size applied before classification (default: 11)
+            kernel_size (int): Size of the square morphology kernel (default: 5)
+            morph_iterations (int): Erode/dilate iterations for mask cleanup (default: 2)
+            scale (float): Processing scale in (0, 1] (default: 1.0). Below 1 the frame is
+                downscaled before segmentation, kernel sizes and min_area are scaled to
+                match, and blobs are mapped back to full-resolution coordinates.
+                The sizes and areas above always refer to full resolution.
+        """
+        if not 0 < scale <= 1:
+            raise ValueError("scale must be in (0, 1]")
+        self.color_names = list(color_ranges.keys())
+        self.min_area = min_area
+        self.scale = scale
+        self.blur_size = (_scaled_odd(blur_size, scale),) * 2
+        self.kernel = np.ones((_scaled_odd(kernel_size, scale),) * 2, np.uint8)
+        self.morph_iterations = morph_iterations
+        # OpenCV's area averaging has a fast path for integer factors (1/2, 1/3, 1/4, ...);
+        # other factors fall back to a much slower generic path, where bilinear is used instead
+        self._interpolation = cv.INTER_AREA if abs(1 / scale - round(1 / scale)) < 1e-6 else cv.INTER_LINEAR
+
+        # Combined cleaned mask of the last frame, for debug views (overwritten by the next frame)
+        self.last_mask = None
+        # Seconds spent per stage on the last frame (summed over its regions)
+        self.last_timings = dict.fromkeys(self.STAGES, 0.0)
+
+        # Reused per-resolution buffers for the hot loop
+        self.arena = FrameBufferArena()
+
+        # Group ranges sharing a color and S/V bounds so e.g. Red's two hue bands use one bit
+        groups = {}
+        for color_name, ranges in color_ranges.items():
+            for lower_bound, upper_bound in ranges:
+                lower = [int(np.clip(v, 0, 255)) for v in lower_bound]
+                upper = [int(np.clip(v, 0, 255)) for v in upper_bound]
+                key = (color_name, lower[1], upper[1], lower[2], upper[2])
+                groups.setdefault(key, []).append((lower[0], upper[0]))
+        if len(groups) > 8:
+            raise ValueError("ColorSegmenter supports at most 8 distinct color/saturation/value ranges")
+
+        # Bit flags per color, and per-channel tables: bit i is set where the value is inside group i
+        self.color_flags = {color_name: 0 for color_name in self.color_names}
+        self._hue_lut = np.zeros(256, dtype=np.uint8)
+        self._sat_lut = np.zeros(256, dtype=np.uint8)
+        self._val_lut = np.zeros(256, dtype=np.uint8)
+        for bit, ((color_name, s_low, s_high, v_low, v_high), hue_ranges) in enumerate(groups.items()):
+            flag = np.uint8(1 << bit)
+            self.color_flags[color_name] |= int(flag)
+            for h_low, h_high in hue_ranges:
+                self._hue_lut[h_low:h_high + 1] |= flag
+            self._sat_lut[s_low:s_high + 1] |= flag
+            self._val_lut[v_low:v_high + 1] |= flag
+
+        self._enabled_hue_luts = {}
+
+    def _enabled(self, enabled_colors) -> frozenset:
+        return frozenset(self.color_names if enabled_colors is None else enabled_colors)
+
+    def _hue_lut_for(self, enabled: frozenset) -> np.ndarray:
+        """Hue table with the bits of disabled colors cleared."""
+        lut = self._enabled_hue_luts.get(enabled)
+        if lut is None:
+            enabled_flags = 0
+            for color_name in enabled:
+                enabled_flags |= self.color_flags.get(color_name, 0)
+            lut = self._hue_lut & np.uint8(enabled_flags)
+            self._enabled_hue_luts[enabled] = lut
+        return lut
+
+    def classify(self, hsv_frame: np.ndarray, enabled_colors=None, reserve: tuple = None) -> np.ndarray:
+        """
+        Classify every pixel of an HSV frame against all enabled colors at once.
+
+        Args:
+            hsv_frame (np.ndarray): 8-bit HSV frame
+            enabled_colors: Iterable of color names to detect (default: all)
+            reserve (tuple): (height, width) the arena buffers are sized for, when
+                hsv_frame is a region of a larger frame (default: hsv_frame's own)
+
+        Returns:
+            np.ndarray: uint8 flag image (an arena buffer); a pixel matches a color when
+            it shares a bit with ``color_flags[color_name]``
+        """
+        shape = hsv_frame.shape[:2]
+        reserve = reserve or shape
+        channels = cv.split(hsv_frame, [self.arena.get(name, shape, reserve=reserve)
+                                        for name in ('hue', 'saturation', 'value')])
+        flags = cv.LUT(channels[0], self._hue_lut_for(self._enabled(enabled_colors)),
+                       dst=self.arena.get('flags', shape, reserve=reserve))
+
+        # The channel buffers are no longer needed, so each table lookup reuses its own
+        for channel, lut in ((channels[1], self._sat_lut), (channels[2], self._val_lut)):
+            cv.bitwise_and(flags, cv.LUT(channel, lut, dst=channel), dst=flags)
+        return flags
+
+    def segment(self, frame: np.ndarray, enabled_colors=None, min_area=None, regions=None) -> list[ColorBlob]:
+        """
+        Find all blobs of the enabled colors in a BGR frame.
+
+        Args:
+            frame (np.ndarray): Input BGR frame
+            enabled_colors: Iterable of color names to detect (default: all)
+            min_area (int): Override for the minimum contour area
+            regions: Optional list of (x, y, w, h) regions to restrict segmentation to,
+                e.g. the changed regions reported by cv_utils.motion.MotionGate
+
+        Returns:
+            list[ColorBlob]: Detected blobs in frame coordinates, grouped in color order
+        """
+        if min_area is None:
+            min_area = self.min_area
+        enabled = self._enabled(enabled_colors)
+        self.last_timings = dict.fromkeys(self.STAGES, 0.0)
+
+        if regions is None:
+            return self._segment_scaled(frame, enabled, min_area, frame.shape)
+
+        # Regions change size from frame to frame; they are segmented in views of full-frame buffers
+        blobs = []
+        for x, y, w, h in regions:
+            for blob in self._segment_scaled(frame[y:y + h, x:x + w], enabled, min_area, frame.shape):
+                blob.x += x
+                blob.y += y
+                blobs.append(blob)
+        return blobs
+
+    def _segment_scaled(self, frame: np.ndarray, enabled: frozenset, min_area, reserve: tuple) -> list[ColorBlob]:
+        """
+        Segment a frame (or a region of one whose full shape is reserve) at the
+        processing scale, with blobs in frame coordinates.
+        """
+        if self.scale == 1:
+            return self._segment(frame, enabled, min_area, reserve)
+
+        # Segment a downscaled copy and map the blobs back to full resolution
+        start = time.perf_counter()
+        h, w = frame.shape[:2]
+        size = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+        reserve = (max(1, round(reserve[0] * self.scale)), max(1, round(reserve[1] * self.scale)), reserve[2])
+        scaled = self.arena.get('scaled', (size[1], size[0], frame.shape[2]), reserve=reserve)
+        small = cv.resize(frame, size, dst=scaled, interpolation=self._interpolation)
+        self._record("blur_hsv", start)
+        sx, sy = w / size[0], h / size[1]
+        blobs = self._segment(small, enabled, min_area / (sx * sy), reserve)
+        for blob in blobs:
+            x2, y2 = min(round((blob.x + blob.w) * sx), w), min(round((blob.y + blob.h) * sy), h)
+            blob.x, blob.y = round(blob.x * sx), round(blob.y * sy)
+            blob.w, blob.h = x2 - blob.x, y2 - blob.y
+            blob.area *= sx * sy
+        return blobs
+
+    def _record(self, stage: str, start: float) -> float:
+        """Add the time since start to a stage of last_timings; returns the current time."""
+        now = time.perf_counter()
+        self.last_timings[stage] += now - start
+        return now
+
+    def _segment(self, frame: np.ndarray, enabled: frozenset, min_area, reserve: tuple) -> list[ColorBlob]:
+        """Segment a frame at its own resolution, in arena buffers sized for reserve."""
+        shape = frame.shape[:2]
+
+        start = time.perf_counter()
+        blurred_frame = cv.GaussianBlur(frame, self.blur_size, 0,
+                                        dst=self.arena.get('blurred', frame.shape, reserve=reserve))
+        hsv_frame = cv.cvtColor(blurred_frame, cv.COLOR_BGR2HSV,
+                                dst=self.arena.get('hsv', frame.shape, reserve=reserve))
+        start = self._record("blur_hsv", start)
+        flags = self.classify(hsv_frame, enabled, reserve[:2])
+
+        # Clean up all colors at once on the combined foreground mask
+        mask = self.arena.get('mask', shape, reserve=reserve[:2])
+        scratch = self.arena.get('scratch', shape, reserve=reserve[:2])
+        cv.threshold(flags, 0, 255, cv.THRESH_BINARY, dst=mask)
+        cv.erode(mask, self.kernel, dst=scratch, iterations=self.morph_iterations)
+        cv.dilate(scratch, self.kernel, dst=mask, iterations=self.morph_iterations)
+        cv.bitwise_and(flags, mask, dst=flags)
+        self.last_mask = mask
+        start = self._record("segmentation", start)
+
+        blobs = []
+        for color_name in self.color_names:
+            if color_name not in enabled:
+                continue
+            color_mask = cv.bitwise_and(flags, self.color_flags[color_name], dst=scratch)
+            if not cv.countNonZero(color_mask):
+                continue
+
+            contours, _ = cv.findContours(color_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+            for contour in contours:
+                area = cv.contourArea(contour)
+                if area > min_area:
+                    x, y, w, h = cv.boundingRect(contour)
+                    blobs.append(ColorBlob(color_name, x, y, w, h, area))
+        self._record("contours", start)
+        return blobs
+
+
+def _scaled_odd(size: int, scale: float) -> int:
+    """Kernel size scaled to the processing resolution, kept odd and at least 1."""
+    return max(1, int(round(size * scale)) // 2 * 2 + 1)
+
+
+def draw_color_blobs(frame: np.ndarray, blobs: list[ColorBlob], box_colors: dict, label=None) -> np.ndarray:
+    """
+    Draw a bounding box and label for each blob onto the frame in place.
+
+    Args:
+        frame (np.ndarray): BGR frame to draw on
+        blobs (list[ColorBlob]): Blobs returned by ColorSegmenter.segment
+        box_colors (dict): Color name to BGR box color, e.g. cv_utils.tracker.BOX_COLORS
+        label (str): Fixed label text (default: the blob's color name)
+
+    Returns:
+        np.ndarray: The same frame, for chaining
+    """
+    for blob in blobs:
+        box_color = box_colors[blob.color]
+        cv.rectangle(frame, (blob.x, blob.y), (blob.x + blob.w, blob.y + blob.h), box_color, 2)
+        cv.putText(frame, label or blob.color, (blob.x, blob.y - 10),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.6, box_color, 2)
+    return frame
@@ -2,6 +2,9 @@ import cv2 as cv
 import numpy as np
 import time
 
+from cv_utils.segmentation import ColorSegmenter, draw_color_blobs
+from cv_utils.motion import MotionGate, update_regional
+
 # -- Configuration Constants --
 # HSV color ranges for primary colors
 # Format: (lower_bound, upper_bound) or tuple of ranges for colors that wrap around HSV spectrum
@@ -36,7 +39,8 @@ LOWER_GREEN = np.array([35, 100, 50])
 UPPER_GREEN = np.array([85, 255, 255])
 
 
-def run_multi_color_tracking_stream(camera_index=0, show_debug_mask=False, min_area=500):
+def run_multi_color_tracking_stream(camera_index=0, show_debug_mask=False, min_area=500, motion_gating=False,
+                                    scale=1.0):
     """
     Initializes the webcam and runs the main loop for real-time multi-color tracking.
     Detects and tracks primary colors (Red, Blue, Yellow, Green) simultaneously.
@@ -45,6 +49,10 @@ def run_multi_color_tracking_stream(camera_index=0, show_debug_mask=False, min_a
         camera_index (int): Index of the camera to use for video color detection.
         show_debug_mask (bool): Whether to show the debug mask window (default: False).
         min_area (int): Minimum contour area threshold to filter out noise (default: 500).
+        motion_gating (bool): Only segment regions that changed since the previous frame and
+            skip static frames (default: False). Useful for static cameras.
+        scale (float): Segment frames downscaled by this factor, e.g. 0.5 to run 1080p cameras
+            on low-end CPUs; boxes are still reported at full resolution (default: 1.0).
     """
     print(f"Starting multi-color tracking on webcam index {camera_index}...")
     print("Tracking colors: Red, Blue, Yellow, Green")
@@ -57,55 +65,32 @@ def run_multi_color_tracking_stream(camera_index=0, show_debug_mask=False, min_a
         print("Error: Could not open video stream.")
         return
     
-    # Set up kernel for morphological operations (Cleaning up the mask)
-    kernel = np.ones((5, 5), np.uint8)
+    # Single-pass segmentation engine shared with the API server
+    segmenter = ColorSegmenter(COLOR_RANGES, min_area=min_area, scale=scale)
+    motion_gate = MotionGate() if motion_gating else None
+    blobs = []
+    frame = None
 
     while True:
-        ret, frame = cap.read()
+        # Decode into the previous frame's buffer instead of allocating a new one
+        ret, frame = cap.read(frame)
         if not ret:
             print("Error: Could not read frame from video stream.")
             time.sleep(1)  # Wait a moment before retrying again
             continue
     
-        # Core CV pipeline for color tracking
-        blurred_frame = cv.GaussianBlur(frame, (11, 11), 0)
-        hsv_frame = cv.cvtColor(blurred_frame, cv.COLOR_BGR2HSV)
+        # Core CV pipeline for color tracking: all colors are classified in one pass
+        if motion_gate is None:
+            blobs = segmenter.segment(frame)
+        else:
+            blobs = update_regional(motion_gate.update(frame), blobs,
+                                    lambda regions: segmenter.segment(frame, regions=regions), lambda blob: blob.bbox)
+
+        # Draw the rectangle and label of each blob in its box color
+        draw_color_blobs(frame, blobs, BOX_COLORS)
 
         # Combined mask for debug view (if enabled)
-        combined_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
-
-        # Detect each color
-        for color_name, ranges in COLOR_RANGES.items():
-            # Create mask for this color (combine multiple ranges if needed)
-            color_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
-            
-            for lower_bound, upper_bound in ranges:
-                mask = cv.inRange(hsv_frame, lower_bound, upper_bound)
-                color_mask = cv.bitwise_or(color_mask, mask)
-            
-            # Clean up the mask with morphological operations
-            color_mask = cv.erode(color_mask, kernel, iterations=2)
-            color_mask = cv.dilate(color_mask, kernel, iterations=2)
-            
-            # Add to combined mask for debug view
-            combined_mask = cv.bitwise_or(combined_mask, color_mask)
-
-            # Contour Detection
-            contours, _ = cv.findContours(color_mask.copy(), cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
-
-            if len(contours) > 0:
-                # Process each contour that meets the minimum area threshold
-                for contour in contours:
-                    if cv.contourArea(contour) > min_area:
-                        x, y, w, h = cv.boundingRect(contour)
-                        
-                        # Get the color for this bounding box
-                        box_color = BOX_COLORS[color_name]
-                        
-                        # Draw the rectangle and label on the frame
-                        cv.rectangle(frame, (x, y), (x + w, y + h), box_color, 2)
-                        cv.putText(frame, f"{color_name}", (x, y - 10), 
-                                   cv.FONT_HERSHEY_SIMPLEX, 0.6, box_color, 2)
+        combined_mask = segmenter.last_mask
         
         # Display the resulting frame
         cv.imshow("Real-Time Multi-Color Tracker", frame)
@@ -121,6 +106,10 @@ def run_multi_color_tracking_stream(camera_index=0, show_debug_mask=False, min_a
     # Release resources i.e. clean up
     cap.release()
     cv.destroyAllWindows()
+    if motion_gate is not None:
+        stats = motion_gate.stats()
+        print(f"Motion gating skipped {stats['skipped_fraction']:.0%} of frames and "
+              f"{1 - stats['processed_pixel_fraction']:.0%} of pixels.")
     print("Webcam stream ended. Program finished with success!")
 
 
@@ -144,8 +133,8 @@ def run_color_tracking_stream(lower_bound=LOWER_GREEN, upper_bound=UPPER_GREEN,
         print("Error: Could not open video stream.")
         return
     
-    # Set up kernel for morphological operations (Cleaning up the mask)
-    kernel = np.ones((5, 5), np.uint8)
+    # Single-range segmenter for the custom color
+    segmenter = ColorSegmenter({'Custom': [(lower_bound, upper_bound)]}, min_area=500)  # Minimum area threshold
 
     while True:
         ret, frame = cap.read()
@@ -155,28 +144,15 @@ def run_color_tracking_stream(lower_bound=LOWER_GREEN, upper_bound=UPPER_GREEN,
             continue
     
         # Core CV pipeline for color tracking
-        blurred_frame = cv.GaussianBlur(frame, (11, 11), 0)
-        hsv_frame = cv.cvtColor(blurred_frame, cv.COLOR_BGR2HSV)
-
-        # Masking and Isolation 
-        mask = cv.inRange(hsv_frame, lower_bound, upper_bound)
-        mask = cv.erode(mask, kernel, iterations=2)
-        mask = cv.dilate(mask, kernel, iterations=2)
-
-        # Contour Detection
-        contours, _ = cv.findContours(mask.copy(), cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
-
-        if len(contours) > 0:
-            # Find the largest contour and compute its minimum enclosing circle
-            largest_contour = max(contours, key=cv.contourArea)
-            
-            if cv.contourArea(largest_contour) > 500:  # Minimum area threshold
-                x, y, w, h = cv.boundingRect(largest_contour)
-                
-                # Draw the rectangle and centroid on the frame
-                cv.rectangle(frame, (int(x), int(y)), (int(x + w), int(y + h)), (0, 255, 255), 2)
-                cv.putText(frame, "Tracking Custom Object", (int(x), int(y) - 10), 
-                           cv.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)  
+        blobs = segmenter.segment(frame)
+        mask = segmenter.last_mask
+
+        if blobs:
+            # Track only the largest blob
+            largest_blob = max(blobs, key=lambda blob: blob.area)
+
+            # Draw the rectangle and label on the frame
+            draw_color_blobs(frame, [largest_blob], {'Custom': (0, 255, 255)}, label="Tracking Custom Object")
         
         # Display the resulting frame
         cv.imshow("Real-Time Color Tracker", frame)
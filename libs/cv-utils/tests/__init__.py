@@ -0,0 +1 @@
+"""cv-utils unit tests."""
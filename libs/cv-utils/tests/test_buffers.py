@@ -0,0 +1,77 @@
+"""Frame buffer arena unit tests."""
+
+import tracemalloc
+
+import numpy as np
+
+from cv_utils.buffers import FrameBufferArena
+from cv_utils.segmentation import ColorSegmenter
+from cv_utils.tracker import COLOR_RANGES
+
+
+def test_arena_reuses_buffers_for_same_shape():
+    arena = FrameBufferArena()
+    first = arena.get('mask', (480, 640))
+    second = arena.get('mask', (480, 640))
+
+    assert first is second
+    assert arena.allocations == 1
+    assert arena.nbytes == 480 * 640
+
+
+def test_arena_reallocates_on_resolution_change():
+    arena = FrameBufferArena()
+    arena.get('mask', (480, 640))
+    resized = arena.get('mask', (720, 1280))
+
+    assert resized.shape == (720, 1280)
+    assert arena.allocations == 2
+    assert arena.stats()['nbytes'] == 720 * 1280
+
+
+def test_segmenter_steady_state_does_not_allocate_frames():
+    frame = np.random.default_rng(0).integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    segmenter = ColorSegmenter(COLOR_RANGES)
+    segmenter.segment(frame)
+    allocations = segmenter.arena.allocations
+
+    tracemalloc.start()
+    for _ in range(3):
+        segmenter.segment(frame)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert segmenter.arena.allocations == allocations
+    # Contour lists are small; any per-frame image would be at least 720 * 1280 bytes
+    assert peak < 720 * 1280 // 4
+
+
+def test_reserved_buffers_hand_out_views_of_any_smaller_shape():
+    arena = FrameBufferArena()
+    region = arena.get('mask', (100, 200), reserve=(480, 640))
+    other = arena.get('mask', (240, 50), reserve=(480, 640))
+
+    assert region.shape == (100, 200) and other.shape == (240, 50)
+    assert other.flags['C_CONTIGUOUS']
+    assert np.shares_memory(region, other)
+    assert arena.allocations == 1
+    assert arena.nbytes == 480 * 640
+
+
+def test_segmenting_changing_regions_does_not_allocate():
+    rng = np.random.default_rng(0)
+    frame = np.full((720, 1280, 3), 90, dtype=np.uint8)
+    segmenter = ColorSegmenter(COLOR_RANGES)
+    segmenter.segment(frame, regions=[(0, 0, 64, 48)])
+    allocations = segmenter.arena.stats()['allocations']
+
+    # A blob moving across the frame: the changed regions differ in size and place every frame
+    for i in range(20):
+        x = 40 * i
+        frame[:] = 90
+        frame[300:380, x:x + 80] = (0, 0, 220)
+        w, h = int(rng.integers(100, 400)), int(rng.integers(100, 400))
+        blobs = segmenter.segment(frame, regions=[(max(0, x - 20), 280, w, h), (900, 0, 380, 720)])
+        assert [blob.color for blob in blobs] == ['Red']
+
+    assert segmenter.arena.stats()['allocations'] == allocations
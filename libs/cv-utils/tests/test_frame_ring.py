@@ -0,0 +1,85 @@
+"""Shared memory frame ring tests."""
+
+import numpy as np
+import pytest
+
+from cv_utils.frame_ring import FrameRef, FrameRing, find_frame
+
+SHAPE = (48, 64, 3)
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(SHAPE, slots=3)
+    yield ring
+    ring.close()
+
+
+def test_slots_are_reused_only_when_released(ring):
+    slots = [ring.acquire() for _ in range(3)]
+    assert sorted(slots) == [0, 1, 2]
+    assert ring.acquire() is None
+    assert ring.stats()["overruns"] == 1
+
+    ring.retain(slots[1])
+    ring.release(slots[1])
+    assert ring.acquire() is None
+
+    ring.release(slots[1])
+    assert ring.acquire() == slots[1]
+    with pytest.raises(ValueError):
+        ring.release(slots[0])
+        ring.release(slots[0])
+
+
+def test_release_after_close_is_ignored():
+    ring = FrameRing(SHAPE, slots=2)
+    slot = ring.acquire()
+    ring.close()
+
+    # A frame still in flight when its pipeline stopped
+    ring.release(slot)
+    assert ring.closed
+
+
+def test_closed_ring_reports_no_slots_in_use():
+    ring = FrameRing(SHAPE, slots=2)
+    ring.acquire()
+    frame = np.zeros(SHAPE, np.uint8)
+    ring.close()
+
+    assert ring.stats()["in_use"] == 0
+    assert ring.locate(frame) is None
+
+
+def test_views_share_memory_with_attached_readers(ring):
+    slot = ring.acquire()
+    view = ring.view(slot)
+    view[:] = 7
+    ring.publish(slot, 42)
+
+    reader = FrameRing.attach(ring.name, SHAPE, 3)
+    try:
+        frame = reader.resolve(find_frame(view))
+        assert not frame.flags.owndata and (frame == 7).all()
+
+        view[0, 0] = 9
+        assert (frame[0, 0] == 9).all()
+
+        ring.publish(slot, 43)
+        # The slot now holds another frame
+        with pytest.raises(ValueError):
+            reader.resolve(FrameRef(ring.name, 3, SHAPE, '|u1', slot, 42))
+        del frame
+    finally:
+        reader.close()
+
+
+def test_find_frame_only_matches_whole_slots(ring):
+    slot = ring.acquire()
+    ring.publish(slot, 5)
+
+    ref = find_frame(ring.view(slot))
+    assert (ref.name, ref.slot, ref.sequence) == (ring.name, slot, 5)
+    assert find_frame(ring.view(slot)[:10]) is None
+    assert find_frame(np.zeros(SHAPE, np.uint8)) is None
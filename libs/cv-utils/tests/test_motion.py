@@ -0,0 +1,69 @@
+"""Motion gating unit tests."""
+
+import cv2 as cv
+import numpy as np
+
+from cv_utils.motion import MotionGate, expand_regions, merge_overlapping, update_regional
+from cv_utils.segmentation import ColorSegmenter
+from cv_utils.tracker import COLOR_RANGES
+
+RED = (0, 0, 220)
+BLUE = (220, 40, 0)
+
+
+def scene(red_x, shape=(480, 640)):
+    """Static blue square and a red square that moves horizontally."""
+    frame = np.full((*shape, 3), 90, dtype=np.uint8)
+    cv.rectangle(frame, (400, 300), (480, 380), BLUE, -1)
+    cv.rectangle(frame, (red_x, 60), (red_x + 60, 120), RED, -1)
+    return frame
+
+
+def test_static_frames_are_skipped():
+    gate = MotionGate(refresh_interval=0)
+    first = gate.update(scene(50))
+    second = gate.update(scene(50))
+
+    assert first.moved and first.full_frame
+    assert not second.moved
+    assert gate.stats()['skipped_fraction'] == 0.5
+
+
+def test_changed_regions_cover_the_motion_only():
+    gate = MotionGate(refresh_interval=0)
+    gate.update(scene(50))
+    result = gate.update(scene(80))
+
+    assert result.moved and not result.full_frame
+    assert len(result.regions) == 1
+    x, y, w, h = result.regions[0]
+    # Covers the old and new red square, not the static blue one
+    assert x <= 50 and x + w >= 140 and y <= 60 and y + h >= 120
+    assert x + w < 400
+    assert gate.stats()['processed_pixel_fraction'] < 0.6
+
+
+def test_gated_segmentation_matches_full_frame():
+    segmenter = ColorSegmenter(COLOR_RANGES)
+    gate = MotionGate(refresh_interval=0)
+    blobs = []
+    for red_x in (50, 50, 80, 110, 110):
+        frame = scene(red_x)
+        blobs = update_regional(gate.update(frame), blobs,
+                                lambda regions: segmenter.segment(frame, regions=regions), lambda blob: blob.bbox)
+        expected = segmenter.segment(frame)
+        assert sorted((b.color, b.bbox) for b in blobs) == sorted((b.color, b.bbox) for b in expected)
+    assert gate.skipped_frames == 2
+
+
+def test_refresh_forces_full_frame():
+    gate = MotionGate(refresh_interval=3)
+    results = [gate.update(scene(50)) for _ in range(4)]
+
+    assert [r.full_frame for r in results] == [True, False, False, True]
+
+
+def test_region_helpers():
+    assert merge_overlapping([(0, 0, 10, 10), (5, 5, 20, 20), (30, 30, 40, 40)]) == [(0, 0, 20, 20), (30, 30, 40, 40)]
+    # A box partly inside a region pulls the whole box in
+    assert expand_regions([(0, 0, 10, 10)], [(5, 5, 20, 20), (50, 50, 5, 5)]) == [(0, 0, 25, 25)]
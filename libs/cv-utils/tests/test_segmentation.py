@@ -0,0 +1,123 @@
+"""Color segmentation engine unit tests."""
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from cv_utils.segmentation import ColorSegmenter, draw_color_blobs
+from cv_utils.tracker import BOX_COLORS, COLOR_RANGES
+
+# BGR colors inside the Red, Blue, Yellow and Green HSV ranges
+SWATCHES = {
+    'Red': (0, 0, 220),
+    'Blue': (220, 40, 0),
+    'Yellow': (0, 220, 220),
+    'Green': (0, 200, 0),
+}
+
+
+def make_frame():
+    frame = np.full((240, 320, 3), 90, dtype=np.uint8)
+    for i, bgr in enumerate(SWATCHES.values()):
+        cv.rectangle(frame, (10 + i * 75, 40), (70 + i * 75, 120), bgr, -1)
+    # Speck too small to survive cleanup and the area threshold
+    cv.rectangle(frame, (150, 200), (153, 203), SWATCHES['Red'], -1)
+    return frame
+
+
+def legacy_boxes(frame, min_area=500):
+    """Reference implementation: the original per-color loop."""
+    kernel = np.ones((5, 5), np.uint8)
+    hsv_frame = cv.cvtColor(cv.GaussianBlur(frame, (11, 11), 0), cv.COLOR_BGR2HSV)
+    boxes = []
+    for color_name, ranges in COLOR_RANGES.items():
+        color_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+        for lower_bound, upper_bound in ranges:
+            color_mask = cv.bitwise_or(color_mask, cv.inRange(hsv_frame, lower_bound, upper_bound))
+        color_mask = cv.dilate(cv.erode(color_mask, kernel, iterations=2), kernel, iterations=2)
+        contours, _ = cv.findContours(color_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+        boxes += [(color_name, cv.boundingRect(c)) for c in contours if cv.contourArea(c) > min_area]
+    return sorted(boxes)
+
+
+def test_segment_matches_per_color_loop():
+    frame = make_frame()
+    blobs = ColorSegmenter(COLOR_RANGES).segment(frame)
+
+    assert sorted((blob.color, blob.bbox) for blob in blobs) == legacy_boxes(frame)
+    assert {blob.color for blob in blobs} == set(SWATCHES)
+
+
+def test_classify_matches_in_range_for_every_color():
+    segmenter = ColorSegmenter(COLOR_RANGES)
+    rng = np.random.default_rng(0)
+    hsv = rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    hsv[..., 0] %= 181
+
+    flags = segmenter.classify(hsv)
+    for color_name, ranges in COLOR_RANGES.items():
+        expected = np.zeros(hsv.shape[:2], dtype=bool)
+        for lower_bound, upper_bound in ranges:
+            expected |= cv.inRange(hsv, lower_bound, upper_bound) > 0
+        np.testing.assert_array_equal((flags & segmenter.color_flags[color_name]) > 0, expected)
+
+
+def test_disabled_colors_are_skipped():
+    blobs = ColorSegmenter(COLOR_RANGES).segment(make_frame(), enabled_colors={'Blue', 'Green'})
+
+    assert sorted(blob.color for blob in blobs) == ['Blue', 'Green']
+
+
+def test_min_area_override():
+    segmenter = ColorSegmenter(COLOR_RANGES)
+
+    assert segmenter.segment(make_frame(), min_area=10_000) == []
+
+
+def test_too_many_ranges_rejected():
+    ranges = {f'c{i}': [(np.array([i, 0, i]), np.array([i, 255, i]))] for i in range(9)}
+    with pytest.raises(ValueError):
+        ColorSegmenter(ranges)
+
+
+def test_draw_color_blobs_draws_in_place():
+    frame = make_frame()
+    blobs = ColorSegmenter(COLOR_RANGES).segment(frame)
+    before = frame.copy()
+
+    assert draw_color_blobs(frame, blobs, BOX_COLORS) is frame
+    assert not np.array_equal(before, frame)
+
+
+@pytest.mark.parametrize('scale', [0.5, 0.25])
+def test_downscaled_segmentation_maps_boxes_back(scale):
+    frame = cv.resize(make_frame(), None, fx=4, fy=4, interpolation=cv.INTER_NEAREST)
+    full = sorted((b.color, b.bbox) for b in ColorSegmenter(COLOR_RANGES).segment(frame))
+    scaled = sorted((b.color, b.bbox) for b in ColorSegmenter(COLOR_RANGES, scale=scale).segment(frame))
+
+    # Same blobs, with boxes accurate to about one processing pixel
+    assert [color for color, _ in scaled] == [color for color, _ in full]
+    for (_, box), (_, expected) in zip(scaled, full):
+        assert np.abs(np.subtract(box, expected)).max() <= 2 / scale
+
+
+def test_downscaled_min_area_refers_to_full_resolution():
+    frame = make_frame()
+    segmenter = ColorSegmenter(COLOR_RANGES, scale=0.5)
+
+    assert len(segmenter.segment(frame, min_area=4000)) == 4
+    assert len(segmenter.segment(frame, min_area=6000)) == 0
+
+
+def test_stage_timings_cover_every_region():
+    segmenter = ColorSegmenter(COLOR_RANGES)
+    frame = make_frame()
+
+    segmenter.segment(frame)
+    full = dict(segmenter.last_timings)
+    assert list(full) == list(ColorSegmenter.STAGES)
+    assert all(seconds > 0 for seconds in full.values())
+
+    # Timings restart with each frame and add up over its regions
+    segmenter.segment(frame, regions=[(0, 0, 160, 240), (160, 0, 160, 240)])
+    assert all(seconds > 0 for seconds in segmenter.last_timings.values())
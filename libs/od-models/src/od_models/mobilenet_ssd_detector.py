@@ -2,6 +2,16 @@ import cv2 as cv
 import numpy as np
 import os
 import sys
+import threading
+import time
+
+from od_models.postprocess import assign_positions, decode_ssd, non_max_suppression, to_dicts
+from od_models.rendering import DetectionRenderer
+
+# Default model files shipped next to this module (the caffemodel is downloaded on first use)
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'MobileNetSSD_deploy.caffemodel')
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'MobileNetSSD_deploy.prototxt')
+
 
 class MobileNetSSDDetector:
     """
@@ -9,27 +19,36 @@ class MobileNetSSDDetector:
     Much faster than YOLOv8n while maintaining good accuracy.
     """
 
-    def __init__(self, model_path=None, config_path=None, confidence_threshold=0.3, nms_threshold=0.4, top_k=10):
+    def __init__(self, model_path=None, config_path=None, confidence_threshold=0.3, nms_threshold=0.4, top_k=10,
+                 input_size=(320, 320)):
         """
         Initialize the MobileNet SSD detector.
 
+        Loading the network is expensive; prefer `get_detector()` which caches one
+        instance per configuration for the whole process.
+
         Args:
             model_path: Path to .caffemodel file
             config_path: Path to .prototxt file
             confidence_threshold: Minimum confidence for detections (default: 0.3 for more detections)
             nms_threshold: Non-Maximum Suppression threshold (default: 0.4)
             top_k: Maximum number of detections to keep (default: 10)
+            input_size: Network input size as (width, height) (default: 320x320)
         """
         # Default paths (will download if not found)
         if model_path is None:
-            model_path = os.path.join(os.path.dirname(__file__), 'MobileNetSSD_deploy.caffemodel')
+            model_path = DEFAULT_MODEL_PATH
         if config_path is None:
-            config_path = os.path.join(os.path.dirname(__file__), 'MobileNetSSD_deploy.prototxt')
+            config_path = DEFAULT_CONFIG_PATH
 
         self.confidence_threshold = confidence_threshold
         self.nms_threshold = nms_threshold
         self.top_k = top_k
-        self.input_size = (320, 320)  # Increased from 300x300 for better accuracy
+        self.input_size = tuple(input_size)  # Increased from 300x300 for better accuracy
+
+        # cv.dnn.Net is not safe for concurrent setInput/forward calls, so executor
+        # threads sharing this detector take turns on the network
+        self._lock = threading.Lock()
 
         # COCO class names for MobileNet SSD
         self.classes = [
@@ -39,12 +58,16 @@ class MobileNetSSDDetector:
             "sofa", "train", "tvmonitor"
         ]
 
-        # Load the model
-        self.net = cv.dnn.readNetFromCaffe(config_path, model_path)
+        # Label sprites and class colors are cached by the renderer
+        self.renderer = DetectionRenderer(self.classes, self._get_color_for_class)
 
-        # Try to download model files if they don't exist
+        # Try to download model files if they don't exist, otherwise load the model
+        start = time.perf_counter()
         if not os.path.exists(model_path) or not os.path.exists(config_path):
             self._download_models(model_path, config_path)
+        else:
+            self.net = cv.dnn.readNetFromCaffe(config_path, model_path)
+        self.load_seconds = time.perf_counter() - start
 
     def _download_models(self, model_path, config_path):
         """Download MobileNet SSD model files if not present."""
@@ -103,6 +126,22 @@ class MobileNetSSDDetector:
             print("Please download manually and place in the od-models directory")
             raise
 
+    def detect(self, frame: np.ndarray) -> list[dict]:
+        """
+        Detect objects in a frame without drawing anything.
+
+        Args:
+            frame: Input BGR frame
+
+        Returns:
+            list: Detection dicts with 'class_id', 'class_name', 'confidence', 'bbox' and 'position'
+        """
+        return self.detect_batch([frame])[0]
+
+    def draw(self, frame: np.ndarray, detections) -> np.ndarray:
+        """Draw detections returned by detect()/detect_batch() onto the frame in place."""
+        return self.renderer.draw(frame, detections)
+
     def detect_and_draw(self, frame: np.ndarray) -> tuple[np.ndarray, list[dict]]:
         """
         Detect objects in frame and draw bounding boxes with optimizations.
@@ -113,103 +152,81 @@ class MobileNetSSDDetector:
         Returns:
             tuple: (annotated_frame, detections_list)
         """
-        # Prepare input blob with optimized size
-        blob = cv.dnn.blobFromImage(frame, 0.007843, self.input_size, 127.5)
-        self.net.setInput(blob)
-
-        # Forward pass
-        detections_output = self.net.forward()
-
-        # Process detections with optimizations
-        h, w = frame.shape[:2]
-        boxes = []
-        confidences = []
-        class_ids = []
-
-        # Collect all detections above threshold (excluding background)
-        for i in range(detections_output.shape[2]):
-            confidence = detections_output[0, 0, i, 2]
-            class_id = int(detections_output[0, 0, i, 1])
-
-            # Skip background class (class_id = 0) and low confidence detections
-            if class_id == 0 or confidence < self.confidence_threshold:
-                continue
-
-            # Get bounding box coordinates
-            box = detections_output[0, 0, i, 3:7] * np.array([w, h, w, h])
-            x1, y1, x2, y2 = box.astype(int)
-
-            # Ensure coordinates are within frame bounds
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(w, x2), min(h, y2)
-
-            if x2 <= x1 or y2 <= y1:
-                continue
-
-            boxes.append([x1, y1, x2, y2])
-            confidences.append(float(confidence))
-            class_ids.append(class_id)
-
-        # Apply Non-Maximum Suppression
-        if boxes:
-            indices = cv.dnn.NMSBoxes(boxes, confidences, self.confidence_threshold, self.nms_threshold)
-
-            # Keep only top-k detections
-            if len(indices) > 0:
-                indices = indices.flatten()[:self.top_k]  # Limit to top-k
-            else:
-                indices = []
-
-            detections = []
-            for idx in indices:
-                x1, y1, x2, y2 = boxes[idx]
-                confidence = confidences[idx]
-                class_id = class_ids[idx]
-                class_name = self.classes[class_id] if class_id < len(self.classes) else f"class_{class_id}"
-
-                # Calculate position for narration
-                center_x = (x1 + x2) // 2
-                center_y = (y1 + y2) // 2
-
-                if center_x < w // 3:
-                    h_pos = "left"
-                elif center_x > 2 * w // 3:
-                    h_pos = "right"
-                else:
-                    h_pos = "center"
+        detections = self.detect(frame)
+        return self.draw(frame, detections), detections
 
-                if center_y < h // 3:
-                    v_pos = "top"
-                elif center_y > 2 * h // 3:
-                    v_pos = "bottom"
-                else:
-                    v_pos = ""
+    def detect_batch(self, frames: list[np.ndarray], draw: bool = False, as_array: bool = False,
+                     timings: dict = None) -> list:
+        """
+        Detect objects in several frames with a single forward pass.
 
-                position = f"{v_pos} {h_pos}".strip() if v_pos else h_pos
+        All frames are resized into one input blob, so the network overhead is paid
+        once per batch instead of once per frame. Frames may come from different
+        cameras and have different resolutions.
 
-                # Store detection
-                detections.append({
-                    'class_name': class_name,
-                    'confidence': confidence,
-                    'bbox': [x1, y1, x2, y2],
-                    'position': position
-                })
+        Args:
+            frames: Input BGR frames
+            draw: Whether to draw bounding boxes and labels onto the frames in place
+            as_array: Return structured arrays (postprocess.DETECTION_DTYPE) instead of dicts
+            timings: Optional dict that receives the seconds spent in each stage of the
+                batch ('preprocess', 'forward', 'nms' and, when drawing, 'draw')
 
-                # Get color for visualization
-                color = self._get_color_for_class(class_id)
+        Returns:
+            list: One detections list (or array) per input frame, in input order
+        """
+        if len(frames) == 0:
+            return []
 
-                # Draw bounding box
-                cv.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        # Prepare input blob with optimized size
+        start = time.perf_counter()
+        blob = cv.dnn.blobFromImages(frames, 0.007843, self.input_size, 127.5)
+        preprocessed = time.perf_counter()
+
+        # Forward pass (the network is shared between threads)
+        with self._lock:
+            self.net.setInput(blob)
+            forward_start = time.perf_counter()
+            detections_output = self.net.forward()
+            forwarded = time.perf_counter()
+
+        # Rows of all images come back together; column 0 holds the image index
+        rows = detections_output[0, 0]
+        image_ids = rows[:, 0]
+        results = []
+        draw_seconds = 0.0
+        for image_id, frame in enumerate(frames):
+            detections = self._process_detections(rows[image_ids == image_id], frame.shape[:2])
+            if draw:
+                draw_start = time.perf_counter()
+                self.renderer.draw(frame, detections)
+                draw_seconds += time.perf_counter() - draw_start
+            results.append(detections if as_array else to_dicts(detections, self.classes))
+
+        if timings is not None:
+            # Waiting for another thread's forward pass is not counted
+            timings["preprocess"] = preprocessed - start
+            timings["forward"] = forwarded - forward_start
+            timings["nms"] = time.perf_counter() - forwarded - draw_seconds
+            if draw:
+                timings["draw"] = draw_seconds
+        return results
+
+    def _process_detections(self, rows: np.ndarray, frame_shape: tuple) -> np.ndarray:
+        """
+        Decode the SSD output rows of one image.
 
-                # Draw label
-                label = f"{class_name}: {confidence:.2f}"
-                (text_w, text_h), _ = cv.getTextSize(label, cv.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                cv.rectangle(frame, (x1, y1 - text_h - 10), (x1 + text_w, y1), color, -1)
-                cv.putText(frame, label, (x1, y1 - 5), cv.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        Args:
+            rows: (N, 7) array of [image_id, class_id, confidence, x1, y1, x2, y2]
+            frame_shape: (height, width) of the source frame
 
-            return frame, detections
+        Returns:
+            np.ndarray: Detections after thresholding, NMS and top-k
+        """
+        detections = decode_ssd(rows, frame_shape, self.confidence_threshold)
+        detections = non_max_suppression(detections, self.confidence_threshold, self.nms_threshold, self.top_k)
 
-        return frame, []
+        # Narration positions are only needed for the few surviving boxes
+        return assign_positions(detections, frame_shape)
 
     def _get_color_for_class(self, class_id):
         """Get consistent color for class visualization."""
@@ -218,11 +235,109 @@ class MobileNetSSDDetector:
         return (int(color[0]), int(color[1]), int(color[2]))
 
 
+# Process-wide detector registry so each network is parsed and loaded only once
+_detectors: dict[tuple, MobileNetSSDDetector] = {}
+_detectors_lock = threading.Lock()
+
+
+def get_detector(model_path=None, config_path=None, confidence_threshold=0.3, nms_threshold=0.4, top_k=10,
+                 input_size=(320, 320)) -> MobileNetSSDDetector:
+    """
+    Return the shared detector for a configuration, loading it on first use.
+
+    Detectors are keyed by model files, thresholds and input size, so every frame,
+    WebSocket client and executor thread asking for the same configuration reuses
+    one loaded network.
+
+    Args:
+        model_path: Path to .caffemodel file (default: bundled model)
+        config_path: Path to .prototxt file (default: bundled config)
+        confidence_threshold: Minimum confidence for detections
+        nms_threshold: Non-Maximum Suppression threshold
+        top_k: Maximum number of detections to keep
+        input_size: Network input size as (width, height)
+
+    Returns:
+        MobileNetSSDDetector: The cached detector instance
+    """
+    key = _detector_key(model_path, config_path, confidence_threshold, nms_threshold, top_k, input_size)
+
+    detector = _detectors.get(key)
+    if detector is None:
+        with _detectors_lock:
+            # Another thread may have finished loading while we waited for the lock
+            detector = _detectors.get(key)
+            if detector is None:
+                detector = MobileNetSSDDetector(*key)
+                _detectors[key] = detector
+    return detector
+
+
+def _detector_key(model_path=None, config_path=None, confidence_threshold=0.3, nms_threshold=0.4, top_k=10,
+                  input_size=(320, 320)) -> tuple:
+    """Registry key, also the MobileNetSSDDetector arguments for the configuration."""
+    return (os.path.abspath(model_path or DEFAULT_MODEL_PATH), os.path.abspath(config_path or DEFAULT_CONFIG_PATH),
+            float(confidence_threshold), float(nms_threshold), int(top_k), tuple(input_size))
+
+
+def clear_detector_cache():
+    """Drop all cached detectors (e.g. after replacing model files on disk)."""
+    with _detectors_lock:
+        _detectors.clear()
+
+
+def is_loaded() -> bool:
+    """Whether the default shared detector has been loaded."""
+    return _detector_key() in _detectors
+
+
+def model_info() -> dict:
+    """Load state and timing of the default shared detector, e.g. for status endpoints."""
+    detector = _detectors.get(_detector_key())
+    return {"loaded": detector is not None, "load_seconds": detector.load_seconds if detector else None}
+
+
+def warmup() -> dict:
+    """
+    Load the default detector and run one forward pass on a blank frame, so the
+    first real frame does not pay for OpenCV's lazy network initialization.
+
+    Returns:
+        dict: model_info() plus the warm-up inference time in seconds
+    """
+    detector = get_detector()
+    start = time.perf_counter()
+    detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+    return {**model_info(), "warmup_seconds": time.perf_counter() - start}
+
+
+def detect(frame: np.ndarray) -> list[dict]:
+    """Detect objects with the shared detector without drawing."""
+    return get_detector().detect(frame)
+
+
+def draw_detections(frame: np.ndarray, detections) -> np.ndarray:
+    """Draw detections from detect() with the shared detector's renderer."""
+    return get_detector().draw(frame, detections)
+
+
 # Convenience function for backward compatibility
 def detect_and_draw(frame: np.ndarray) -> tuple[np.ndarray, list[dict]]:
     """
     Convenience function using MobileNet SSD detector.
     Maintains same interface as YOLO detector.
     """
-    detector = MobileNetSSDDetector()
-    return detector.detect_and_draw(frame)
+    return get_detector().detect_and_draw(frame)
+
+
+def detect_batch(frames: list[np.ndarray], draw: bool = False, as_array: bool = False, timings: dict = None) -> list:
+    """
+    Convenience function running one batched forward pass with the shared detector.
+    Maintains same interface as the YOLO detector's detect_batch.
+    """
+    return get_detector().detect_batch(frames, draw=draw, as_array=as_array, timings=timings)
+
+
+def class_names() -> list[str]:
+    """Class names of the shared detector, indexed by class id."""
+    return get_detector().classes
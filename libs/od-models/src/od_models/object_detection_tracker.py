@@ -1,11 +1,22 @@
-import cv2 as cv
-from ultralytics import YOLO
 import numpy as np
-import sys
+import threading
 import time
 
-# Load a lightweight pre-trained model (i.e. yolov8n.pt)
-MODEL = YOLO('yolov8n.pt')
+from od_models.postprocess import empty_detections, from_xyxy, to_dicts
+from od_models.rendering import DetectionRenderer
+
+# Lightweight pre-trained weights (i.e. yolov8n.pt), loaded on first use
+MODEL_WEIGHTS = 'yolov8n.pt'
+
+# ultralytics/torch are heavy to import and the weights take a while to load, so
+# nothing is loaded at import time; get_model() does both once, on first use
+_model = None
+_renderer = None
+_model_lock = threading.Lock()
+# The ultralytics predictor keeps per-call state, so concurrent callers take turns
+_predict_lock = threading.Lock()
+_load_stats = {"import_seconds": None, "load_seconds": None}
+
 
 # Define a function to map class index to a unique color for visualization
 def get_color_for_class(class_id):
@@ -14,90 +25,156 @@ def get_color_for_class(class_id):
     color = np.random.randint(0, 255 ,3).tolist()
     return (int(color[0]), int(color[1]), int(color[2]))
 
-def detect_and_draw(frame: np.ndarray) -> tuple[np.ndarray, list[dict]]:
-    """
-    Runs YOLOv8 inference on a frame and draws bounding boxes and labels.
 
-    Args:
-        frame (np.ndarray): The input video frame (BGR format)
+def get_model():
+    """
+    Return the shared YOLO model, importing ultralytics and loading the weights on first use.
 
-    Returns:
-        tuple: (annotated_frame, detections_list)
-            - annotated_frame: The frame with detection bounding boxes drawn on it
-            - detections_list: List of detection dictionaries with keys: 'class_name', 'confidence', 'bbox', 'position'
+    Thread-safe: concurrent first calls wait for a single load.
     """
-    detections = []
+    global _model, _renderer
+    if _model is None:
+        with _model_lock:
+            # Another thread may have finished loading while we waited for the lock
+            if _model is None:
+                start = time.perf_counter()
+                from ultralytics import YOLO
+                imported = time.perf_counter()
+                model = YOLO(MODEL_WEIGHTS)
+                _load_stats["import_seconds"] = imported - start
+                _load_stats["load_seconds"] = time.perf_counter() - imported
+
+                # Shared renderer: caches class colors and label sprites across frames
+                _renderer = DetectionRenderer(model.names, get_color_for_class)
+                _model = model
+    return _model
+
+
+def get_renderer() -> DetectionRenderer:
+    """Return the shared renderer (loads the model, which provides the class names)."""
+    get_model()
+    return _renderer
+
+
+def class_names() -> dict:
+    """Class names of the shared model, keyed by class id (loads the model)."""
+    return get_model().names
+
+
+def is_loaded() -> bool:
+    return _model is not None
+
+
+def model_info() -> dict:
+    """Load state and timings of the shared model, e.g. for status endpoints."""
+    return {"loaded": is_loaded(), **_load_stats}
 
-    # Run inference on the frame (conf=0.5 for minimum confidence)
-    results = MODEL.predict(frame, conf=0.5, verbose=False)
 
-    # Process results (should only be one result object per frame)
-    for result in results:
+def warmup() -> dict:
+    """
+    Load the model and run one inference on a blank frame so the first real frame
+    does not pay for lazy initialization.
 
-        # Check if there are any detection in the frame
-        if result.boxes is not None and result.boxes.data.numel() > 0:
-            # The .data tensor contains [coordinates, conf, cls]
-            data = result.boxes.data.cpu().numpy()
+    Returns:
+        dict: model_info() plus the warm-up inference time in seconds
+    """
+    get_model()
+    start = time.perf_counter()
+    detect(np.zeros((480, 640, 3), dtype=np.uint8))
+    return {**model_info(), "warmup_seconds": time.perf_counter() - start}
 
-            # Extract coordinates
-            boxes = data[:, :4].astype(int)
 
-            # Extract confidence scores
-            confidences = data[:, 4]
+def __getattr__(name):
+    # Backward compatibility for code reading the old module-level MODEL global
+    if name == 'MODEL':
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-            # Extract class IDs
-            class_ids = data[:, 5].astype(int)
 
-            for box, conf, class_id in zip(boxes, confidences, class_ids):
-                x1, y1, x2, y2 = box
+def detect(frame: np.ndarray) -> list[dict]:
+    """
+    Runs YOLOv8 inference on a frame without drawing anything.
 
-                # Get the class name
-                class_name = MODEL.names[class_id]
+    Args:
+        frame (np.ndarray): The input video frame (BGR format)
 
-                # Calculate center position for narration
-                center_x = (x1 + x2) // 2
-                center_y = (y1 + y2) // 2
+    Returns:
+        list: Detection dictionaries with keys: 'class_id', 'class_name', 'confidence', 'bbox', 'position'
+    """
+    return detect_batch([frame])[0]
 
-                # Simple position calculation
-                frame_height, frame_width = frame.shape[:2]
-                if center_x < frame_width // 3:
-                    h_pos = "left"
-                elif center_x > 2 * frame_width // 3:
-                    h_pos = "right"
-                else:
-                    h_pos = "center"
 
-                if center_y < frame_height // 3:
-                    v_pos = "top"
-                elif center_y > 2 * frame_height // 3:
-                    v_pos = "bottom"
-                else:
-                    v_pos = ""
+def draw_detections(frame: np.ndarray, detections) -> np.ndarray:
+    """Draws detections returned by detect()/detect_batch() onto the frame in place."""
+    return get_renderer().draw(frame, detections)
 
-                position = f"{v_pos} {h_pos}".strip() if v_pos else h_pos
 
-                # Store detection info
-                detections.append({
-                    'class_name': class_name,
-                    'confidence': float(conf),
-                    'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                    'position': position
-                })
+def detect_and_draw(frame: np.ndarray) -> tuple[np.ndarray, list[dict]]:
+    """
+    Runs YOLOv8 inference on a frame and draws bounding boxes and labels.
 
-                # Get color for visualization
-                color = get_color_for_class(class_id)
+    Args:
+        frame (np.ndarray): The input video frame (BGR format)
 
-                # Draw the bounding box
-                cv.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+    Returns:
+        tuple: (annotated_frame, detections_list)
+            - annotated_frame: The frame with detection bounding boxes drawn on it
+            - detections_list: List of detection dictionaries with keys: 'class_name', 'confidence', 'bbox', 'position'
+    """
+    detections = detect(frame)
+    return draw_detections(frame, detections), detections
 
-                # Create label text (e.g. "person: 0.95")
-                label = f"{class_name}: {conf:.2f}"
 
-                # Draw the label background rectangle
-                (w, h), _ = cv.getTextSize(label, cv.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                cv.rectangle(frame, (x1, y1 - h - 10), (x1 + w, y1), color, -1)
+def detect_batch(frames: list[np.ndarray], draw: bool = False, as_array: bool = False, timings: dict = None) -> list:
+    """
+    Runs YOLOv8 inference on several frames in one batched predict call.
 
-                # Draw the label text
-                cv.putText(frame, label, (x1, y1 - 5), cv.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    Args:
+        frames (list[np.ndarray]): Input video frames (BGR format), possibly from different sources
+        draw (bool): Whether to draw bounding boxes and labels onto the frames in place
+        as_array (bool): Return structured arrays (postprocess.DETECTION_DTYPE) instead of dicts
+        timings (dict): Optional dict that receives the seconds spent in each stage of the batch:
+            'forward' (ultralytics' predict, including its own pre-processing and NMS),
+            'postprocess' and, when drawing, 'draw'
 
-    return frame, detections
+    Returns:
+        list: One detections list (or array) per input frame, in input order
+    """
+    if len(frames) == 0:
+        return []
+
+    # Run inference on all frames at once (conf=0.5 for minimum confidence)
+    model = get_model()
+    with _predict_lock:
+        start = time.perf_counter()
+        results = model.predict(list(frames), conf=0.5, verbose=False)
+        predicted = time.perf_counter()
+
+    # Ultralytics returns one result object per input frame
+    batch = []
+    draw_seconds = 0.0
+    for result, frame in zip(results, frames):
+        detections = _process_result(result, frame)
+        if draw:
+            draw_start = time.perf_counter()
+            _renderer.draw(frame, detections)
+            draw_seconds += time.perf_counter() - draw_start
+        batch.append(detections if as_array else to_dicts(detections, model.names))
+
+    if timings is not None:
+        timings["forward"] = predicted - start
+        timings["postprocess"] = time.perf_counter() - predicted - draw_seconds
+        if draw:
+            timings["draw"] = draw_seconds
+    return batch
+
+
+def _process_result(result, frame: np.ndarray) -> np.ndarray:
+    """Converts one ultralytics result into a structured detection array."""
+    # Check if there are any detection in the frame
+    if result.boxes is None or result.boxes.data.numel() == 0:
+        return empty_detections()
+
+    # The .data tensor contains [coordinates, conf, cls]
+    data = result.boxes.data.cpu().numpy()
+    return from_xyxy(data[:, :4], data[:, 4], data[:, 5].astype(np.int32), frame.shape[:2])
@@ -0,0 +1,187 @@
+import numpy as np
+
+# Compact per-detection record shared by the MobileNet SSD and YOLO detectors.
+# bbox is [x1, y1, x2, y2] in frame pixels; position indexes POSITION_LABELS.
+DETECTION_DTYPE = np.dtype([
+    ('class_id', np.int32),
+    ('confidence', np.float32),
+    ('bbox', np.int32, (4,)),
+    ('position', np.uint8),
+])
+
+# Narration labels for the 3x3 grid of frame regions, indexed by v_index * 3 + h_index
+POSITION_LABELS = (
+    "top left", "top center", "top right",
+    "left", "center", "right",
+    "bottom left", "bottom center", "bottom right",
+)
+
+
+def empty_detections() -> np.ndarray:
+    return np.empty(0, dtype=DETECTION_DTYPE)
+
+
+def position_indices(bboxes: np.ndarray, frame_shape: tuple) -> np.ndarray:
+    """
+    Vectorized narration positions for an (N, 4) array of [x1, y1, x2, y2] boxes.
+
+    Returns:
+        np.ndarray: uint8 indices into POSITION_LABELS
+    """
+    h, w = frame_shape[:2]
+    centers = (bboxes[:, :2] + bboxes[:, 2:]) // 2
+
+    # 0/1/2 for left/center/right and top/middle/bottom, same thresholds as the original per-box code
+    grid = (centers >= (w // 3, h // 3)).astype(np.uint8) + (centers > (2 * w // 3, 2 * h // 3))
+    return grid[:, 1] * 3 + grid[:, 0]
+
+
+def assign_positions(detections: np.ndarray, frame_shape: tuple) -> np.ndarray:
+    """Fill in the position field of detections in place (and return them)."""
+    detections['position'] = position_indices(detections['bbox'], frame_shape)
+    return detections
+
+
+def from_xyxy(bboxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray,
+              frame_shape: tuple, positions: bool = True) -> np.ndarray:
+    """
+    Build a structured detection array from pixel boxes.
+
+    Boxes are truncated to integers, clipped to the frame and dropped if they
+    end up empty.
+
+    Args:
+        bboxes: (N, 4) [x1, y1, x2, y2] boxes in pixels
+        confidences: (N,) detection scores
+        class_ids: (N,) class indices
+        frame_shape: (height, width) of the source frame
+        positions: Compute narration positions now; pass False when most detections
+            will be discarded (e.g. before NMS) and call assign_positions() on the survivors
+
+    Returns:
+        np.ndarray: Detections with DETECTION_DTYPE
+    """
+    h, w = frame_shape[:2]
+    boxes = np.asarray(bboxes).astype(np.int32).reshape(-1, 4)
+
+    # Ensure coordinates are within frame bounds
+    np.clip(boxes, 0, (w, h, w, h), out=boxes)
+
+    # Filter degenerate boxes
+    keep = np.all(boxes[:, 2:] > boxes[:, :2], axis=1)
+
+    detections = np.zeros(np.count_nonzero(keep), dtype=DETECTION_DTYPE)
+    detections['class_id'] = np.asarray(class_ids)[keep]
+    detections['confidence'] = np.asarray(confidences)[keep]
+    detections['bbox'] = boxes[keep]
+    if positions:
+        assign_positions(detections, frame_shape)
+    return detections
+
+
+def decode_ssd(rows: np.ndarray, frame_shape: tuple, confidence_threshold: float) -> np.ndarray:
+    """
+    Decode raw SSD DetectionOutput rows of one image in a single vectorized pass.
+
+    Args:
+        rows: (N, 7) array of [image_id, class_id, confidence, x1, y1, x2, y2] with
+            coordinates normalized to [0, 1]
+        frame_shape: (height, width) of the source frame
+        confidence_threshold: Minimum confidence to keep a row
+
+    Returns:
+        np.ndarray: Detections with DETECTION_DTYPE, without positions (see assign_positions)
+    """
+    h, w = frame_shape[:2]
+
+    # Skip background class (class_id = 0) and low confidence detections
+    rows = rows[(rows[:, 1] != 0) & (rows[:, 2] >= confidence_threshold)]
+    scale = np.array([w, h, w, h], dtype=np.float64)
+    return from_xyxy(rows[:, 3:7] * scale, rows[:, 2], rows[:, 1], frame_shape, positions=False)
+
+
+# Up to this many candidates a full pairwise IoU matrix is cheaper than per-box passes
+_NMS_MATRIX_MAX = 128
+
+
+def non_max_suppression(detections: np.ndarray, confidence_threshold: float, nms_threshold: float,
+                        top_k: int = 0) -> np.ndarray:
+    """
+    Apply greedy Non-Maximum Suppression and keep the top-k highest scoring detections.
+
+    Same selection rule as cv.dnn.NMSBoxes (score above the threshold, IoU of a kept
+    box with every higher-scoring kept box at most nms_threshold), but stops as soon
+    as top_k boxes survive instead of suppressing the whole candidate list first.
+
+    Args:
+        detections: Detections with DETECTION_DTYPE
+        confidence_threshold: Detections must score above this to be kept
+        nms_threshold: IoU threshold above which overlapping boxes are suppressed
+        top_k: Maximum number of detections to keep (0 keeps all)
+
+    Returns:
+        np.ndarray: Surviving detections, highest score first
+    """
+    candidates = detections[detections['confidence'] > confidence_threshold]
+    if len(candidates) == 0:
+        return candidates
+
+    candidates = candidates[np.argsort(-candidates['confidence'], kind='stable')]
+    x1, y1, x2, y2 = candidates['bbox'].astype(np.int64).T
+    areas = (x2 - x1) * (y2 - y1)
+    limit = top_k or len(candidates)
+    keep = []
+
+    if len(candidates) <= _NMS_MATRIX_MAX:
+        # Pairwise overlap test for all candidates at once, then a cheap greedy walk
+        inter = (np.clip(np.minimum.outer(x2, x2) - np.maximum.outer(x1, x1), 0, None) *
+                 np.clip(np.minimum.outer(y2, y2) - np.maximum.outer(y1, y1), 0, None))
+        overlaps = inter > nms_threshold * (areas[:, None] + areas[None, :] - inter)
+        suppressed = np.zeros(len(candidates), dtype=bool)
+        for i in range(len(candidates)):
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            if len(keep) == limit:
+                break
+            suppressed |= overlaps[i]
+        return candidates[keep]
+
+    remaining = np.arange(len(candidates))
+    while remaining.size and len(keep) < limit:
+        best, others = remaining[0], remaining[1:]
+        keep.append(best)
+
+        # IoU of the kept box with every remaining lower-scoring box
+        inter = (np.clip(np.minimum(x2[best], x2[others]) - np.maximum(x1[best], x1[others]), 0, None) *
+                 np.clip(np.minimum(y2[best], y2[others]) - np.maximum(y1[best], y1[others]), 0, None))
+        remaining = others[inter <= nms_threshold * (areas[best] + areas[others] - inter)]
+
+    return candidates[keep]
+
+
+def to_dicts(detections: np.ndarray, class_names) -> list[dict]:
+    """
+    Convert a structured detection array into the dicts returned by the detectors.
+
+    Args:
+        detections: Detections with DETECTION_DTYPE
+        class_names: Sequence or mapping from class index to name
+
+    Returns:
+        list: Dicts with 'class_id', 'class_name', 'confidence', 'bbox' and 'position'
+    """
+    results = []
+    for class_id, confidence, bbox, position in detections.tolist():
+        try:
+            class_name = class_names[class_id]
+        except (IndexError, KeyError):
+            class_name = f"class_{class_id}"
+        results.append({
+            'class_id': class_id,
+            'class_name': class_name,
+            'confidence': confidence,
+            'bbox': bbox.tolist(),
+            'position': POSITION_LABELS[position]
+        })
+    return results
@@ -0,0 +1,160 @@
+import threading
+from collections import OrderedDict
+
+import cv2 as cv
+import numpy as np
+
+
+class DetectionRenderer:
+    """
+    Draws detection boxes and labels, separately from the detectors themselves.
+
+    Detectors only return detections; a renderer is applied when a frame is
+    actually going to be displayed or encoded, so headless consumers (stats,
+    narration, recording metadata) never pay for drawing.
+
+    Labels ("person: 0.95") are composed from cached pieces instead of calling
+    getTextSize/putText every frame: the "person: " part is rasterized once per
+    (class, color) into a sprite (filled background plus white text), and the
+    confidence is stamped from cached masks of its digit glyphs, so a changing
+    confidence never rasterizes text again.
+    """
+
+    def __init__(self, class_names=None, color_for_class=None, font_scale: float = 0.6, thickness: int = 2,
+                 max_sprites: int = 512):
+        """
+        Args:
+            class_names: Sequence or mapping from class index to name, used for structured arrays
+            color_for_class: Callable mapping a class id to a BGR color (default: white)
+            font_scale: Label font scale (default: 0.6)
+            thickness: Box and label stroke thickness (default: 2)
+            max_sprites: Maximum number of cached class label sprites (default: 512)
+        """
+        self.class_names = class_names
+        self.color_for_class = color_for_class or (lambda class_id: (255, 255, 255))
+        self.font_scale = font_scale
+        self.thickness = thickness
+        self.max_sprites = max_sprites
+        self._colors = {}
+        self._sprites = OrderedDict()
+        self._glyphs = {}
+        self._sprites_lock = threading.Lock()
+        self.sprite_hits = 0
+        self.sprite_misses = 0
+        self.glyph_misses = 0
+        (_, text_h), _ = cv.getTextSize("0", cv.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        # Label height, the same for any text: background from y1 - text_h - 10 to y1,
+        # text baseline at y1 - 5 (the layout of the original inline drawing)
+        self._label_h = text_h + 10
+        self._baseline = text_h + 5
+
+    def _color(self, class_id: int) -> tuple:
+        color = self._colors.get(class_id)
+        if color is None:
+            color = self._colors[class_id] = self.color_for_class(class_id)
+        return color
+
+    def _class_name(self, class_id: int) -> str:
+        try:
+            return self.class_names[class_id]
+        except (IndexError, KeyError, TypeError):
+            return f"class_{class_id}"
+
+    def _rasterize(self, text: str, color: tuple) -> tuple:
+        """Render text in white on a background of color; return (sprite, advance in pixels)."""
+        (text_w, _), _ = cv.getTextSize(text, cv.FONT_HERSHEY_SIMPLEX, self.font_scale, self.thickness)
+        sprite = np.empty((self._label_h, text_w, 3), dtype=np.uint8)
+        sprite[:] = color
+        cv.putText(sprite, text, (0, self._baseline), cv.FONT_HERSHEY_SIMPLEX, self.font_scale,
+                   (255, 255, 255), self.thickness)
+        # getTextSize pads the width by the stroke thickness; the next glyph starts before the padding
+        return sprite, text_w - self.thickness
+
+    def class_sprite(self, class_name: str, color: tuple) -> tuple:
+        """Return the cached (sprite, advance) of a class's label prefix, e.g. "person: "."""
+        key = (class_name, color)
+        with self._sprites_lock:
+            cached = self._sprites.get(key)
+            if cached is not None:
+                self._sprites.move_to_end(key)
+                self.sprite_hits += 1
+                return cached
+            self.sprite_misses += 1
+
+        cached = self._rasterize(f"{class_name}: ", color)
+        with self._sprites_lock:
+            self._sprites[key] = cached
+            if len(self._sprites) > self.max_sprites:
+                self._sprites.popitem(last=False)
+        return cached
+
+    def _glyph(self, char: str) -> tuple:
+        """Return the cached (mask of the white text pixels, advance) of one character."""
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            (text_w, _), _ = cv.getTextSize(char, cv.FONT_HERSHEY_SIMPLEX, self.font_scale, self.thickness)
+            # Thick strokes reach a little left of the glyph's origin; keep them in the mask
+            margin = self.thickness
+            mask = np.zeros((self._label_h, text_w + margin), dtype=np.uint8)
+            cv.putText(mask, char, (margin, self._baseline), cv.FONT_HERSHEY_SIMPLEX, self.font_scale,
+                       255, self.thickness)
+            glyph = (mask > 0, text_w - self.thickness)
+            with self._sprites_lock:
+                self.glyph_misses += 1
+                self._glyphs[char] = glyph
+        return glyph
+
+    def label_sprite(self, class_name: str, confidence: float, color: tuple) -> np.ndarray:
+        """Compose the label "<class_name>: <confidence>" on a background of color."""
+        prefix, x = self.class_sprite(class_name, color)
+        glyphs = [self._glyph(char) for char in f"{confidence:.2f}"]
+        width = max(prefix.shape[1], x + sum(advance for _, advance in glyphs) + self.thickness)
+
+        sprite = np.empty((self._label_h, width, 3), dtype=np.uint8)
+        sprite[:] = color
+        sprite[:, :prefix.shape[1]] = prefix
+        for mask, advance in glyphs:
+            left = x - self.thickness
+            region = sprite[:, left:left + mask.shape[1]]
+            region[mask[:, :region.shape[1]]] = 255
+            x += advance
+        return sprite
+
+    def _blit(self, frame: np.ndarray, sprite: np.ndarray, x: int, y: int):
+        """Copy sprite onto frame with its top-left corner at (x, y), clipped to the frame."""
+        frame_h, frame_w = frame.shape[:2]
+        sprite_h, sprite_w = sprite.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + sprite_w, frame_w), min(y + sprite_h, frame_h)
+        if x1 <= x0 or y1 <= y0:
+            return
+        frame[y0:y1, x0:x1] = sprite[y0 - y:y1 - y, x0 - x:x1 - x]
+
+    def draw(self, frame: np.ndarray, detections) -> np.ndarray:
+        """
+        Draw detections onto the frame in place.
+
+        Args:
+            frame: BGR frame to annotate
+            detections: Detection dicts (with 'class_id', 'class_name', 'confidence', 'bbox')
+                or a structured array with postprocess.DETECTION_DTYPE
+
+        Returns:
+            np.ndarray: The same frame, for chaining
+        """
+        if isinstance(detections, np.ndarray):
+            items = [(class_id, self._class_name(class_id), confidence, bbox.tolist())
+                     for class_id, confidence, bbox, _ in detections.tolist()]
+        else:
+            items = [(d['class_id'], d['class_name'], d['confidence'], d['bbox']) for d in detections]
+
+        for class_id, class_name, confidence, (x1, y1, x2, y2) in items:
+            color = self._color(class_id)
+
+            # Draw bounding box
+            cv.rectangle(frame, (x1, y1), (x2, y2), color, self.thickness)
+
+            # Draw label (e.g. "person: 0.95") from the sprite cache
+            sprite = self.label_sprite(class_name, confidence, color)
+            self._blit(frame, sprite, x1, y1 - sprite.shape[0])
+        return frame
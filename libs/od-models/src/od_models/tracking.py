@@ -0,0 +1,294 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import cv2 as cv
+import numpy as np
+
+from od_models.postprocess import POSITION_LABELS, position_indices
+
+
+@dataclass
+class Track:
+    """An object followed across frames."""
+    track_id: int
+    class_id: int
+    confidence: float
+    bbox: np.ndarray  # float [x1, y1, x2, y2] in frame pixels
+    hits: int = 1  # Detections matched to this track
+    misses: int = 0  # Consecutive detection passes without a match
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) [x1, y1, x2, y2] boxes."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    inter = (np.clip(np.minimum.outer(a[:, 2], b[:, 2]) - np.maximum.outer(a[:, 0], b[:, 0]), 0, None) *
+             np.clip(np.minimum.outer(a[:, 3], b[:, 3]) - np.maximum.outer(a[:, 1], b[:, 1]), 0, None))
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+class IoUTracker:
+    """
+    Associates detections with existing tracks by greedy IoU matching.
+
+    Detections only match tracks of the same class. Unmatched detections start
+    new tracks; tracks left unmatched for more than max_misses detection passes
+    are dropped.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_misses: int = 2):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.tracks: list[Track] = []
+        self._next_id = 1
+
+    def update(self, detections: np.ndarray) -> list[Track]:
+        """
+        Update tracks with a structured detection array (postprocess.DETECTION_DTYPE).
+
+        Returns:
+            list[Track]: Tracks matched or created by this update
+        """
+        ious = iou_matrix([track.bbox for track in self.tracks], detections['bbox'])
+        if ious.size:
+            # Never associate across classes
+            same_class = (np.array([track.class_id for track in self.tracks])[:, None] ==
+                          detections['class_id'][None, :])
+            ious[~same_class] = 0
+
+        matched_tracks = set()
+        matched_detections = set()
+        # Greedy: best remaining pair first
+        for flat in np.argsort(-ious, axis=None):
+            t, d = np.unravel_index(flat, ious.shape)
+            if ious[t, d] < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            track = self.tracks[t]
+            track.bbox = detections['bbox'][d].astype(np.float64)
+            track.confidence = float(detections['confidence'][d])
+            track.hits += 1
+            track.misses = 0
+            matched_tracks.add(t)
+            matched_detections.add(d)
+
+        active = [self.tracks[t] for t in sorted(matched_tracks)]
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+
+        for d in range(len(detections)):
+            if d not in matched_detections:
+                track = Track(self._next_id, int(detections['class_id'][d]), float(detections['confidence'][d]),
+                              detections['bbox'][d].astype(np.float64))
+                self._next_id += 1
+                self.tracks.append(track)
+                active.append(track)
+
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+        return active
+
+    def reset(self):
+        self.tracks = []
+
+
+class DetectionTracker:
+    """
+    Tracking-by-detection: runs the detector only every few frames and follows
+    objects in between with sparse optical flow.
+
+    On detection frames the detector's boxes are associated with existing tracks
+    (IoUTracker), which gives every object a stable track_id. On the frames in
+    between, a small grid of points inside each tracked box is followed with
+    pyramidal Lucas-Kanade on a downscaled grayscale frame, checked forwards and
+    backwards, and the box is moved by the median displacement of the points
+    that survived. If too few points survive for any track, the next frame runs
+    the detector again instead of waiting for the interval.
+
+    A tracker can be shared by several worker threads. The detector runs
+    outside the tracker's lock, so detection frames may be processed
+    concurrently, but tracks are only ever moved forwards: updates are applied
+    by frame index, and a frame that arrives after a later one was applied
+    does not change the tracks (it gets the current ones). Frames should
+    still be fed in capture order, or flow frames end up discarded.
+    """
+
+    def __init__(self, detect: Callable[[np.ndarray], np.ndarray], class_names, detect_interval: int = 5,
+                 min_flow_quality: float = 0.5, flow_width: int = 320, grid_size: int = 4,
+                 iou_threshold: float = 0.3, max_misses: int = 2):
+        """
+        Args:
+            detect: Callable returning a structured detection array (postprocess.DETECTION_DTYPE)
+                for a BGR frame, e.g. ``lambda frame: detector.detect_batch([frame], as_array=True)[0]``
+            class_names: Sequence or mapping from class index to name
+            detect_interval: Run the detector every this many frames (1 = every frame)
+            min_flow_quality: Fraction of a track's points that must be followed reliably;
+                below it the detector runs on the next frame
+            flow_width: Width of the grayscale frame optical flow runs on
+            grid_size: Points per side of the grid sampled inside each box
+            iou_threshold: Minimum IoU to associate a detection with a track
+            max_misses: Detection passes a track may go unmatched before it is dropped
+        """
+        self.detect = detect
+        self.class_names = class_names
+        self.detect_interval = max(1, detect_interval)
+        self.min_flow_quality = min_flow_quality
+        self.flow_width = flow_width
+        self.grid_size = grid_size
+        self.tracker = IoUTracker(iou_threshold, max_misses)
+
+        self.frames = 0
+        self.detections_run = 0
+        self._frames_since_detection = 0
+        self._force_detection = True
+        self._prev_gray = None
+        self._scale = 1.0
+        # Index of the last frame applied to the tracks
+        self._last_index = 0
+        self._lock = threading.Lock()
+
+        # Grid of relative sample positions inside a box, kept away from the edges
+        steps = (np.arange(grid_size) + 0.5) / grid_size * 0.6 + 0.2
+        self._grid = np.stack(np.meshgrid(steps, steps), axis=-1).reshape(-1, 2)
+
+    def _gray(self, frame: np.ndarray) -> tuple:
+        """The frame's grayscale image for optical flow, and its scale relative to the frame."""
+        gray = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+        scale = min(1.0, self.flow_width / frame.shape[1])
+        if scale < 1.0:
+            gray = cv.resize(gray, None, fx=scale, fy=scale, interpolation=cv.INTER_AREA)
+        return gray, scale
+
+    def _propagate(self, gray: np.ndarray, frame_shape: tuple) -> bool:
+        """Move every active track by optical flow. Returns False if tracking became unreliable."""
+        tracks = [track for track in self.tracker.tracks if track.misses == 0]
+        if not tracks:
+            return True
+
+        boxes = np.array([track.bbox for track in tracks]) * self._scale
+        sizes = boxes[:, 2:] - boxes[:, :2]
+        points = (boxes[:, None, :2] + self._grid[None, :, :] * sizes[:, None, :]).reshape(-1, 1, 2)
+        points = points.astype(np.float32)
+
+        lk_params = dict(winSize=(15, 15), maxLevel=2,
+                         criteria=(cv.TERM_CRITERIA_EPS | cv.TERM_CRITERIA_COUNT, 10, 0.03))
+        moved, status, _ = cv.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None, **lk_params)
+        back, back_status, _ = cv.calcOpticalFlowPyrLK(gray, self._prev_gray, moved, None, **lk_params)
+
+        # A point is reliable if it was found both ways and comes back to where it started
+        good = ((status.ravel() == 1) & (back_status.ravel() == 1) &
+                (np.linalg.norm((back - points).reshape(-1, 2), axis=1) < 1.0))
+        good = good.reshape(len(tracks), -1)
+        shifts = (moved - points).reshape(len(tracks), -1, 2) / self._scale
+
+        h, w = frame_shape[:2]
+        reliable = True
+        for track, track_good, track_shifts in zip(tracks, good, shifts):
+            if track_good.mean() < self.min_flow_quality:
+                reliable = False
+            if not track_good.any():
+                continue
+            dx, dy = np.median(track_shifts[track_good], axis=0)
+            bbox = track.bbox + (dx, dy, dx, dy)
+            track.bbox = np.clip(bbox, 0, (w, h, w, h))
+        return reliable
+
+    def process(self, frame: np.ndarray, index: Optional[int] = None) -> list[dict]:
+        """
+        Detect or track objects in the next frame.
+
+        Args:
+            frame: BGR frame
+            index: Increasing index of the frame, e.g. its capture sequence number
+                (default: the order of the calls)
+
+        Returns:
+            list: Detection dicts as returned by the detectors ('class_id', 'class_name',
+            'confidence', 'bbox', 'position'), plus 'track_id' and 'tracked' (True when the
+            box was propagated by optical flow instead of detected on this frame)
+        """
+        gray, scale = self._gray(frame)
+        with self._lock:
+            self.frames += 1
+            if index is None:
+                index = self.frames
+            # Decided up front so the detector can run without holding the lock
+            run_detector = (self._force_detection or self._prev_gray is None or
+                            self._prev_gray.shape != gray.shape or
+                            self._frames_since_detection + 1 >= self.detect_interval)
+            if run_detector:
+                self._frames_since_detection = 0
+                self._force_detection = False
+            else:
+                self._frames_since_detection += 1
+
+        detections = self.detect(frame) if run_detector else None
+
+        with self._lock:
+            if index <= self._last_index:
+                # A later frame was applied already; tracks never move backwards
+                if run_detector:
+                    self._force_detection = True
+                tracks = [track for track in self.tracker.tracks if track.misses == 0]
+                return self._to_dicts(tracks, frame.shape, tracked=True)
+
+            if run_detector:
+                tracks = self.tracker.update(detections)
+                self.detections_run += 1
+            elif self._prev_gray is None or self._prev_gray.shape != gray.shape:
+                # Reset or resized since the decision: nothing to follow the tracks from
+                self._force_detection = True
+                tracks = []
+            else:
+                self._force_detection = not self._propagate(gray, frame.shape)
+                tracks = [track for track in self.tracker.tracks if track.misses == 0]
+
+            self._prev_gray = gray
+            self._scale = scale
+            self._last_index = index
+            return self._to_dicts(tracks, frame.shape, tracked=not run_detector)
+
+    def _to_dicts(self, tracks: list[Track], frame_shape: tuple, tracked: bool) -> list[dict]:
+        if not tracks:
+            return []
+        bboxes = np.array([track.bbox for track in tracks]).astype(np.int32)
+        positions = position_indices(bboxes, frame_shape)
+
+        results = []
+        for track, bbox, position in zip(tracks, bboxes.tolist(), positions.tolist()):
+            try:
+                class_name = self.class_names[track.class_id]
+            except (IndexError, KeyError):
+                class_name = f"class_{track.class_id}"
+            results.append({
+                'class_id': track.class_id,
+                'class_name': class_name,
+                'confidence': track.confidence,
+                'bbox': bbox,
+                'position': POSITION_LABELS[position],
+                'track_id': track.track_id,
+                'tracked': tracked,
+            })
+        return results
+
+    def reset(self):
+        """Drop all tracks, e.g. when the video source or detector changes."""
+        with self._lock:
+            self.tracker.reset()
+            self._prev_gray = None
+            self._force_detection = True
+            self._frames_since_detection = 0
+            self._last_index = 0
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "detections_run": self.detections_run,
+            "detect_interval": self.detect_interval,
+            "active_tracks": sum(1 for track in self.tracker.tracks if track.misses == 0),
+        }
@@ -0,0 +1 @@
+"""od-models unit tests."""
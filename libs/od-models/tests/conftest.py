@@ -0,0 +1,62 @@
+"""Unit tests configuration module."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from od_models import mobilenet_ssd_detector  # noqa: E402
+
+
+class FakeNet:
+    """Stand-in for cv.dnn.Net returning a fixed SSD output tensor."""
+
+    def __init__(self, output):
+        self.output = output
+        self.inputs = []
+
+    def setInput(self, blob):
+        self.inputs.append(blob)
+
+    def forward(self):
+        return self.output
+
+
+def build_ssd_output(rows):
+    """Build a (1, 1, N, 7) SSD output from (class_id, confidence, x1, y1, x2, y2) rows."""
+    output = np.zeros((1, 1, len(rows), 7), dtype=np.float32)
+    for i, (class_id, confidence, x1, y1, x2, y2) in enumerate(rows):
+        output[0, 0, i] = [0, class_id, confidence, x1, y1, x2, y2]
+    return output
+
+
+@pytest.fixture
+def make_ssd_output():
+    """Factory building SSD output tensors, see build_ssd_output."""
+    return build_ssd_output
+
+
+@pytest.fixture
+def fake_caffe(monkeypatch, tmp_path):
+    """Replace Caffe loading with a FakeNet and record every load."""
+    loads = []
+    output = build_ssd_output([(15, 0.9, 0.1, 0.1, 0.3, 0.5)])
+
+    def read_net(config_path, model_path):
+        loads.append((config_path, model_path))
+        return FakeNet(output)
+
+    model_path = tmp_path / 'model.caffemodel'
+    config_path = tmp_path / 'model.prototxt'
+    model_path.write_bytes(b'')
+    config_path.write_text('')
+
+    monkeypatch.setattr(mobilenet_ssd_detector.cv.dnn, 'readNetFromCaffe', read_net)
+    monkeypatch.setattr(mobilenet_ssd_detector, 'DEFAULT_MODEL_PATH', str(model_path))
+    monkeypatch.setattr(mobilenet_ssd_detector, 'DEFAULT_CONFIG_PATH', str(config_path))
+    mobilenet_ssd_detector.clear_detector_cache()
+    yield loads
+    mobilenet_ssd_detector.clear_detector_cache()
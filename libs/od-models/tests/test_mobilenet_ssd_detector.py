@@ -0,0 +1,84 @@
+"""MobileNet SSD detector unit tests."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from od_models.mobilenet_ssd_detector import detect_and_draw, get_detector
+
+
+def test_get_detector_loads_network_once(fake_caffe):
+    """Repeated lookups with the same configuration share one network."""
+    first = get_detector()
+    second = get_detector()
+
+    assert first is second
+    assert len(fake_caffe) == 1
+
+
+def test_get_detector_keys_on_configuration(fake_caffe):
+    """Different thresholds or input sizes get their own detector."""
+    default = get_detector()
+    strict = get_detector(confidence_threshold=0.6)
+    small = get_detector(input_size=(300, 300))
+
+    assert default is not strict
+    assert default is not small
+    assert small.input_size == (300, 300)
+    assert len(fake_caffe) == 3
+
+
+def test_get_detector_is_thread_safe(fake_caffe):
+    """Concurrent first calls from executor threads load the network once."""
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        detectors = list(pool.map(lambda _: get_detector(), range(32)))
+
+    assert all(detector is detectors[0] for detector in detectors)
+    assert len(fake_caffe) == 1
+
+
+def test_detect_and_draw_reuses_cached_detector(fake_caffe):
+    """The module-level helper no longer rebuilds the network per frame."""
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    for _ in range(5):
+        _, detections = detect_and_draw(frame.copy())
+
+    assert len(fake_caffe) == 1
+    assert detections[0]['class_name'] == 'person'
+    assert detections[0]['bbox'] == [32, 24, 96, 120]
+
+
+def test_detect_batch_splits_rows_per_image(fake_caffe, make_ssd_output):
+    """One forward pass serves every frame of the batch."""
+    detector = get_detector()
+    output = make_ssd_output([(15, 0.9, 0.1, 0.1, 0.3, 0.5), (7, 0.8, 0.5, 0.5, 0.9, 0.9),
+                              (12, 0.7, 0.0, 0.0, 0.5, 0.5)])
+    output[0, 0, 1:, 0] = [1, 2]
+    detector.net.output = output
+    frames = [np.zeros((240, 320, 3), dtype=np.uint8), np.zeros((480, 640, 3), dtype=np.uint8),
+              np.zeros((100, 100, 3), dtype=np.uint8)]
+
+    results = detector.detect_batch(frames)
+
+    assert len(detector.net.inputs) == 1
+    assert detector.net.inputs[0].shape[0] == 3
+    assert [[d['class_name'] for d in detections] for detections in results] == [['person'], ['car'], ['dog']]
+    assert results[1][0]['bbox'] == [320, 240, 575, 431]
+    assert not frames[0].any()
+
+
+def test_detect_batch_draws_when_requested(fake_caffe):
+    frames = [np.zeros((240, 320, 3), dtype=np.uint8)]
+
+    get_detector().detect_batch(frames, draw=True)
+
+    assert frames[0].any()
+
+
+def test_detect_batch_reports_stage_timings(fake_caffe):
+    timings = {}
+    get_detector().detect_batch([np.zeros((240, 320, 3), dtype=np.uint8)], draw=True, timings=timings)
+
+    assert set(timings) == {'preprocess', 'forward', 'nms', 'draw'}
+    assert all(seconds >= 0 for seconds in timings.values())
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+import pytest
+
+from od_models import object_detection_tracker
+
+
+class FakeYOLO:
+    """Stand-in for ultralytics.YOLO that never finds anything."""
+
+    loads = 0
+
+    def __init__(self, weights):
+        FakeYOLO.loads += 1
+        time.sleep(0.05)  # Widen the window for concurrent first calls
+        self.names = {0: 'person'}
+
+    def predict(self, frames, conf, verbose):
+        return [types.SimpleNamespace(boxes=None) for _ in frames]
+
+
+@pytest.fixture
+def fake_ultralytics(monkeypatch):
+    FakeYOLO.loads = 0
+    monkeypatch.setitem(sys.modules, 'ultralytics', types.SimpleNamespace(YOLO=FakeYOLO))
+    monkeypatch.setattr(object_detection_tracker, '_model', None)
+    monkeypatch.setattr(object_detection_tracker, '_renderer', None)
+    monkeypatch.setattr(object_detection_tracker, '_load_stats', {"import_seconds": None, "load_seconds": None})
+    return FakeYOLO
+
+
+def test_import_does_not_load_the_model():
+    # Importing the module (done by the API at startup) must not pull in ultralytics/torch
+    src = os.path.join(os.path.dirname(__file__), '../src')
+    code = "import sys, od_models.object_detection_tracker; print('ultralytics' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=src, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == 'False'
+    assert not object_detection_tracker.model_info()['loaded']
+
+
+def test_model_is_loaded_once_on_first_use(fake_ultralytics):
+    threads = [threading.Thread(target=object_detection_tracker.get_model) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fake_ultralytics.loads == 1
+    assert object_detection_tracker.MODEL is object_detection_tracker.get_model()
+    info = object_detection_tracker.model_info()
+    assert info['loaded'] and info['load_seconds'] >= 0.05
+
+
+def test_warmup_runs_an_inference(fake_ultralytics):
+    info = object_detection_tracker.warmup()
+
+    assert info['loaded']
+    assert info['warmup_seconds'] >= 0
+    assert object_detection_tracker.detect(np.zeros((48, 64, 3), np.uint8)) == []
@@ -0,0 +1,91 @@
+"""Vectorized detection post-processing unit tests."""
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from od_models.postprocess import (POSITION_LABELS, decode_ssd, from_xyxy, non_max_suppression,
+                                   position_indices, to_dicts)
+
+
+def legacy_decode(rows, frame_shape, confidence_threshold):
+    """Reference implementation: the original per-row SSD decode loop."""
+    h, w = frame_shape
+    kept = []
+    for row in rows:
+        confidence, class_id = row[2], int(row[1])
+        if class_id == 0 or confidence < confidence_threshold:
+            continue
+        x1, y1, x2, y2 = (row[3:7] * np.array([w, h, w, h])).astype(int)
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        kept.append((class_id, [x1, y1, x2, y2]))
+    return kept
+
+
+def random_ssd_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = np.zeros((count, 7), dtype=np.float32)
+    rows[:, 1] = rng.integers(0, 21, count)
+    rows[:, 2] = rng.random(count)
+    corners = rng.uniform(-0.1, 1.1, (count, 2, 2))
+    rows[:, 3:5] = corners.min(axis=1)
+    rows[:, 5:7] = corners.max(axis=1)
+    return rows
+
+
+def test_decode_ssd_matches_per_row_loop():
+    rows = random_ssd_rows(1000)
+    detections = decode_ssd(rows, (480, 640), 0.3)
+
+    expected = legacy_decode(rows, (480, 640), 0.3)
+    assert detections['class_id'].tolist() == [class_id for class_id, _ in expected]
+    assert detections['bbox'].tolist() == [bbox for _, bbox in expected]
+
+
+def test_from_xyxy_clips_and_drops_degenerate_boxes():
+    detections = from_xyxy(np.array([[-5, 10, 700, 200], [50, 50, 50, 90]]), np.array([0.9, 0.8]),
+                           np.array([1, 2]), (240, 640))
+
+    assert detections['bbox'].tolist() == [[0, 10, 640, 200]]
+
+
+def test_position_indices_cover_grid():
+    h, w = 300, 300
+    centers = [(x, y) for y in (50, 150, 250) for x in (50, 150, 250)]
+    bboxes = np.array([[x - 10, y - 10, x + 10, y + 10] for x, y in centers])
+
+    labels = [POSITION_LABELS[i] for i in position_indices(bboxes, (h, w))]
+    assert labels == list(POSITION_LABELS)
+
+
+def test_non_max_suppression_keeps_best_of_overlapping_boxes():
+    detections = from_xyxy(np.array([[0, 0, 100, 100], [5, 5, 105, 105], [200, 200, 260, 260]]),
+                           np.array([0.6, 0.9, 0.5]), np.array([15, 15, 7]), (480, 640))
+
+    kept = non_max_suppression(detections, 0.3, 0.4, top_k=10)
+    assert kept['confidence'].tolist() == detections['confidence'][[1, 2]].tolist()
+    assert len(non_max_suppression(detections, 0.3, 0.4, top_k=1)) == 1
+
+
+@pytest.mark.parametrize("count", [40, 400])
+def test_non_max_suppression_matches_opencv(count):
+    rng = np.random.default_rng(count)
+    corners = rng.integers(0, 600, (count, 2, 2))
+    bboxes = np.concatenate([corners.min(axis=1), corners.max(axis=1) + 1], axis=1)
+    detections = from_xyxy(bboxes, rng.random(count).astype(np.float32), np.ones(count), (640, 640))
+
+    xywh = np.column_stack((detections['bbox'][:, :2], detections['bbox'][:, 2:] - detections['bbox'][:, :2]))
+    expected = np.asarray(cv.dnn.NMSBoxes(xywh.tolist(), detections['confidence'].tolist(), 0.3, 0.4)).flatten()
+
+    kept = non_max_suppression(detections, 0.3, 0.4)
+    assert kept['bbox'].tolist() == detections['bbox'][expected].tolist()
+
+
+def test_to_dicts_uses_class_names_and_labels():
+    detections = from_xyxy(np.array([[0, 0, 10, 10]]), np.array([0.5]), np.array([30]), (100, 100))
+
+    assert to_dicts(detections, ["background"]) == [{
+        'class_id': 30, 'class_name': 'class_30', 'confidence': 0.5, 'bbox': [0, 0, 10, 10], 'position': 'top left'
+    }]
@@ -0,0 +1,69 @@
+import cv2 as cv
+import numpy as np
+
+from od_models.postprocess import from_xyxy
+from od_models.rendering import DetectionRenderer
+
+
+def draw_inline(frame, detections, color):
+    """The per-frame getTextSize/putText drawing the renderer replaces."""
+    for detection in detections:
+        x1, y1, x2, y2 = detection['bbox']
+        cv.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        label = f"{detection['class_name']}: {detection['confidence']:.2f}"
+        (text_w, text_h), _ = cv.getTextSize(label, cv.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+        cv.rectangle(frame, (x1, y1 - text_h - 10), (x1 + text_w, y1), color, -1)
+        cv.putText(frame, label, (x1, y1 - 5), cv.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    return frame
+
+
+def detection(bbox, class_name='person', confidence=0.87):
+    return {'class_id': 15, 'class_name': class_name, 'confidence': confidence, 'bbox': bbox, 'position': 'center'}
+
+
+def test_matches_inline_drawing():
+    color = (10, 200, 30)
+    renderer = DetectionRenderer(color_for_class=lambda class_id: color)
+    detections = [detection([100, 80, 220, 300]), detection([300, 200, 400, 260], 'car', 0.51)]
+
+    expected = draw_inline(np.zeros((360, 480, 3), np.uint8), detections, color)
+    actual = renderer.draw(np.zeros((360, 480, 3), np.uint8), detections)
+
+    # The label background is drawn one pixel wider by cv.rectangle's inclusive corners, and
+    # confidence digits are stamped at whole pixels, up to half a pixel off putText's positions
+    assert np.count_nonzero(np.any(expected != actual, axis=2)) < 0.03 * np.count_nonzero(expected.any(axis=2))
+
+
+def test_label_sprites_are_cached():
+    renderer = DetectionRenderer(color_for_class=lambda class_id: (0, 0, 255))
+    frame = np.zeros((240, 320, 3), np.uint8)
+    detections = [detection([50, 50, 150, 150])]
+
+    for _ in range(5):
+        renderer.draw(frame, detections)
+
+    assert renderer.sprite_misses == 1
+    assert renderer.sprite_hits == 4
+
+
+def test_changing_confidences_reuse_the_class_sprite():
+    renderer = DetectionRenderer(color_for_class=lambda class_id: (0, 0, 255))
+    frame = np.zeros((240, 320, 3), np.uint8)
+
+    for confidence in (0.51, 0.62, 0.73, 0.84, 0.95, 0.56):
+        renderer.draw(frame, [detection([50, 50, 150, 150], confidence=confidence)])
+
+    # One "person: " sprite; digits rasterized once each, whatever the confidence
+    assert renderer.sprite_misses == 1
+    assert renderer.glyph_misses == len(set("0.51 0.62 0.73 0.84 0.95".replace(" ", "")))
+
+
+def test_labels_are_clipped_at_frame_edges():
+    renderer = DetectionRenderer(['background', 'person'])
+    frame = np.zeros((100, 120, 3), np.uint8)
+    detections = from_xyxy(np.array([[90, 5, 119, 60]]), np.array([0.9]), np.array([1]), frame.shape)
+
+    # Label sprite sticks out of the top and right edges of the frame
+    renderer.draw(frame, detections)
+    assert frame[0, 90:].any()
+    assert renderer.sprite_misses == 1
@@ -0,0 +1,110 @@
+import threading
+
+import numpy as np
+
+from od_models.postprocess import from_xyxy
+from od_models.tracking import DetectionTracker, IoUTracker, iou_matrix
+
+
+def detections(*boxes, class_id=15, shape=(240, 320)):
+    return from_xyxy(np.array(boxes).reshape(-1, 4), np.full(len(boxes), 0.9), np.full(len(boxes), class_id), shape)
+
+
+def textured_frame(x, y, size=60, shape=(240, 320)):
+    """Flat background with a textured square whose top-left corner is at (x, y)."""
+    frame = np.full((*shape, 3), 90, dtype=np.uint8)
+    patch = np.random.default_rng(0).integers(0, 255, (size, size, 3), dtype=np.uint8)
+    frame[y:y + size, x:x + size] = patch
+    return frame
+
+
+def test_iou_matrix():
+    ious = iou_matrix([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    np.testing.assert_allclose(ious, [[1.0, 1 / 3, 0.0]])
+
+
+def test_iou_tracker_keeps_ids_and_drops_lost_tracks():
+    tracker = IoUTracker(max_misses=1)
+    first = tracker.update(detections([10, 10, 50, 50], [100, 100, 150, 150]))
+    second = tracker.update(detections([14, 12, 54, 52]))
+
+    assert [track.track_id for track in first] == [1, 2]
+    assert [track.track_id for track in second] == [1]
+
+    tracker.update(detections([14, 12, 54, 52]))
+    assert [track.track_id for track in tracker.tracks] == [1]
+
+    # A different class at the same place is a new object
+    third = tracker.update(detections([14, 12, 54, 52], class_id=7))
+    assert [track.track_id for track in third] == [3]
+
+
+def test_detector_runs_every_k_frames_and_flow_follows_motion():
+    calls = []
+
+    def detect(frame):
+        calls.append(frame)
+        x = 40 + 3 * (len(calls) - 1) * 5  # Ground truth on detection frames
+        return detections([x, 50, x + 60, 110])
+
+    tracker = DetectionTracker(detect, {15: 'person'}, detect_interval=5)
+    results = [tracker.process(textured_frame(40 + 3 * i, 50)) for i in range(10)]
+
+    assert len(calls) == 2
+    assert [r[0]['tracked'] for r in results] == [False, True, True, True, True] * 2
+    assert {r[0]['track_id'] for r in results} == {1}
+    # Propagated boxes move with the square (3 px per frame)
+    for i, result in enumerate(results):
+        assert abs(result[0]['bbox'][0] - (40 + 3 * i)) <= 2
+    assert results[0][0]['class_name'] == 'person'
+    assert tracker.stats()['detections_run'] == 2
+
+
+def test_lost_texture_forces_detection():
+    calls = []
+
+    def detect(frame):
+        calls.append(frame)
+        return detections([40, 50, 100, 110])
+
+    tracker = DetectionTracker(detect, ['background'], detect_interval=10)
+    tracker.process(textured_frame(40, 50))
+    # The object disappears: flow cannot follow it, so the detector runs again next frame
+    blank = np.full((240, 320, 3), 90, dtype=np.uint8)
+    tracker.process(blank)
+    tracker.process(blank)
+
+    assert len(calls) == 2
+
+
+def test_detector_runs_concurrently_outside_the_lock():
+    # Both workers must be inside the detector at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=2)
+
+    def detect(frame):
+        barrier.wait()
+        return detections([40, 50, 100, 110])
+
+    tracker = DetectionTracker(detect, ['background'], detect_interval=1)
+    threads = [threading.Thread(target=tracker.process, args=(textured_frame(40, 50), index)) for index in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not barrier.broken
+    assert tracker.stats()['detections_run'] >= 1
+
+
+def test_late_frames_do_not_move_tracks_backwards():
+    def detect(frame):
+        x = int(np.argmax(frame[80, :, 0] != 90))
+        return detections([x, 50, x + 60, 110])
+
+    tracker = DetectionTracker(detect, ['background'], detect_interval=1)
+    newer = tracker.process(textured_frame(70, 50), index=2)
+    late = tracker.process(textured_frame(40, 50), index=1)
+
+    assert newer[0]['bbox'][0] == late[0]['bbox'][0] == 70
+    assert late[0]['tracked']
+    assert tracker.stats()['detections_run'] == 1